@@ -19,6 +19,7 @@ from arxiv_engine.pipelines import (
     fix as fix_pipeline,
     init_project as init_pipeline,
     lab as lab_pipeline,
+    mirror as mirror_pipeline,
     read as read_pipeline,
     repro as repro_pipeline,
     search as search_pipeline,
@@ -77,6 +78,13 @@ def daily_cmd(ctx: click.Context) -> None:
     _run_pipeline(daily_pipeline.main, ["arxiv daily", *ctx.args])
 
 
+@cli.command("mirror", context_settings=PASSTHROUGH_SETTINGS, add_help_option=False)
+@click.pass_context
+def mirror_cmd(ctx: click.Context) -> None:
+    """Sync a local arXiv metadata mirror."""
+    _run_pipeline(mirror_pipeline.main, ["arxiv mirror", *ctx.args])
+
+
 @cli.command("init", context_settings=PASSTHROUGH_SETTINGS, add_help_option=False)
 @click.pass_context
 def init_cmd(ctx: click.Context) -> None:
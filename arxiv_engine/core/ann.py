@@ -0,0 +1,178 @@
+"""Pure-NumPy inverted-file (IVF) index for approximate cosine search."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+ANN_MAGIC = "arxiv-ivf-1"
+DEFAULT_NPROBE = 8
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+ASSIGN_BLOCK_ROWS = 8192
+
+
+class IVFIndex:
+    """Coarse k-means quantizer with one inverted list of row numbers per centroid.
+
+    Row numbers refer to the matrix the index was trained on (the
+    ``.brain.vectors`` sidecar), so search needs that same matrix.
+    """
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        members: np.ndarray,
+        token: str = "",
+    ) -> None:
+        self.centroids = centroids
+        self.offsets = offsets
+        self.members = members
+        self.token = token
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @classmethod
+    def train(
+        cls,
+        matrix: np.ndarray,
+        nlist: int | None = None,
+        iterations: int = KMEANS_ITERATIONS,
+        seed: int = 0,
+        token: str = "",
+    ) -> "IVFIndex":
+        rows, dim = matrix.shape
+        if nlist is None:
+            nlist = default_nlist(rows)
+        nlist = max(1, min(nlist, rows)) if rows else 1
+        rng = np.random.default_rng(seed)
+
+        if rows == 0:
+            empty_rows = np.zeros(0, dtype=np.int64)
+            centroids = np.zeros((1, dim), dtype=np.float32)
+            return cls(centroids, np.zeros(2, dtype=np.int64), empty_rows, token)
+
+        sample_size = min(rows, max(nlist * KMEANS_SAMPLE_PER_LIST, 10_000))
+        sample_rows = np.sort(rng.choice(rows, size=sample_size, replace=False))
+        sample = np.asarray(matrix[sample_rows], dtype=np.float32)
+        centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+
+        for _ in range(max(1, iterations)):
+            labels = assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty lists from random sample rows.
+                sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()))]
+            centroids = normalize_rows(sums)
+
+        labels = assign(matrix, centroids)
+        members = np.argsort(labels, kind="stable").astype(np.int64)
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=nlist), out=offsets[1:])
+        return cls(centroids.astype(np.float32), offsets, members, token)
+
+    def search(
+        self,
+        matrix: np.ndarray,
+        query: np.ndarray,
+        top_k: int,
+        nprobe: int = DEFAULT_NPROBE,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return ``(rows, scores)`` for the best ``top_k`` rows, best first."""
+        if top_k <= 0 or not len(self.members):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        nprobe = max(1, min(nprobe, self.nlist))
+        coarse = self.centroids @ query
+        if nprobe < self.nlist:
+            probe = np.argpartition(-coarse, nprobe - 1)[:nprobe]
+        else:
+            probe = np.arange(self.nlist)
+        candidates = np.concatenate(
+            [self.members[self.offsets[c] : self.offsets[c + 1]] for c in probe]
+        )
+        if not len(candidates):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        candidates.sort()
+        scores = np.asarray(matrix[candidates], dtype=np.float32) @ query
+        if top_k < len(scores):
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return candidates[best], scores[best]
+
+    def save(self, path: Path) -> None:
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("wb") as handle:
+            np.savez(
+                handle,
+                header=np.frombuffer(
+                    json.dumps({"magic": ANN_MAGIC, "token": self.token}).encode("utf-8"),
+                    dtype=np.uint8,
+                ),
+                centroids=self.centroids,
+                offsets=self.offsets,
+                members=self.members,
+            )
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "IVFIndex | None":
+        try:
+            with np.load(path) as data:
+                header = json.loads(bytes(data["header"]).decode("utf-8"))
+                if header.get("magic") != ANN_MAGIC:
+                    return None
+                return cls(
+                    data["centroids"].astype(np.float32, copy=False),
+                    data["offsets"].astype(np.int64, copy=False),
+                    data["members"].astype(np.int64, copy=False),
+                    str(header.get("token", "")),
+                )
+        except (OSError, KeyError, ValueError, UnicodeDecodeError):
+            return None
+
+
+def default_nlist(rows: int) -> int:
+    return int(max(1, min(4096, round(np.sqrt(rows)))))
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    return matrix / norms
+
+
+def assign(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Nearest centroid (by inner product) for every row, in bounded blocks."""
+    labels = np.empty(matrix.shape[0], dtype=np.int64)
+    for start in range(0, matrix.shape[0], ASSIGN_BLOCK_ROWS):
+        block = np.asarray(matrix[start : start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        labels[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def exact_search(
+    matrix: np.ndarray, query: np.ndarray, top_k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    scores = matrix @ query
+    if top_k < len(scores):
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        best = np.arange(len(scores))
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return best, scores[best]
+
+
+def recall_at_k(approx: np.ndarray, exact: np.ndarray) -> float:
+    if not len(exact):
+        return 1.0
+    return len(set(approx.tolist()) & set(exact.tolist())) / len(exact)
@@ -0,0 +1,102 @@
+"""Streaming, paginated reads of arXiv API Atom feeds.
+
+Pages are requested ``page_size`` entries at a time and parsed with
+``ET.iterparse`` while they download; each ``<entry>`` is yielded as soon
+as it closes and then dropped from the tree, so memory stays flat no
+matter how many results are requested.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import textwrap
+import urllib.parse
+import xml.etree.ElementTree as ET
+from typing import IO, Iterable, Iterator, TypeVar
+
+from arxiv_engine.core.http_client import ARXIV_API, HttpClient, get_arxiv_client
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+ARXIV = "{http://arxiv.org/schemas/atom}"
+# arXiv serves at most 2000 entries per call and answers smaller slices faster.
+PAGE_SIZE = 200
+
+T = TypeVar("T")
+
+
+def entry_text(entry: ET.Element, tag: str) -> str:
+    element = entry.find(tag)
+    return element.text.strip() if element is not None and element.text else ""
+
+
+def parse_entry(entry: ET.Element) -> dict:
+    """Flatten one Atom ``<entry>`` into plain fields."""
+    abs_id = entry_text(entry, f"{ATOM}id")
+    primary = entry.find(f"{ARXIV}primary_category")
+    categories = [c.get("term", "") for c in entry.findall(f"{ATOM}category")]
+    return {
+        "id": abs_id.split("/abs/")[-1] if abs_id else "unknown",
+        "title": " ".join(entry_text(entry, f"{ATOM}title").split()),
+        "summary": entry_text(entry, f"{ATOM}summary"),
+        "published": entry_text(entry, f"{ATOM}published")[:10],
+        "updated": entry_text(entry, f"{ATOM}updated")[:10],
+        "authors": [
+            entry_text(author, f"{ATOM}name") for author in entry.findall(f"{ATOM}author")
+        ],
+        "categories": [c for c in categories if c],
+        "primary_category": (
+            primary.get("term") if primary is not None else None
+        ) or (categories[0] if categories and categories[0] else "unknown"),
+    }
+
+
+def iter_entries(stream: IO[bytes]) -> Iterator[dict]:
+    """Yield parsed entries from an Atom document as they are read."""
+    root: ET.Element | None = None
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        if root is None:
+            root = element
+        elif event == "end" and element.tag == f"{ATOM}entry":
+            yield parse_entry(element)
+            root.remove(element)
+
+
+def iter_query(
+    params: dict[str, object],
+    limit: int | None = None,
+    page_size: int = PAGE_SIZE,
+    client: HttpClient | None = None,
+    api: str = ARXIV_API,
+) -> Iterator[dict]:
+    """Page through an API query, yielding up to ``limit`` entries (all if ``None``)."""
+    client = client or get_arxiv_client()
+    start = 0
+    while limit is None or start < limit:
+        size = page_size if limit is None else min(page_size, limit - start)
+        query = urllib.parse.urlencode({**params, "start": start, "max_results": size})
+        seen = 0
+        with client.open(f"{api}?{query}") as stream:
+            for entry in iter_entries(stream):
+                seen += 1
+                yield entry
+        # A short page means the result set is exhausted.
+        if seen < size:
+            return
+        start += seen
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, max(1, size))):
+        yield batch
+
+
+def print_json_array(items: Iterable[dict]) -> None:
+    """Print ``items`` as ``json.dumps(list(items), indent=2)`` would, one item at a time."""
+    first = True
+    for item in items:
+        print("[" if first else ",")
+        print(textwrap.indent(json.dumps(item, indent=2), "  "), end="")
+        first = False
+    print("[]" if first else "\n]")
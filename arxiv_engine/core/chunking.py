@@ -0,0 +1,195 @@
+"""Structure-aware chunking for the brain index, budgeted in model tokens.
+
+Chunks follow the shape of each source: Markdown sections in summaries,
+top-level functions and classes in playground code, paragraphs and
+sentences in prose.  Adjacent small pieces are packed together up to the
+token budget and nothing overlaps, so every token is embedded once.
+"""
+
+from __future__ import annotations
+
+import ast
+import re
+from typing import Callable
+
+# all-MiniLM-L6-v2 truncates at 256 word pieces; leave room for [CLS]/[SEP]
+# and for the estimate undercounting.
+CHUNK_TOKENS = 240
+# WordPiece keeps common words whole and splits long rare ones.
+SUBWORD_CHARS = 8
+TOKEN_PIECE_RE = re.compile(r"\w+|[^\w\s]")
+HEADING_RE = re.compile(r"^#{1,6}\s+\S")
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+PARAGRAPH_RE = re.compile(r"\n\s*\n")
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\[(\"'])")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate the WordPiece token count of ``text`` without loading a tokenizer."""
+    return sum(
+        1 + (len(piece) - 1) // SUBWORD_CHARS for piece in TOKEN_PIECE_RE.findall(text)
+    )
+
+
+def pack(pieces: list[str], max_tokens: int, sep: str) -> list[str]:
+    """Greedily join consecutive pieces while they fit in ``max_tokens``."""
+    chunks: list[str] = []
+    current: list[str] = []
+    used = 0
+    for piece in pieces:
+        piece = piece.strip("\n")
+        if not piece.strip():
+            continue
+        size = estimate_tokens(piece)
+        if current and used + size > max_tokens:
+            chunks.append(sep.join(current))
+            current, used = [], 0
+        current.append(piece)
+        used += size
+    if current:
+        chunks.append(sep.join(current))
+    return chunks
+
+
+def split_words(text: str, max_tokens: int) -> list[str]:
+    pieces: list[str] = []
+    for word in text.split():
+        if estimate_tokens(word) <= max_tokens:
+            pieces.append(word)
+            continue
+        # Unbroken runs (hashes, base64, minified code) are cut by length.
+        step = max(1, max_tokens * SUBWORD_CHARS // 2)
+        pieces.extend(word[start : start + step] for start in range(0, len(word), step))
+    return pack(pieces, max_tokens, " ")
+
+
+def split_prose(text: str, max_tokens: int) -> list[str]:
+    pieces: list[str] = []
+    for paragraph in PARAGRAPH_RE.split(text):
+        paragraph = paragraph.strip()
+        if estimate_tokens(paragraph) <= max_tokens:
+            pieces.append(paragraph)
+            continue
+        for sentence in SENTENCE_RE.split(paragraph):
+            if estimate_tokens(sentence) <= max_tokens:
+                pieces.append(sentence)
+            else:
+                pieces.extend(split_words(sentence, max_tokens))
+    return pack(pieces, max_tokens, "\n\n")
+
+
+def split_lines(lines: list[str], max_tokens: int) -> list[str]:
+    pieces: list[str] = []
+    for line in lines:
+        if estimate_tokens(line) <= max_tokens:
+            pieces.append(line)
+        else:
+            pieces.extend(split_words(line, max_tokens))
+    return pack(pieces, max_tokens, "\n")
+
+
+def with_context(context: str, chunks: list[str]) -> list[str]:
+    return [f"{context}\n{chunk}" if context else chunk for chunk in chunks]
+
+
+def split_markdown(text: str, max_tokens: int) -> list[str]:
+    """One piece per heading section; long sections repeat their heading."""
+    sections: list[list[str]] = [[]]
+    fenced = False
+    for line in text.splitlines():
+        if FENCE_RE.match(line):
+            fenced = not fenced
+        elif not fenced and HEADING_RE.match(line):
+            sections.append([])
+        sections[-1].append(line)
+
+    pieces: list[str] = []
+    for lines in sections:
+        section = "\n".join(lines).strip()
+        if not section or estimate_tokens(section) <= max_tokens:
+            pieces.append(section)
+            continue
+        heading = lines[0].strip() if HEADING_RE.match(lines[0]) else ""
+        body = "\n".join(lines[1:] if heading else lines)
+        budget = max(1, max_tokens - estimate_tokens(heading))
+        pieces.extend(with_context(heading, split_prose(body, budget)))
+    return pack(pieces, max_tokens, "\n\n")
+
+
+def python_segments(
+    lines: list[str],
+    nodes: list[ast.stmt],
+    start: int,
+    stop: int,
+    max_tokens: int,
+    context: str = "",
+) -> list[str]:
+    """Cut ``lines[start:stop]`` at statement boundaries.
+
+    Comments and blank lines go with the statement that follows them.
+    Classes that are too big are split into their members, each prefixed
+    with the class line; other oversized statements fall back to lines.
+    """
+    segments: list[str] = []
+    cursor = start
+    for index, node in enumerate(nodes):
+        end = stop if index == len(nodes) - 1 else (node.end_lineno or node.lineno)
+        first, cursor = cursor, end
+        body = lines[first:end]
+        text = "\n".join(body)
+        prefix = context if segments or index else ""
+        if estimate_tokens(prefix) + estimate_tokens(text) <= max_tokens:
+            segments.extend(with_context(prefix, [text]))
+        elif isinstance(node, ast.ClassDef) and node.body:
+            segments.extend(
+                python_segments(
+                    lines,
+                    node.body,
+                    first,
+                    end,
+                    max_tokens,
+                    lines[node.lineno - 1].strip(),
+                )
+            )
+        else:
+            # Pieces after the first keep the def/class line for context.
+            signature = ""
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                signature = lines[node.lineno - 1].strip()
+            header = "\n".join(part for part in (prefix, signature) if part)
+            budget = max(1, max_tokens - estimate_tokens(header))
+            pieces = split_lines(body, budget)
+            segments.extend(with_context(prefix, pieces[:1]))
+            segments.extend(with_context(header, pieces[1:]))
+    return segments
+
+
+def split_python(text: str, max_tokens: int) -> list[str]:
+    lines = text.splitlines()
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return split_lines(lines, max_tokens)
+    if not tree.body:
+        return split_lines(lines, max_tokens)
+    segments = python_segments(lines, tree.body, 0, len(lines), max_tokens)
+    return pack(segments, max_tokens, "\n\n")
+
+
+def split_yaml(text: str, max_tokens: int) -> list[str]:
+    return split_lines(text.splitlines(), max_tokens)
+
+
+# Source kind -> splitter; kinds without an entry are treated as prose.
+SPLITTERS: dict[str, Callable[[str, int], list[str]]] = {
+    "summary": split_markdown,
+    "code": split_python,
+    "info": split_yaml,
+}
+
+
+def chunk_structured(text: str, kind: str, max_tokens: int = CHUNK_TOKENS) -> list[str]:
+    if not text.strip():
+        return []
+    splitter = SPLITTERS.get(kind, split_prose)
+    return [chunk for chunk in splitter(text, max(1, max_tokens)) if chunk.strip()]
@@ -0,0 +1,185 @@
+"""GitHub repo lookups for arXiv papers: `gh` calls, an on-disk cache, and concurrency."""
+
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Sequence, TypeVar
+
+from arxiv_engine.core.utils import get_arxiv_root
+
+# Upper bound on `gh` subprocesses in flight across every enrichment pool in
+# the process; GitHub's search API rate-limits bursts.
+MAX_CONCURRENT_LOOKUPS = 6
+CACHE_DB_NAME = ".github.cache.sqlite"
+# Repos found for a paper rarely go away; papers without code often gain it.
+HIT_TTL = 7 * 24 * 3600
+MISS_TTL = 24 * 3600
+
+_LOOKUP_SLOTS = threading.BoundedSemaphore(MAX_CONCURRENT_LOOKUPS)
+_CACHE: LookupCache | None = None
+_CACHE_LOCK = threading.Lock()
+_CACHE_OPENED = False
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def run_lookups(
+    items: Sequence[T],
+    lookup: Callable[[T, float], R | None],
+    call_timeout: float,
+    deadline: float | None = None,
+    workers: int = MAX_CONCURRENT_LOOKUPS,
+) -> list[R | None]:
+    """Run ``lookup(item, timeout)`` for every item on a bounded thread pool.
+
+    Results come back in input order.  Each call gets ``call_timeout``
+    seconds, cut short so that no call outlives ``deadline`` seconds from
+    now.  Calls that start after the deadline still run, with a timeout of
+    0, so they can answer from a cache; failed calls yield ``None``.
+    """
+    if not items:
+        return []
+    stop_at = time.monotonic() + deadline if deadline is not None else None
+
+    def call(item: T) -> R | None:
+        with _LOOKUP_SLOTS:
+            timeout = call_timeout
+            if stop_at is not None:
+                timeout = max(0.0, min(timeout, stop_at - time.monotonic()))
+            try:
+                return lookup(item, timeout)
+            except Exception:
+                return None
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(workers, len(items))), thread_name_prefix="github"
+    ) as executor:
+        return list(executor.map(call, items))
+
+
+class LookupCache:
+    """arXiv id -> best GitHub repo (or none), shared by `search` and `daily`.
+
+    Hits and misses expire separately.  Failed lookups (no `gh`, timeouts)
+    are never stored.
+    """
+
+    def __init__(
+        self, path: Path, hit_ttl: float = HIT_TTL, miss_ttl: float = MISS_TTL
+    ) -> None:
+        self.hit_ttl = hit_ttl
+        self.miss_ttl = miss_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS repos ("
+            "arxiv_id TEXT PRIMARY KEY,"
+            "repo TEXT,"
+            "stars INTEGER,"
+            "checked_at REAL NOT NULL"
+            ")"
+        )
+
+    def get(self, arxiv_id: str) -> tuple[bool, dict[str, Any] | None]:
+        """Return ``(found, value)``; ``found`` is false when missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT repo, stars, checked_at FROM repos WHERE arxiv_id = ?",
+                (arxiv_id,),
+            ).fetchone()
+        if row is None:
+            return False, None
+        repo, stars, checked_at = row
+        ttl = self.hit_ttl if repo else self.miss_ttl
+        if time.time() - float(checked_at) > ttl:
+            return False, None
+        return True, ({"repo": repo, "stars": int(stars or 0)} if repo else None)
+
+    def put(self, arxiv_id: str, value: dict[str, Any] | None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO repos (arxiv_id, repo, stars, checked_at) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    arxiv_id,
+                    value["repo"] if value else None,
+                    value["stars"] if value else None,
+                    time.time(),
+                ),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def get_lookup_cache() -> LookupCache | None:
+    """Process-wide cache under the knowledge root; ``None`` if it can't be opened."""
+    global _CACHE, _CACHE_OPENED
+    with _CACHE_LOCK:
+        if not _CACHE_OPENED:
+            _CACHE_OPENED = True
+            root = get_arxiv_root()
+            if root.exists():
+                try:
+                    _CACHE = LookupCache(root / CACHE_DB_NAME)
+                except sqlite3.Error as exc:
+                    print(f"Warning: GitHub lookup cache unavailable ({exc}).")
+        return _CACHE
+
+
+def cache_key(arxiv_id: str) -> str:
+    return re.sub(r"v\d+$", "", arxiv_id)
+
+
+def search_repos(query: str, limit: int, timeout: float) -> list[dict[str, Any]] | None:
+    """`gh search repos` results; ``None`` if gh is missing, failed or timed out."""
+    if timeout <= 0:
+        return None
+    try:
+        result = subprocess.run(
+            ["gh", "search", "repos", query, "--json", "fullName,stargazersCount", "--limit", str(limit)],
+            capture_output=True, text=True, timeout=timeout,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    try:
+        repos = json.loads(result.stdout) if result.stdout.strip() else []
+    except json.JSONDecodeError:
+        return None
+    return repos if isinstance(repos, list) else None
+
+
+def lookup_repo(
+    arxiv_id: str, limit: int, timeout: float, refresh: bool = False
+) -> dict[str, Any] | None:
+    """Most-starred repo among the top ``limit`` matches, served from the cache when fresh."""
+    cache = get_lookup_cache()
+    key = cache_key(arxiv_id)
+    if cache is not None and not refresh:
+        found, value = cache.get(key)
+        if found:
+            return value
+    repos = search_repos(arxiv_id, limit, timeout)
+    if repos is None:
+        return None
+    value = None
+    if repos:
+        top = max(repos, key=lambda x: x.get("stargazersCount", 0))
+        value = {"repo": top["fullName"], "stars": top["stargazersCount"]}
+    if cache is not None:
+        try:
+            cache.put(key, value)
+        except sqlite3.Error:
+            pass
+    return value
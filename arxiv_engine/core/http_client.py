@@ -0,0 +1,385 @@
+"""Pooled HTTP client for the arXiv API: keep-alive, gzip, backoff and revalidation.
+
+One ``HttpClient`` keeps idle connections per host and reuses them across
+requests, spaces requests to the same host by ``min_interval`` seconds,
+retries connection failures and 429/5xx answers with exponential backoff
+(honouring ``Retry-After``), and follows redirects.  Given a ``cache_dir``
+it keeps bodies that came with an ``ETag`` or ``Last-Modified`` on disk and
+revalidates them with ``If-None-Match``/``If-Modified-Since``, so a 304
+from a later run is served from the stored copy.  Only plain
+``http.client`` is used, so the client works against any local stand-in
+server.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import gzip
+import hashlib
+import http.client
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+from typing import IO, Iterator
+
+from arxiv_engine import __version__
+from arxiv_engine.core.utils import get_arxiv_root
+
+ARXIV_API = "http://export.arxiv.org/api/query"
+# arXiv's API terms ask for no more than one request every three seconds.
+ARXIV_MIN_INTERVAL = 3.0
+REQUEST_TIMEOUT = 30
+MAX_RETRIES = 4
+BACKOFF_BASE = 3.0
+MAX_BACKOFF = 60.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+MAX_REDIRECTS = 5
+CACHE_ENTRIES = 64
+CACHE_DIR_NAME = ".http.cache"
+USER_AGENT = f"arxiv-researcher/{__version__}"
+
+HostKey = tuple[str, str, int]
+
+_ARXIV_CLIENT: HttpClient | None = None
+_ARXIV_CLIENT_LOCK = threading.Lock()
+
+
+class HttpError(OSError):
+    """A request that failed after retries, or answered with a non-200 status."""
+
+    def __init__(self, url: str, status: int | None, reason: str) -> None:
+        self.url = url
+        self.status = status
+        self.reason = reason
+        label = f"HTTP {status}" if status is not None else "connection failed"
+        super().__init__(f"{label} for {url}: {reason}")
+
+
+class ResponseCache:
+    """Decoded bodies and their validators on disk, one file pair per URL.
+
+    ``<sha>.body`` holds the body and ``<sha>.json`` the URL with the
+    ``If-None-Match``/``If-Modified-Since`` headers that revalidate it.
+    Pairs beyond ``max_entries`` are dropped least recently used first.
+    """
+
+    def __init__(self, directory: Path, max_entries: int = CACHE_ENTRIES) -> None:
+        self.directory = directory
+        self.max_entries = max_entries
+        directory.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        name = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directory / f"{name}.json", self.directory / f"{name}.body"
+
+    def lookup(self, url: str) -> tuple[dict[str, str], IO[bytes]] | None:
+        """Return the validators and an open body file, or ``None`` if not cached."""
+        meta_path, body_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta.get("url") != url:
+                return None
+            # Opened now so a concurrent replace can't take the body away.
+            body = body_path.open("rb")
+        except (OSError, ValueError):
+            return None
+        with contextlib.suppress(OSError):
+            os.utime(meta_path)
+        return dict(meta["validators"]), body
+
+    def record(self, url: str, validators: dict[str, str], stream: IO[bytes]) -> IO[bytes]:
+        """Wrap ``stream`` so the body is stored once it has been read to the end."""
+        try:
+            return io.BufferedReader(_Recorder(self, url, validators, stream))
+        except OSError:
+            return stream
+
+    def discard(self, url: str) -> None:
+        for path in self._paths(url):
+            with contextlib.suppress(OSError):
+                path.unlink()
+
+    def commit(self, url: str, validators: dict[str, str], body_tmp: Path) -> None:
+        meta_path, body_path = self._paths(url)
+        try:
+            os.replace(body_tmp, body_path)
+            fd, meta_tmp = tempfile.mkstemp(dir=self.directory, suffix=".part")
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump({"url": url, "validators": validators}, handle)
+            os.replace(meta_tmp, meta_path)
+        except OSError:
+            self.discard(url)
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        try:
+            entries = sorted(
+                self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime
+            )
+        except OSError:
+            return
+        for meta_path in entries[: max(0, len(entries) - self.max_entries)]:
+            for path in (meta_path, meta_path.with_suffix(".body")):
+                with contextlib.suppress(OSError):
+                    path.unlink()
+
+
+class _Recorder(io.RawIOBase):
+    """Copies what is read from ``stream`` into a temporary file for the cache."""
+
+    def __init__(
+        self, cache: ResponseCache, url: str, validators: dict[str, str], stream: IO[bytes]
+    ) -> None:
+        self.cache = cache
+        self.url = url
+        self.validators = validators
+        self.stream = stream
+        fd, name = tempfile.mkstemp(dir=cache.directory, suffix=".part")
+        self.tmp_path = Path(name)
+        self.tmp: IO[bytes] | None = os.fdopen(fd, "wb")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:  # type: ignore[override]
+        data = self.stream.read(len(buffer))
+        if self.tmp is not None:
+            try:
+                if data:
+                    self.tmp.write(data)
+                else:
+                    self.tmp.close()
+                    self.tmp = None
+                    self.cache.commit(self.url, self.validators, self.tmp_path)
+            except OSError:
+                self._abandon()
+        buffer[: len(data)] = data
+        return len(data)
+
+    def _abandon(self) -> None:
+        if self.tmp is not None:
+            self.tmp.close()
+            self.tmp = None
+        with contextlib.suppress(OSError):
+            self.tmp_path.unlink()
+
+    def close(self) -> None:
+        # A body that wasn't read to the end is never stored.
+        self._abandon()
+        super().close()
+
+
+class HttpClient:
+    def __init__(
+        self,
+        timeout: float = REQUEST_TIMEOUT,
+        min_interval: float = 0.0,
+        retries: int = MAX_RETRIES,
+        backoff: float = BACKOFF_BASE,
+        max_backoff: float = MAX_BACKOFF,
+        cache_dir: Path | None = None,
+        cache_entries: int = CACHE_ENTRIES,
+        user_agent: str = USER_AGENT,
+    ) -> None:
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.user_agent = user_agent
+        self.cache: ResponseCache | None = None
+        if cache_dir is not None and cache_entries > 0:
+            try:
+                self.cache = ResponseCache(cache_dir, cache_entries)
+            except OSError as exc:
+                print(f"Warning: HTTP cache unavailable ({exc}).")
+        self._lock = threading.Lock()
+        self._idle: dict[HostKey, list[http.client.HTTPConnection]] = {}
+        self._next_slot: dict[HostKey, float] = {}
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+    def __enter__(self) -> HttpClient:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def get(self, url: str) -> bytes:
+        """Fetch ``url`` and return the decoded body."""
+        with self.open(url) as stream:
+            return stream.read()
+
+    @contextlib.contextmanager
+    def open(self, url: str) -> Iterator[IO[bytes]]:
+        """Stream the decoded body of ``url``, revalidating a cached copy.
+
+        The connection is pooled again if the body was fully read, and only
+        a fully read body is stored in the cache.
+        """
+        cached = self.cache.lookup(url) if self.cache is not None else None
+        try:
+            key, conn, resp = self._request(url, cached[0] if cached else {})
+            try:
+                if resp.status == 304 and cached:
+                    resp.read()
+                    yield cached[1]
+                    return
+                self._check_status(url, resp)
+                with contextlib.ExitStack() as stack:
+                    stream: IO[bytes] = resp
+                    if resp.getheader("Content-Encoding", "").lower() == "gzip":
+                        stream = stack.enter_context(gzip.GzipFile(fileobj=resp))  # type: ignore[arg-type]
+                    if self.cache is not None:
+                        validators = self._validators(resp)
+                        if validators:
+                            stream = stack.enter_context(
+                                self.cache.record(url, validators, stream)
+                            )
+                        elif cached:
+                            self.cache.discard(url)
+                    yield stream
+            finally:
+                self._release(key, conn, resp)
+        finally:
+            if cached:
+                cached[1].close()
+
+    def _check_status(self, url: str, resp: http.client.HTTPResponse) -> None:
+        if resp.status != 200:
+            resp.read()
+            raise HttpError(url, resp.status, resp.reason)
+
+    @staticmethod
+    def _validators(resp: http.client.HTTPResponse) -> dict[str, str]:
+        validators: dict[str, str] = {}
+        if etag := resp.getheader("ETag"):
+            validators["If-None-Match"] = etag
+        if modified := resp.getheader("Last-Modified"):
+            validators["If-Modified-Since"] = modified
+        return validators
+
+    def _request(
+        self, url: str, headers: dict[str, str]
+    ) -> tuple[HostKey, http.client.HTTPConnection, http.client.HTTPResponse]:
+        """Send a GET, following up to ``MAX_REDIRECTS`` redirects."""
+        for _ in range(MAX_REDIRECTS + 1):
+            key, conn, resp = self._send(url, headers)
+            location = resp.getheader("Location")
+            if resp.status not in REDIRECT_STATUSES or not location:
+                return key, conn, resp
+            resp.read()
+            self._release(key, conn, resp)
+            # A new host or scheme gets its own pooled connection via the key.
+            url = urllib.parse.urljoin(url, location)
+        raise HttpError(url, None, f"more than {MAX_REDIRECTS} redirects")
+
+    def _send(
+        self, url: str, headers: dict[str, str]
+    ) -> tuple[HostKey, http.client.HTTPConnection, http.client.HTTPResponse]:
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported URL: {url}")
+        default_port = 443 if parts.scheme == "https" else 80
+        key: HostKey = (parts.scheme, parts.hostname, parts.port or default_port)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        headers = {
+            "User-Agent": self.user_agent,
+            "Accept-Encoding": "gzip",
+            "Connection": "keep-alive",
+            **headers,
+        }
+
+        attempt = 0
+        while True:
+            self._wait_turn(key)
+            conn, reused = self._checkout(key)
+            try:
+                conn.request("GET", path, headers=headers)
+                resp = conn.getresponse()
+            except (OSError, http.client.HTTPException) as exc:
+                conn.close()
+                # The server may have dropped an idle keep-alive connection;
+                # that is not the server failing, so retry straight away.
+                if reused:
+                    continue
+                if attempt >= self.retries:
+                    raise HttpError(url, None, str(exc)) from exc
+                delay = self._backoff_delay(attempt, None)
+            else:
+                if resp.status not in RETRY_STATUSES or attempt >= self.retries:
+                    return key, conn, resp
+                delay = self._backoff_delay(attempt, resp.getheader("Retry-After"))
+                resp.read()
+                self._release(key, conn, resp)
+            attempt += 1
+            time.sleep(delay)
+
+    def _backoff_delay(self, attempt: int, retry_after: str | None) -> float:
+        delay = self.backoff * (2**attempt)
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return min(delay, self.max_backoff)
+
+    def _wait_turn(self, key: HostKey) -> None:
+        if self.min_interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(key, now))
+            self._next_slot[key] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def _checkout(self, key: HostKey) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout), False
+        return http.client.HTTPConnection(host, port, timeout=self.timeout), False
+
+    def _release(
+        self, key: HostKey, conn: http.client.HTTPConnection, resp: http.client.HTTPResponse
+    ) -> None:
+        # Only a fully read response leaves the connection ready for reuse.
+        if not resp.isclosed() or resp.will_close:
+            conn.close()
+            return
+        with self._lock:
+            self._idle.setdefault(key, []).append(conn)
+
+
+def get_arxiv_client() -> HttpClient:
+    """The process-wide client for export.arxiv.org, paced to its rate limit.
+
+    Revalidated bodies are kept under the knowledge root when it exists.
+    """
+    global _ARXIV_CLIENT
+    with _ARXIV_CLIENT_LOCK:
+        if _ARXIV_CLIENT is None:
+            root = get_arxiv_root()
+            _ARXIV_CLIENT = HttpClient(
+                min_interval=ARXIV_MIN_INTERVAL,
+                cache_dir=root / CACHE_DIR_NAME if root.exists() else None,
+            )
+        return _ARXIV_CLIENT
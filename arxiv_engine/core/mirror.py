@@ -0,0 +1,346 @@
+"""Local arXiv metadata mirror: SQLite + FTS5, harvested incrementally over OAI-PMH.
+
+``harvest_set`` pages through ``ListRecords`` (``metadataPrefix=arXiv``) with
+resumption tokens, upserting papers and dropping deleted records, and
+remembers the newest datestamp per set so the next sync only asks for what
+changed.  ``search_entries`` and ``recent_entries`` return the same fields
+as ``arxiv_feed.parse_entry`` so callers can swap the API for the mirror.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import time
+import urllib.parse
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import IO, Callable, Iterator, Sequence
+
+from arxiv_engine.core.http_client import HttpClient, get_arxiv_client
+from arxiv_engine.core.utils import get_arxiv_root
+
+OAI_API = "http://export.arxiv.org/oai2"
+MIRROR_DB_NAME = ".mirror.sqlite"
+DEFAULT_SETS = ("cs",)
+OAI = "{http://www.openarchives.org/OAI/2.0/}"
+ARXIV_META = "{http://arxiv.org/OAI/arXiv/}"
+FTS_TOKEN_RE = re.compile(r"\w+")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    abstract TEXT NOT NULL,
+    authors TEXT NOT NULL,
+    categories TEXT NOT NULL,
+    primary_category TEXT NOT NULL,
+    created TEXT NOT NULL,
+    updated TEXT NOT NULL,
+    datestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS papers_created ON papers (created);
+CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5 (
+    title, abstract, authors, categories, content='papers', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+    INSERT INTO papers_fts (rowid, title, abstract, authors, categories)
+    VALUES (new.rowid, new.title, new.abstract, new.authors, new.categories);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+    INSERT INTO papers_fts (papers_fts, rowid, title, abstract, authors, categories)
+    VALUES ('delete', old.rowid, old.title, old.abstract, old.authors, old.categories);
+END;
+CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+    INSERT INTO papers_fts (papers_fts, rowid, title, abstract, authors, categories)
+    VALUES ('delete', old.rowid, old.title, old.abstract, old.authors, old.categories);
+    INSERT INTO papers_fts (rowid, title, abstract, authors, categories)
+    VALUES (new.rowid, new.title, new.abstract, new.authors, new.categories);
+END;
+CREATE TABLE IF NOT EXISTS sync_state (
+    set_spec TEXT PRIMARY KEY,
+    datestamp TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+"""
+
+UPSERT_SQL = """
+INSERT INTO papers (
+    id, title, abstract, authors, categories, primary_category, created, updated, datestamp
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET
+    title = excluded.title,
+    abstract = excluded.abstract,
+    authors = excluded.authors,
+    categories = excluded.categories,
+    primary_category = excluded.primary_category,
+    created = excluded.created,
+    updated = excluded.updated,
+    datestamp = excluded.datestamp
+"""
+
+
+def get_mirror_path(root: Path | None = None) -> Path:
+    return (root or get_arxiv_root()) / MIRROR_DB_NAME
+
+
+def open_mirror(root: Path | None = None, create: bool = False) -> sqlite3.Connection:
+    """Open the mirror database; without ``create`` a missing mirror raises ``FileNotFoundError``."""
+    path = get_mirror_path(root)
+    if not create and not path.exists():
+        raise FileNotFoundError(f"No arXiv mirror at {path}; run `arxiv mirror sync` first.")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def element_text(element: ET.Element | None, tag: str) -> str:
+    child = element.find(tag) if element is not None else None
+    return " ".join(child.text.split()) if child is not None and child.text else ""
+
+
+def parse_record(record: ET.Element) -> tuple[str, str, dict | None]:
+    """Return ``(arxiv id, datestamp, fields)``; ``fields`` is ``None`` for deleted records."""
+    header = record.find(f"{OAI}header")
+    identifier = element_text(header, f"{OAI}identifier")
+    datestamp = element_text(header, f"{OAI}datestamp")
+    arxiv_id = identifier.rsplit(":", 1)[-1]
+    meta = record.find(f"{OAI}metadata/{ARXIV_META}arXiv")
+    if (header is not None and header.get("status") == "deleted") or meta is None:
+        return arxiv_id, datestamp, None
+
+    authors = []
+    for author in meta.findall(f"{ARXIV_META}authors/{ARXIV_META}author"):
+        parts = (
+            element_text(author, f"{ARXIV_META}forenames"),
+            element_text(author, f"{ARXIV_META}keyname"),
+            element_text(author, f"{ARXIV_META}suffix"),
+        )
+        authors.append(" ".join(part for part in parts if part))
+    categories = element_text(meta, f"{ARXIV_META}categories").split()
+    created = element_text(meta, f"{ARXIV_META}created") or datestamp
+    return element_text(meta, f"{ARXIV_META}id") or arxiv_id, datestamp, {
+        "title": element_text(meta, f"{ARXIV_META}title"),
+        "abstract": element_text(meta, f"{ARXIV_META}abstract"),
+        "authors": authors,
+        "categories": categories,
+        "created": created,
+        "updated": element_text(meta, f"{ARXIV_META}updated") or created,
+    }
+
+
+class OaiPage:
+    """One ``ListRecords`` response, parsed as it streams in.
+
+    ``resumption_token`` is set once ``records()`` has been exhausted.
+    """
+
+    def __init__(self, stream: IO[bytes]) -> None:
+        self.stream = stream
+        self.resumption_token: str | None = None
+
+    def records(self) -> Iterator[tuple[str, str, dict | None]]:
+        parent: ET.Element | None = None
+        for event, element in ET.iterparse(self.stream, events=("start", "end")):
+            if event == "start":
+                if element.tag == f"{OAI}ListRecords":
+                    parent = element
+                continue
+            if element.tag == f"{OAI}record":
+                yield parse_record(element)
+                if parent is not None:
+                    parent.remove(element)
+            elif element.tag == f"{OAI}resumptionToken":
+                self.resumption_token = (element.text or "").strip() or None
+            elif element.tag == f"{OAI}error":
+                code = element.get("code", "")
+                if code != "noRecordsMatch":
+                    raise ValueError(f"OAI-PMH error {code}: {(element.text or '').strip()}")
+
+
+def harvest_set(
+    conn: sqlite3.Connection,
+    set_spec: str,
+    since: str | None = None,
+    full: bool = False,
+    client: HttpClient | None = None,
+    api: str = OAI_API,
+    progress: Callable[[int, int], None] | None = None,
+) -> tuple[int, int]:
+    """Harvest one OAI set into the mirror; returns ``(upserted, deleted)``.
+
+    Without ``since`` the harvest resumes from the set's stored datestamp,
+    unless ``full`` asks for everything.  Papers are committed page by
+    page; the datestamp is only advanced once the whole harvest succeeds,
+    so an interrupted sync starts over instead of skipping records.
+    """
+    client = client or get_arxiv_client()
+    if since is None and not full:
+        row = conn.execute(
+            "SELECT datestamp FROM sync_state WHERE set_spec = ?", (set_spec,)
+        ).fetchone()
+        since = row[0] if row else None
+
+    params: dict[str, str] = {"verb": "ListRecords", "metadataPrefix": "arXiv", "set": set_spec}
+    if since:
+        params["from"] = since
+    upserted = deleted = 0
+    newest = since or ""
+    while True:
+        page_rows: list[tuple] = []
+        page_deleted: list[tuple[str]] = []
+        with client.open(f"{api}?{urllib.parse.urlencode(params)}") as stream:
+            page = OaiPage(stream)
+            for arxiv_id, datestamp, fields in page.records():
+                newest = max(newest, datestamp)
+                if fields is None:
+                    page_deleted.append((arxiv_id,))
+                    continue
+                page_rows.append(
+                    (
+                        arxiv_id,
+                        fields["title"],
+                        fields["abstract"],
+                        json.dumps(fields["authors"], ensure_ascii=False),
+                        " ".join(fields["categories"]),
+                        fields["categories"][0] if fields["categories"] else "unknown",
+                        fields["created"],
+                        fields["updated"],
+                        datestamp,
+                    )
+                )
+        with conn:
+            conn.executemany(UPSERT_SQL, page_rows)
+            conn.executemany("DELETE FROM papers WHERE id = ?", page_deleted)
+        upserted += len(page_rows)
+        deleted += len(page_deleted)
+        if progress is not None:
+            progress(upserted, deleted)
+        if not page.resumption_token:
+            break
+        # Follow-up requests carry only the verb and the token.
+        params = {"verb": "ListRecords", "resumptionToken": page.resumption_token}
+
+    if newest:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (set_spec, datestamp, synced_at) "
+                "VALUES (?, ?, ?)",
+                (set_spec, newest, time.time()),
+            )
+    return upserted, deleted
+
+
+def fts_query(text: str) -> str:
+    """Quote every word so user text can't be read as FTS5 syntax; words are ANDed."""
+    return " ".join(f'"{token}"' for token in FTS_TOKEN_RE.findall(text))
+
+
+def row_to_entry(row: sqlite3.Row | tuple) -> dict:
+    arxiv_id, title, abstract, authors, categories, primary, created, updated = row
+    return {
+        "id": arxiv_id,
+        "title": title,
+        "summary": abstract,
+        "published": created,
+        "updated": updated,
+        "authors": json.loads(authors),
+        "categories": categories.split(),
+        "primary_category": primary,
+    }
+
+
+ENTRY_COLUMNS = (
+    "p.id, p.title, p.abstract, p.authors, p.categories, p.primary_category, p.created, p.updated"
+)
+
+
+def search_entries(query: str, limit: int, root: Path | None = None) -> list[dict]:
+    """Best-matching mirrored papers for ``query``, ranked by BM25."""
+    match = fts_query(query)
+    if not match or limit <= 0:
+        return []
+    conn = open_mirror(root)
+    try:
+        rows = conn.execute(
+            f"SELECT {ENTRY_COLUMNS} FROM papers_fts JOIN papers p ON p.rowid = papers_fts.rowid "
+            "WHERE papers_fts MATCH ? ORDER BY bm25(papers_fts) LIMIT ?",
+            (match, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [row_to_entry(row) for row in rows]
+
+
+def recent_entries(
+    query: str, since: str, limit: int, root: Path | None = None
+) -> list[dict]:
+    """Mirrored papers matching ``query`` first submitted on or after ``since``, newest first."""
+    match = fts_query(query)
+    if not match or limit <= 0:
+        return []
+    conn = open_mirror(root)
+    try:
+        rows = conn.execute(
+            f"SELECT {ENTRY_COLUMNS} FROM papers_fts JOIN papers p ON p.rowid = papers_fts.rowid "
+            "WHERE papers_fts MATCH ? AND p.created >= ? "
+            "ORDER BY p.created DESC, p.id DESC LIMIT ?",
+            (match, since, limit),
+        ).fetchall()
+    finally:
+        conn.close()
+    return [row_to_entry(row) for row in rows]
+
+
+def mirror_status(root: Path | None = None) -> dict[str, object]:
+    path = get_mirror_path(root)
+    conn = open_mirror(root)
+    try:
+        papers = conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+        newest = conn.execute("SELECT MAX(created) FROM papers").fetchone()[0]
+        sets = [
+            {"set": set_spec, "datestamp": datestamp, "synced_at": synced_at}
+            for set_spec, datestamp, synced_at in conn.execute(
+                "SELECT set_spec, datestamp, synced_at FROM sync_state ORDER BY set_spec"
+            )
+        ]
+    finally:
+        conn.close()
+    return {
+        "path": str(path),
+        "papers": papers,
+        "newest_paper": newest,
+        "size_bytes": path.stat().st_size,
+        "sets": sets,
+    }
+
+
+def sync_mirror(
+    sets: Sequence[str] = DEFAULT_SETS,
+    since: str | None = None,
+    full: bool = False,
+    root: Path | None = None,
+    client: HttpClient | None = None,
+    api: str = OAI_API,
+    progress: Callable[[str, int, int], None] | None = None,
+) -> dict[str, tuple[int, int]]:
+    """Harvest every set; ``full`` ignores stored datestamps, ``since`` overrides them."""
+    conn = open_mirror(root, create=True)
+    results: dict[str, tuple[int, int]] = {}
+    try:
+        for set_spec in sets:
+            results[set_spec] = harvest_set(
+                conn,
+                set_spec,
+                since,
+                full,
+                client,
+                api,
+                (lambda up, gone, s=set_spec: progress(s, up, gone)) if progress else None,
+            )
+    finally:
+        conn.close()
+    return results
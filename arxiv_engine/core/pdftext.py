@@ -0,0 +1,142 @@
+"""Plain-text extraction and section splitting for downloaded paper PDFs."""
+
+from __future__ import annotations
+
+import re
+import shutil
+import subprocess
+from pathlib import Path
+
+EXTRACT_TIMEOUT = 120
+MAX_HEADING_WORDS = 8
+SECTION_NAMES = {
+    "abstract",
+    "introduction",
+    "background",
+    "related work",
+    "preliminaries",
+    "method",
+    "methods",
+    "methodology",
+    "approach",
+    "experiments",
+    "experimental setup",
+    "experimental results",
+    "results",
+    "evaluation",
+    "analysis",
+    "discussion",
+    "ablation study",
+    "ablation studies",
+    "limitations",
+    "conclusion",
+    "conclusions",
+    "future work",
+    "appendix",
+    "references",
+    "bibliography",
+    "acknowledgments",
+    "acknowledgements",
+}
+# Bibliographies are mostly author lists and venues; they only add noise.
+SKIPPED_SECTIONS = {"references", "bibliography"}
+ABSTRACT_RE = re.compile(r"^abstract\b[\s.:—–-]*(?P<rest>.*)$", re.IGNORECASE)
+NUMBERED_RE = re.compile(r"^(?P<num>[1-9]\d?)\.?\s+(?P<title>[A-Z][^.]*)$")
+
+
+def pdf_extractor_available() -> bool:
+    if shutil.which("pdftotext"):
+        return True
+    try:
+        import pdfplumber  # type: ignore[import-not-found]  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def extract_pdf_text(path: Path) -> str:
+    """Extract text with poppler's pdftotext, falling back to pdfplumber."""
+    if shutil.which("pdftotext"):
+        try:
+            result = subprocess.run(
+                ["pdftotext", "-enc", "UTF-8", str(path), "-"],
+                check=False,
+                capture_output=True,
+                timeout=EXTRACT_TIMEOUT,
+            )
+        except (OSError, subprocess.SubprocessError):
+            return ""
+        return result.stdout.decode("utf-8", errors="replace")
+    try:
+        import pdfplumber  # type: ignore[import-not-found]
+    except ImportError:
+        return ""
+    try:
+        with pdfplumber.open(path) as pdf:
+            return "\n".join(page.extract_text() or "" for page in pdf.pages)
+    except Exception:
+        return ""
+
+
+def heading_title(line: str, last_number: int) -> tuple[str, int] | None:
+    """Return ``(title, number)`` if ``line`` looks like a top-level section heading."""
+    if len(line) > 80:
+        return None
+    plain = line.rstrip(":").strip()
+    if plain.lower() in SECTION_NAMES:
+        return plain.title(), last_number
+    match = NUMBERED_RE.match(plain)
+    if not match:
+        return None
+    number = int(match.group("num"))
+    title = match.group("title").strip()
+    # Numbered headings must move forward; this filters list items and
+    # stray numbers from tables.
+    if not last_number < number <= last_number + 3:
+        return None
+    if len(title.split()) > MAX_HEADING_WORDS:
+        return None
+    return title, number
+
+
+def clean_section(lines: list[str]) -> str:
+    text = "\n".join(lines)
+    text = re.sub(r"-\n(?=[a-z])", "", text)
+    return " ".join(text.split())
+
+
+def split_sections(text: str) -> list[tuple[str, str]]:
+    """Split extracted paper text into ``(section title, body)`` pairs.
+
+    Text before the first heading is kept as ``Front Matter``; references
+    are dropped.  Sub-sections stay inside their top-level section.
+    """
+    sections: list[tuple[str, str]] = []
+    title = "Front Matter"
+    lines: list[str] = []
+    last_number = 0
+
+    def close() -> None:
+        body = clean_section(lines)
+        if body and title.lower() not in SKIPPED_SECTIONS:
+            sections.append((title, body))
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            lines.append("")
+            continue
+        abstract = ABSTRACT_RE.match(line)
+        if abstract and title == "Front Matter":
+            close()
+            title, lines = "Abstract", [abstract.group("rest")]
+            continue
+        heading = heading_title(line, last_number)
+        if heading is None:
+            lines.append(line)
+            continue
+        close()
+        title, last_number = heading
+        lines = []
+    close()
+    return sections
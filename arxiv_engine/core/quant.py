@@ -0,0 +1,225 @@
+"""Compressed vector codecs (scaled int8, product quantization) for the brain index.
+
+Both codecs score asymmetrically: the query stays float32 and only the
+stored vectors are compressed.  The ``*Matrix`` views duck-type the
+float32 matrices used elsewhere (``shape``, ``len``, row indexing that
+decodes to float32, and ``matrix @ query``) so exact scans and the IVF
+index work on them unchanged.
+"""
+
+from __future__ import annotations
+
+import base64
+import struct
+from typing import Iterable
+
+import numpy as np
+
+PQ_CENTROIDS = 256
+PQ_TRAIN_ROWS = 10_000
+PQ_ITERATIONS = 8
+SCORE_BLOCK_ROWS = 65_536
+
+
+class Int8Matrix:
+    """Rows stored as int8 codes with one float32 scale per row."""
+
+    def __init__(self, codes: np.ndarray, scales: np.ndarray) -> None:
+        self.codes = codes
+        self.scales = scales
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.codes.shape  # type: ignore[return-value]
+
+    def __len__(self) -> int:
+        return int(self.codes.shape[0])
+
+    def __getitem__(self, rows: object) -> np.ndarray:
+        codes = np.asarray(self.codes[rows], dtype=np.float32)
+        scales = np.asarray(self.scales[rows], dtype=np.float32)
+        return codes * scales[..., None]
+
+    def __matmul__(self, query: np.ndarray) -> np.ndarray:
+        scores = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), SCORE_BLOCK_ROWS):
+            stop = start + SCORE_BLOCK_ROWS
+            block = np.asarray(self.codes[start:stop], dtype=np.float32)
+            scores[start:stop] = (block @ query) * self.scales[start:stop]
+        return scores
+
+
+class PQMatrix:
+    """Rows stored as one uint8 centroid id per sub-vector."""
+
+    def __init__(self, codes: np.ndarray, codebook: np.ndarray) -> None:
+        self.codes = codes
+        self.codebook = codebook
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        m, _, dsub = self.codebook.shape
+        return int(self.codes.shape[0]), int(m * dsub)
+
+    def __len__(self) -> int:
+        return int(self.codes.shape[0])
+
+    def __getitem__(self, rows: object) -> np.ndarray:
+        codes = np.asarray(self.codes[rows], dtype=np.int64)
+        subspaces = np.arange(self.codebook.shape[0])
+        decoded = self.codebook[subspaces, codes]
+        return decoded.reshape(*codes.shape[:-1], -1).astype(np.float32, copy=False)
+
+    def __matmul__(self, query: np.ndarray) -> np.ndarray:
+        m, _, dsub = self.codebook.shape
+        # lut[j, k] = <query_j, centroid_{j,k}>; a row's score is the sum of
+        # its m table entries.
+        lut = np.einsum("mkd,md->mk", self.codebook, query.reshape(m, dsub))
+        subspaces = np.arange(m)
+        scores = np.empty(len(self), dtype=np.float32)
+        for start in range(0, len(self), SCORE_BLOCK_ROWS):
+            block = np.asarray(self.codes[start : start + SCORE_BLOCK_ROWS])
+            scores[start : start + len(block)] = lut[subspaces, block].sum(axis=1)
+        return scores
+
+
+class Int8Codec:
+    name = "int8"
+
+    def __init__(self, dim: int) -> None:
+        self.dim = dim
+        self.row_bytes = 4 + dim
+
+    def encode(self, vector: Iterable[float]) -> bytes:
+        values = np.asarray(list(vector), dtype=np.float32)
+        peak = float(np.max(np.abs(values))) if values.size else 0.0
+        scale = peak / 127.0 if peak > 0.0 else 1.0
+        codes = np.clip(np.rint(values / scale), -127, 127).astype(np.int8)
+        return struct.pack("<f", scale) + codes.tobytes()
+
+    def decode(self, blob: bytes) -> list[float] | None:
+        if len(blob) != self.row_bytes:
+            return None
+        (scale,) = struct.unpack("<f", blob[:4])
+        codes = np.frombuffer(blob, dtype=np.int8, offset=4)
+        return (codes.astype(np.float32) * scale).tolist()
+
+    def matrix_from_blobs(self, blobs: list[bytes]) -> Int8Matrix:
+        raw = np.frombuffer(b"".join(blobs), dtype=np.uint8).reshape(
+            len(blobs), self.row_bytes
+        )
+        scales = raw[:, :4].copy().view("<f4").reshape(len(blobs))
+        codes = raw[:, 4:].copy().view(np.int8)
+        return Int8Matrix(codes, scales.astype(np.float32))
+
+
+class PQCodec:
+    name = "pq"
+
+    def __init__(self, codebook: np.ndarray) -> None:
+        self.codebook = codebook.astype(np.float32, copy=False)
+        self.subvectors, self.centroids, self.dsub = self.codebook.shape
+        self.dim = self.subvectors * self.dsub
+        self.row_bytes = self.subvectors
+
+    @classmethod
+    def train(
+        cls,
+        matrix: np.ndarray,
+        subvectors: int | None = None,
+        iterations: int = PQ_ITERATIONS,
+        seed: int = 0,
+    ) -> "PQCodec":
+        rows, dim = matrix.shape
+        m = subvectors or default_subvectors(dim)
+        if dim % m:
+            raise ValueError(f"vector dim {dim} is not divisible by {m} sub-vectors")
+        dsub = dim // m
+        rng = np.random.default_rng(seed)
+        if rows == 0:
+            return cls(np.zeros((m, 1, dsub), dtype=np.float32))
+
+        picks = np.sort(rng.choice(rows, size=min(rows, PQ_TRAIN_ROWS), replace=False))
+        sample = np.asarray(matrix[picks], dtype=np.float32).reshape(-1, m, dsub)
+        ks = min(PQ_CENTROIDS, len(sample))
+        codebook = np.empty((m, ks, dsub), dtype=np.float32)
+        for j in range(m):
+            data = sample[:, j, :]
+            centroids = data[rng.choice(len(data), size=ks, replace=False)].copy()
+            for _ in range(max(1, iterations)):
+                labels = nearest(data, centroids)
+                counts = np.bincount(labels, minlength=ks)
+                sums = np.stack(
+                    [
+                        np.bincount(labels, weights=data[:, d], minlength=ks)
+                        for d in range(dsub)
+                    ],
+                    axis=1,
+                )
+                filled = counts > 0
+                centroids[filled] = sums[filled] / counts[filled, None]
+            codebook[j] = centroids
+        return cls(codebook)
+
+    def encode_matrix(self, matrix: np.ndarray) -> np.ndarray:
+        data = np.asarray(matrix, dtype=np.float32).reshape(
+            -1, self.subvectors, self.dsub
+        )
+        codes = np.empty((len(data), self.subvectors), dtype=np.uint8)
+        for start in range(0, len(data), SCORE_BLOCK_ROWS):
+            block = data[start : start + SCORE_BLOCK_ROWS]
+            for j in range(self.subvectors):
+                codes[start : start + len(block), j] = nearest(
+                    block[:, j, :], self.codebook[j]
+                )
+        return codes
+
+    def encode(self, vector: Iterable[float]) -> bytes:
+        values = np.asarray(list(vector), dtype=np.float32).reshape(1, self.dim)
+        return self.encode_matrix(values).tobytes()
+
+    def decode(self, blob: bytes) -> list[float] | None:
+        if len(blob) != self.row_bytes:
+            return None
+        codes = np.frombuffer(blob, dtype=np.uint8).reshape(1, -1)
+        return PQMatrix(codes, self.codebook)[0].tolist()
+
+    def matrix_from_blobs(self, blobs: list[bytes]) -> PQMatrix:
+        codes = np.frombuffer(b"".join(blobs), dtype=np.uint8).reshape(
+            len(blobs), self.subvectors
+        )
+        return PQMatrix(codes, self.codebook)
+
+    def to_meta(self) -> dict[str, str]:
+        return {
+            "pq_shape": f"{self.subvectors},{self.centroids},{self.dsub}",
+            "pq_codebook": base64.b64encode(
+                self.codebook.astype("<f4").tobytes()
+            ).decode("ascii"),
+        }
+
+    @classmethod
+    def from_meta(cls, meta: dict[str, str]) -> "PQCodec | None":
+        try:
+            m, ks, dsub = (int(part) for part in meta["pq_shape"].split(","))
+            raw = base64.b64decode(meta["pq_codebook"])
+            codebook = np.frombuffer(raw, dtype="<f4").reshape(m, ks, dsub)
+        except (KeyError, ValueError):
+            return None
+        return cls(codebook.astype(np.float32))
+
+
+def default_subvectors(dim: int) -> int:
+    """Largest sub-vector count with at least 4 dims each (16x smaller than float32)."""
+    for m in range(max(1, dim // 4), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def nearest(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the closest centroid (squared L2) for every row of ``data``."""
+    distances = (
+        np.sum(centroids * centroids, axis=1)[None, :] - 2.0 * (data @ centroids.T)
+    )
+    return np.argmin(distances, axis=1)
@@ -78,6 +78,9 @@ def load_info(project_dir: Path) -> dict[str, Any]:
         "title": r'title:\s*["\']?([^"\'\n]+)',
         "github_repo": r'github_repo:\s*["\']?([^"\'\n]+)',
         "abs_url": r'abs_url:\s*["\']?([^"\'\n]+)',
+        "status": r'status:\s*["\']?([^"\'\n]+)',
+        "published": r'published:\s*["\']?([^"\'\n]+)',
+        "created_at": r'created_at:\s*["\']?([^"\'\n]+)',
     }
     for key, pattern in patterns.items():
         match = re.search(pattern, content)
@@ -4,52 +4,252 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import hashlib
+import heapq
+import importlib.util
+import io
 import json
 import math
+import multiprocessing
+import os
+import queue
 import re
+import shutil
+import signal
+import socket
+import socketserver
 import sqlite3
+import struct
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable, TypedDict
+from typing import TYPE_CHECKING, Collection, Iterable, Iterator, NamedTuple, TypedDict
 
-from arxiv_engine.core.utils import get_arxiv_root, read_text_safe
+from arxiv_engine.core.utils import get_arxiv_root, load_info, read_text_safe
+
+if TYPE_CHECKING:
+    from arxiv_engine.core.ann import IVFIndex
+    from arxiv_engine.core.quant import Int8Codec, PQCodec
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; scoring falls back to pure Python.
+    np = None  # type: ignore[assignment]
 
 DB_NAME = ".brain.sqlite"
+CACHE_DB_NAME = ".brain.cache.sqlite"
+DEFAULT_CACHE_SIZE = 200_000
+QUERY_CACHE_SIZE = 1_000
+VECTORS_NAME = ".brain.vectors"
+VECTORS_MAGIC = b"ARXVEC01"
+VECTORS_HEADER_SIZE = 4096
+ANN_NAME = ".brain.ann"
+SHARDS_DIR = ".brain.shards"
+# Per-build values; everything else in a shard's meta must agree to merge.
+VOLATILE_META = ("vectors_token", "index_generation", "lexical_docs", "lexical_avgdl")
+DEFAULT_NPROBE = 8
+SEARCH_MODES = ("hybrid", "vector", "lexical")
+SOURCE_KINDS = ("summary", "info", "code", "pdf")
+SINCE_RE = re.compile(r"^\d{4}(-\d{2}(-\d{2})?)?$")
+SOCKET_NAME = ".brain.sock"
+DAEMON_TIMEOUT = 30.0
+MAX_REQUEST_BYTES = 1 << 16
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+RRF_DEPTH = 50
+# Bumped when cached query results change shape.
+QUERY_CACHE_FORMAT = 2
 HASH_VECTOR_DIM = 256
+# Token -> bucket memo entries kept per hash backend before starting over.
+HASH_MEMO_SIZE = 1 << 18
+# Hash variants as recorded in the index meta; missing keys mean the
+# original unsigned term-frequency vectors.
+HASH_DEFAULT_META = {"hash_signed": "0", "hash_weighting": "tf"}
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 SENTENCE_BACKEND = "sentence-transformers"
+BACKEND_CHOICES = ("auto", "hash", SENTENCE_BACKEND)
+BACKEND_STATE_NAME = ".brain.backend.json"
+BACKEND_RETRY_SECONDS = 24 * 3600
 CHUNK_CHARS = 1200
 CHUNK_OVERLAP = 200
+# "structured" follows headings, code definitions and sentences within a
+# token budget; "window" is the original fixed character window.
+CHUNKERS = ("structured", "window")
+DEFAULT_CHUNKER = "structured"
+CHUNK_REPORT_NAME = ".brain.chunks.json"
+EMBED_BATCH_SIZE = 64
+READ_WORKERS = 4
+PDF_NAME = "paper.pdf"
+PDF_TEXT_DIR = ".brain.pdftext"
+PDF_WORKERS = os.cpu_count() or 1
+QUEUE_DEPTH = 256
+WRITE_BATCH_ROWS = 500
+COMMIT_EVERY = 20_000
+SQLITE_CACHE_KIB = -65536
+STAGING_SUFFIX = "_build"
+STAGED_TABLES = ("chunks", "files", "postings", "projects")
 TOKEN_RE = re.compile(r"[A-Za-z0-9_]+")
-
-_BACKEND: "EmbeddingBackend | None" = None
+SCHEMA_VERSION = 4
+DEFAULT_VECTOR_DTYPE = "float32"
+VECTOR_DTYPES = {"float32": "f", "float16": "e"}
+NUMPY_DTYPES = {"float32": "<f4", "float16": "<f2"}
+# Quantized modes store codes instead of floats and need NumPy on both sides.
+COMPRESSED_DTYPES = ("int8", "pq")
+STORAGE_DTYPES = (*VECTOR_DTYPES, *COMPRESSED_DTYPES)
+
+_BACKENDS: "dict[str, EmbeddingBackend]" = {}
 _WARNED_MISSING = False
+# Query-side state kept warm across calls (and for the life of `brain serve`).
+_QUERY_BACKENDS: "dict[tuple[str, str], EmbeddingBackend]" = {}
+_RESIDENT_VECTORS: "dict[tuple[str, str], tuple[object, object]]" = {}
+
+
+class QueryFilters(NamedTuple):
+    source: str | None = None
+    category: str | None = None
+    status: str | None = None
+    since: str | None = None
 
 
 class SearchResult(TypedDict):
     score: float
+    # "cosine", "bm25" or "rrf"; hybrid scores are reciprocal-rank fusion
+    # values (around 1/60), not similarities.
+    score_kind: str
+    # Vector cosine of the chunk, when it came up in the vector ranking.
+    similarity: float | None
     source: str
     path: str
     chunk_index: int
     content: str
 
 
+class Ranking(NamedTuple):
+    hits: list[tuple[float, int]]
+    kind: str
+    similarity: dict[int, float]
+
+
 class EmbeddingBackend:
     name: str
     dim: int
+    cacheable = True
 
     def encode(self, texts: list[str]) -> list[list[float]]:
         raise NotImplementedError
 
 
 class HashEmbedding(EmbeddingBackend):
-    name = "hash"
+    """Feature hashing of word tokens into ``dim`` buckets.
 
-    def __init__(self, dim: int = HASH_VECTOR_DIM) -> None:
+    With the defaults the vectors are bit-identical to ``hash_vector``.
+    ``signed`` gives every token a hash-derived sign so that colliding
+    tokens cancel out instead of piling up.  ``tfidf`` marks an index whose
+    bucket weights (``idf``) are fitted over the corpus after a full build.
+    """
+
+    name = "hash"
+    cacheable = False
+
+    def __init__(
+        self,
+        dim: int = HASH_VECTOR_DIM,
+        signed: bool = False,
+        tfidf: bool = False,
+        idf: list[float] | None = None,
+        memo_size: int = HASH_MEMO_SIZE,
+    ) -> None:
         self.dim = dim
+        self.signed = signed
+        self.tfidf = tfidf
+        self.idf = idf if idf is not None and len(idf) == dim else None
+        self.memo_size = memo_size
+        # token -> bucket, or bucket + dim for tokens with a negative sign.
+        self._codes: dict[str, int] = {}
+
+    @classmethod
+    def from_meta(cls, meta: dict[str, str]) -> "HashEmbedding":
+        dim = int(meta.get("vector_dim") or HASH_VECTOR_DIM)
+        try:
+            weights = json.loads(meta.get("hash_idf", "null")) or []
+            idf = [float(value) for value in weights] or None
+        except (TypeError, ValueError):
+            idf = None
+        return cls(
+            dim,
+            signed=meta.get("hash_signed") == "1",
+            tfidf=meta.get("hash_weighting") == "tfidf",
+            idf=idf,
+        )
+
+    def settings(self) -> dict[str, str]:
+        return {
+            "hash_signed": "1" if self.signed else "0",
+            "hash_weighting": "tfidf" if self.tfidf else "tf",
+        }
+
+    def code(self, token: str) -> int:
+        code = self._codes.get(token)
+        if code is None:
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "big")
+            code = value % self.dim
+            if self.signed and value >> 63:
+                code += self.dim
+            if len(self._codes) >= self.memo_size:
+                self._codes.clear()
+            self._codes[token] = code
+        return code
 
     def encode(self, texts: list[str]) -> list[list[float]]:
-        return [hash_vector(text, self.dim) for text in texts]
+        if np is None:
+            return [self._encode_python(text) for text in texts]
+        code = self.code
+        codes: list[int] = []
+        lengths: list[int] = []
+        for text in texts:
+            tokens = tokenize(text)
+            codes.extend(code(token) for token in tokens)
+            lengths.append(len(tokens))
+        if not texts:
+            return []
+        flat = np.asarray(codes, dtype=np.int64)
+        rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        buckets = flat % self.dim
+        weights = None
+        if self.signed:
+            weights = np.where(flat >= self.dim, -1.0, 1.0)
+        # One bincount over (row, bucket) cells encodes the whole batch.
+        matrix = np.bincount(
+            rows * self.dim + buckets, weights=weights, minlength=len(texts) * self.dim
+        ).astype(np.float64).reshape(len(texts), self.dim)
+        if self.idf is not None:
+            matrix *= np.asarray(self.idf, dtype=np.float64)
+        norms = np.sqrt(np.einsum("ij,ij->i", matrix, matrix))
+        nonzero = norms > 0.0
+        matrix[nonzero] /= norms[nonzero, None]
+        return matrix.tolist()
+
+    def _encode_python(self, text: str) -> list[float]:
+        vector = [0.0] * self.dim
+        for token in tokenize(text):
+            code = self.code(token)
+            if code >= self.dim:
+                vector[code - self.dim] -= 1.0
+            else:
+                vector[code] += 1.0
+        if self.idf is not None:
+            vector = [value * weight for value, weight in zip(vector, self.idf)]
+        norm = math.sqrt(sum(v * v for v in vector))
+        if norm == 0.0:
+            return vector
+        return [v / norm for v in vector]
 
 
 class SentenceTransformerEmbedding(EmbeddingBackend):
@@ -69,6 +269,234 @@ class SentenceTransformerEmbedding(EmbeddingBackend):
         return [list(vector) for vector in vectors]
 
 
+class CachedEmbedding(EmbeddingBackend):
+    """Serve ``encode`` from a content-addressed SQLite cache with LRU eviction.
+
+    Every batch is committed (and the cache trimmed) before ``encode``
+    returns, so a long build never holds the file's write lock for long and
+    an interrupted build keeps the embeddings it already paid for.
+    """
+
+    def __init__(
+        self, backend: EmbeddingBackend, cache_path: Path, max_entries: int
+    ) -> None:
+        self.backend = backend
+        self.name = backend.name
+        self.dim = backend.dim
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._warned = False
+        self._prefix = (
+            f"{backend.name}\0{getattr(backend, 'model_name', '')}\0{backend.dim}\0"
+        )
+        self._conn = sqlite3.connect(cache_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY,"
+            "vector BLOB NOT NULL,"
+            "last_used REAL NOT NULL"
+            ")"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used "
+            "ON embeddings (last_used)"
+        )
+
+    def cache_key(self, text: str) -> str:
+        return hashlib.sha256((self._prefix + text).encode("utf-8")).hexdigest()
+
+    def encode(self, texts: list[str]) -> list[list[float]]:
+        keys = [self.cache_key(text) for text in texts]
+        cached = self._lookup(sorted(set(keys)))
+        missing: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached:
+                missing.setdefault(key, text)
+        self.hits += len(texts) - sum(1 for key in keys if key in missing)
+        self.misses += len(missing)
+
+        if missing:
+            vectors = self.backend.encode(list(missing.values()))
+            if len(vectors) != len(missing):
+                raise ValueError("embedding backend returned wrong batch size")
+            now = time.time()
+            fresh = {
+                key: [float(v) for v in vector]
+                for key, vector in zip(missing, vectors)
+            }
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) "
+                "VALUES (?, ?, ?)",
+                [(key, pack_vector(vector), now) for key, vector in fresh.items()],
+            )
+            cached.update(fresh)
+        try:
+            self._commit()
+        except sqlite3.Error as exc:
+            # A busy cache file must not fail the build; drop this batch's rows.
+            self._conn.rollback()
+            if not self._warned:
+                print(f"Warning: embedding cache not updated ({exc}).")
+                self._warned = True
+        return [cached[key] for key in keys]
+
+    def _lookup(self, keys: list[str]) -> dict[str, list[float]]:
+        found: dict[str, list[float]] = {}
+        # Stay well under SQLITE_MAX_VARIABLE_NUMBER on older builds.
+        for start in range(0, len(keys), 500):
+            batch = keys[start : start + 500]
+            placeholders = ",".join("?" for _ in batch)
+            for key, blob in self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                batch,
+            ):
+                vector = unpack_vector(blob)
+                if len(vector) == self.dim:
+                    found[str(key)] = vector
+            if found:
+                self._conn.execute(
+                    f"UPDATE embeddings SET last_used = ? WHERE key IN ({placeholders})",
+                    [time.time(), *batch],
+                )
+        return found
+
+    def _commit(self) -> None:
+        (total,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = int(total) - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                "SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                (excess,),
+            )
+        self._conn.commit()
+
+    def close(self) -> None:
+        try:
+            self._commit()
+        finally:
+            self._conn.close()
+
+
+def open_embedding_cache(
+    root: Path, backend: EmbeddingBackend, max_entries: int
+) -> CachedEmbedding | None:
+    if max_entries <= 0 or not backend.cacheable:
+        return None
+    try:
+        return CachedEmbedding(backend, root / CACHE_DB_NAME, max_entries)
+    except sqlite3.Error as exc:
+        print(f"Warning: embedding cache unavailable ({exc}).")
+        return None
+
+
+class QueryCache:
+    """Persistent LRU of ``query_brain`` results for one index generation.
+
+    Lives next to the embedding cache so separate CLI invocations share it;
+    rows from older generations are never served and are purged on write.
+    """
+
+    def __init__(self, path: Path, generation: str, max_entries: int) -> None:
+        self.generation = generation
+        self.max_entries = max_entries
+        self._conn = sqlite3.connect(path, timeout=1.0)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_results ("
+            "key TEXT PRIMARY KEY,"
+            "generation TEXT NOT NULL,"
+            "results TEXT NOT NULL,"
+            "last_used REAL NOT NULL"
+            ")"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_query_results_last_used "
+            "ON query_results (last_used)"
+        )
+
+    def get(self, key: str) -> list[SearchResult] | None:
+        try:
+            row = self._conn.execute(
+                "SELECT results FROM query_results WHERE key = ? AND generation = ?",
+                (key, self.generation),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE query_results SET last_used = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._conn.commit()
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError):
+            return None
+
+    def put(self, key: str, results: list[SearchResult]) -> None:
+        try:
+            self._conn.execute(
+                "DELETE FROM query_results WHERE generation != ?", (self.generation,)
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO query_results "
+                "(key, generation, results, last_used) VALUES (?, ?, ?, ?)",
+                (key, self.generation, json.dumps(results), time.time()),
+            )
+            self._conn.execute(
+                "DELETE FROM query_results WHERE key IN ("
+                "SELECT key FROM query_results ORDER BY last_used DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def open_query_cache(
+    root: Path, meta: dict[str, str], max_entries: int = QUERY_CACHE_SIZE
+) -> QueryCache | None:
+    if max_entries <= 0:
+        return None
+    try:
+        return QueryCache(
+            root / CACHE_DB_NAME, meta.get("index_generation", "0"), max_entries
+        )
+    except sqlite3.Error:
+        return None
+
+
+def query_cache_key(
+    text: str,
+    meta: dict[str, str],
+    top_k: int,
+    nprobe: int,
+    exact: bool,
+    mode: str,
+    rerank: int,
+    filters: QueryFilters | None,
+) -> str:
+    normalized = " ".join(text.lower().split())
+    payload = json.dumps(
+        [
+            QUERY_CACHE_FORMAT,
+            normalized,
+            meta.get("embedding_backend", ""),
+            meta.get("embedding_model", ""),
+            top_k,
+            nprobe,
+            exact,
+            mode,
+            rerank,
+            list(filters) if filters is not None else None,
+        ]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
 def chunk_text(
     text: str, max_chars: int = CHUNK_CHARS, overlap: int = CHUNK_OVERLAP
 ) -> list[str]:
@@ -91,6 +519,14 @@ def chunk_text(
     return chunks
 
 
+def chunk_source(text: str, source: str, chunker: str = DEFAULT_CHUNKER) -> list[str]:
+    if chunker == "window":
+        return chunk_text(text)
+    from arxiv_engine.core.chunking import chunk_structured
+
+    return chunk_structured(text, source)
+
+
 def tokenize(text: str) -> list[str]:
     return [token.lower() for token in TOKEN_RE.findall(text)]
 
@@ -106,40 +542,226 @@ def warn_fallback_to_hash(reason: str) -> None:
     )
 
 
-def load_sentence_backend(model_name: str) -> EmbeddingBackend | None:
+def probe_sentence_backend() -> str | None:
+    """Fingerprint the installed sentence-transformers without importing it."""
+    try:
+        spec = importlib.util.find_spec("sentence_transformers")
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.origin:
+        return None
+    try:
+        mtime_ns = os.stat(spec.origin).st_mtime_ns
+    except OSError:
+        mtime_ns = 0
+    return f"{sys.executable}:{spec.origin}:{mtime_ns}"
+
+
+def get_backend_state_path(root: Path) -> Path:
+    return root / BACKEND_STATE_NAME
+
+
+def load_backend_state(root: Path) -> dict[str, dict[str, object]]:
+    try:
+        state = json.loads(get_backend_state_path(root).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def save_backend_state(root: Path, state: dict[str, dict[str, object]]) -> None:
+    path = get_backend_state_path(root)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+
+
+def load_sentence_backend(
+    model_name: str, force: bool = False, root: Path | None = None
+) -> EmbeddingBackend | None:
+    """Load sentence-transformers only if it is installed and not known broken.
+
+    The outcome is recorded in ``<root>/.brain.backend.json`` against a
+    fingerprint of the installed package, so a failing torch import is
+    paid once per install (or per ``BACKEND_RETRY_SECONDS``) rather than
+    on every command.  ``root`` defaults to the configured knowledge root.
+    """
+    fingerprint = probe_sentence_backend()
+    if fingerprint is None:
+        return None
+    root = root or get_arxiv_root()
+    state = load_backend_state(root)
+    record = state.get(model_name, {})
+    known = record.get("fingerprint") == fingerprint
+    age = time.time() - float(record.get("checked_at") or 0)  # type: ignore[arg-type]
+    if not force and known and not record.get("available") and age < BACKEND_RETRY_SECONDS:
+        print(
+            f"Warning: sentence-transformers failed to load earlier "
+            f"({record.get('error')}); not retrying until "
+            f"{get_backend_state_path(root)} expires or is removed."
+        )
+        return None
+
+    error = ""
+    backend: EmbeddingBackend | None = None
     try:
-        return SentenceTransformerEmbedding(model_name)
+        backend = SentenceTransformerEmbedding(model_name)
     except Exception as exc:
+        error = str(exc)
         print(f"Warning: failed to load sentence-transformers ({exc}).")
-        return None
+    if not known or bool(record.get("available")) != (backend is not None):
+        state[model_name] = {
+            "fingerprint": fingerprint,
+            "available": backend is not None,
+            "error": error,
+            "checked_at": time.time(),
+        }
+        if root.exists():
+            save_backend_state(root, state)
+    return backend
 
 
-def get_embedding_backend() -> EmbeddingBackend:
-    global _BACKEND
-    if _BACKEND is not None:
-        return _BACKEND
-    backend = load_sentence_backend(EMBEDDING_MODEL)
+def get_embedding_backend(
+    preference: str = "auto", root: Path | None = None
+) -> EmbeddingBackend | None:
+    """Backend for building: ``auto`` prefers sentence-transformers, else hash."""
+    cached = _BACKENDS.get(preference)
+    if cached is not None:
+        return cached
+    backend: EmbeddingBackend | None = None
+    if preference != "hash":
+        backend = load_sentence_backend(
+            EMBEDDING_MODEL, force=preference == SENTENCE_BACKEND, root=root
+        )
     if backend is None:
-        warn_fallback_to_hash("sentence-transformers unavailable")
+        if preference == SENTENCE_BACKEND:
+            print(
+                "sentence-transformers is not available. "
+                "Install with: pip install -r requirements.txt"
+            )
+            return None
+        if preference == "auto":
+            warn_fallback_to_hash("sentence-transformers unavailable")
         backend = HashEmbedding()
-    _BACKEND = backend
+    _BACKENDS[preference] = backend
     return backend
 
 
-def select_backend_for_query(meta: dict[str, str]) -> EmbeddingBackend | None:
+def select_backend_for_query(
+    meta: dict[str, str], root: Path | None = None
+) -> EmbeddingBackend | None:
     backend_name = meta.get("embedding_backend", HashEmbedding.name)
+    model_name = meta.get("embedding_model", EMBEDDING_MODEL)
+    key = (backend_name, model_name if backend_name == SENTENCE_BACKEND else "")
+    if backend_name == HashEmbedding.name:
+        key = (
+            backend_name,
+            "\0".join(
+                meta.get(name, "")
+                for name in ("vector_dim", "hash_signed", "hash_weighting", "hash_idf")
+            ),
+        )
+    cached = _QUERY_BACKENDS.get(key)
+    if cached is not None:
+        return cached
+    backend: EmbeddingBackend | None
     if backend_name == HashEmbedding.name:
-        return HashEmbedding()
-    if backend_name == SENTENCE_BACKEND:
-        model_name = meta.get("embedding_model", EMBEDDING_MODEL)
-        backend = load_sentence_backend(model_name)
+        backend = HashEmbedding.from_meta(meta)
+        # IDF weights change with every full build; drop superseded ones.
+        for stale in [entry for entry in _QUERY_BACKENDS if entry[0] == backend_name]:
+            del _QUERY_BACKENDS[stale]
+    elif backend_name == SENTENCE_BACKEND:
+        backend = load_sentence_backend(model_name, root=root)
         if backend is None:
             print(
                 "Index built with sentence-transformers. Install dependencies and retry."
             )
-        return backend
-    print(f"Unknown embedding backend: {backend_name}")
-    return None
+            return None
+    else:
+        print(f"Unknown embedding backend: {backend_name}")
+        return None
+    _QUERY_BACKENDS[key] = backend
+    return backend
+
+
+def configure_hash_backend(
+    meta: dict[str, str], signed: bool | None, tfidf: bool | None
+) -> HashEmbedding:
+    """Hash backend for a build; options left unset follow the index in ``meta``."""
+    current = HashEmbedding()
+    if meta.get("embedding_backend") == HashEmbedding.name:
+        current = HashEmbedding.from_meta(meta)
+    if signed is None:
+        signed = current.signed
+    if tfidf is None:
+        tfidf = current.tfidf
+    # Fitted weights only carry over to an update of the same variant.
+    idf = current.idf if (signed, tfidf) == (current.signed, current.tfidf) else None
+    return HashEmbedding(signed=signed, tfidf=tfidf, idf=idf)
+
+
+def fit_staged_idf(
+    conn: sqlite3.Connection, table: str, dim: int, vector_dtype: str
+) -> list[float]:
+    """Fit bucket IDF weights on staged float32 hash vectors and re-weight them.
+
+    Scaling a normalized term-frequency vector by the weights and
+    normalizing again is the same as weighting the raw counts, so no text
+    is re-embedded.  Rows are re-encoded as ``vector_dtype``, except that
+    PQ rows stay float32 for ``quantize_staged_vectors``.
+    """
+    ids, matrix = read_staged_vectors(conn, table, dim)
+    df = np.count_nonzero(matrix, axis=0)
+    idf = np.log((len(ids) + 1) / (df + 1)) + 1.0
+    weighted = matrix.astype(np.float64) * idf
+    norms = np.linalg.norm(weighted, axis=1)
+    nonzero = norms > 0.0
+    weighted[nonzero] /= norms[nonzero, None]
+    write_staged_vectors(conn, table, ids, weighted, vector_dtype)
+    return idf.tolist()
+
+
+def read_staged_vectors(
+    conn: sqlite3.Connection, table: str, dim: int
+) -> tuple[list[int], np.ndarray]:
+    """Load the float32 vectors of a staging table as an ``(ids, matrix)`` pair."""
+    ids: list[int] = []
+    blobs: list[bytes] = []
+    for row_id, value in conn.execute(f"SELECT id, vector FROM {table} ORDER BY id"):
+        ids.append(int(row_id))
+        blobs.append(value)
+    return ids, np.frombuffer(b"".join(blobs), dtype="<f4").reshape(len(ids), dim)
+
+
+def write_staged_vectors(
+    conn: sqlite3.Connection,
+    table: str,
+    ids: list[int],
+    matrix: np.ndarray,
+    vector_dtype: str,
+) -> None:
+    """Store ``matrix`` rows back as ``vector_dtype``; PQ rows stay float32."""
+    dim = matrix.shape[1] if matrix.ndim == 2 else 0
+    codec = get_vector_codec(vector_dtype, dim, {}) if vector_dtype == "int8" else None
+    numpy_dtype = NUMPY_DTYPES.get(vector_dtype, "<f4")
+    for start in range(0, len(ids), COMMIT_EVERY):
+        stop = min(start + COMMIT_EVERY, len(ids))
+        conn.executemany(
+            f"UPDATE {table} SET vector = ? WHERE id = ?",
+            (
+                (
+                    codec.encode(matrix[row])
+                    if codec is not None
+                    else matrix[row].astype(numpy_dtype).tobytes(),
+                    ids[row],
+                )
+                for row in range(start, stop)
+            ),
+        )
+        conn.commit()
 
 
 def hash_vector(text: str, dim: int = HASH_VECTOR_DIM) -> list[float]:
@@ -157,23 +779,304 @@ def hash_vector(text: str, dim: int = HASH_VECTOR_DIM) -> list[float]:
     return [v / norm for v in vector]
 
 
-def ensure_tables(conn: sqlite3.Connection) -> None:
+def pack_vector(vector: Iterable[float], dtype: str = DEFAULT_VECTOR_DTYPE) -> bytes:
+    values = list(vector)
+    return struct.pack(f"<{len(values)}{VECTOR_DTYPES[dtype]}", *values)
+
+
+def unpack_vector(blob: bytes, dtype: str = DEFAULT_VECTOR_DTYPE) -> list[float]:
+    code = VECTOR_DTYPES[dtype]
+    count = len(blob) // struct.calcsize(code)
+    return list(struct.unpack(f"<{count}{code}", blob[: count * struct.calcsize(code)]))
+
+
+def decode_vector(
+    value: bytes | str, dtype: str = DEFAULT_VECTOR_DTYPE
+) -> list[float] | None:
+    if isinstance(value, (bytes, memoryview)):
+        return unpack_vector(bytes(value), dtype)
+    try:
+        vector = json.loads(value)
+    except (TypeError, json.JSONDecodeError):
+        return None
+    return vector if isinstance(vector, list) else None
+
+
+def get_vector_codec(
+    dtype: str, dim: int, meta: dict[str, str]
+) -> Int8Codec | PQCodec | None:
+    """Codec for a quantized storage mode; ``None`` for plain float storage.
+
+    PQ codebooks live in ``meta``, so a PQ index whose codebook is missing
+    or damaged also yields ``None``.
+    """
+    if dtype not in COMPRESSED_DTYPES or np is None:
+        return None
+    from arxiv_engine.core.quant import Int8Codec, PQCodec
+
+    if dtype == "int8":
+        return Int8Codec(dim)
+    codec = PQCodec.from_meta(meta)
+    return codec if codec is not None and codec.dim == dim else None
+
+
+def create_chunks_table(conn: sqlite3.Connection, name: str = "chunks") -> None:
     conn.execute(
-        "CREATE TABLE IF NOT EXISTS chunks ("
+        f"CREATE TABLE IF NOT EXISTS {name} ("
         "id INTEGER PRIMARY KEY AUTOINCREMENT,"
         "source TEXT NOT NULL,"
         "path TEXT NOT NULL,"
         "chunk_index INTEGER NOT NULL,"
         "content TEXT NOT NULL,"
-        "vector TEXT NOT NULL"
+        "vector BLOB NOT NULL,"
+        "token_count INTEGER NOT NULL DEFAULT 0,"
+        "category TEXT NOT NULL DEFAULT '',"
+        "project TEXT NOT NULL DEFAULT ''"
+        ")"
+    )
+
+
+def create_postings_table(conn: sqlite3.Connection, name: str = "postings") -> None:
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {name} ("
+        "token TEXT NOT NULL,"
+        "chunk_id INTEGER NOT NULL,"
+        "tf INTEGER NOT NULL,"
+        "PRIMARY KEY (token, chunk_id)"
+        ") WITHOUT ROWID"
+    )
+
+
+def create_files_table(conn: sqlite3.Connection, name: str = "files") -> None:
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {name} ("
+        "path TEXT PRIMARY KEY,"
+        "source TEXT NOT NULL,"
+        "mtime_ns INTEGER NOT NULL,"
+        "size INTEGER NOT NULL,"
+        "content_hash TEXT NOT NULL"
         ")"
     )
+
+
+def create_projects_table(conn: sqlite3.Connection, name: str = "projects") -> None:
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {name} ("
+        "project TEXT PRIMARY KEY,"
+        "category TEXT NOT NULL,"
+        "arxiv_id TEXT NOT NULL DEFAULT '',"
+        "title TEXT NOT NULL DEFAULT '',"
+        "status TEXT NOT NULL DEFAULT '',"
+        "published TEXT NOT NULL DEFAULT ''"
+        ")"
+    )
+
+
+def ensure_tables(conn: sqlite3.Connection) -> None:
+    create_chunks_table(conn)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(chunks)")}
+    for column in ("category", "project"):
+        if column not in columns:
+            conn.execute(
+                f"ALTER TABLE chunks ADD COLUMN {column} TEXT NOT NULL DEFAULT ''"
+            )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_path ON chunks (path)")
+    # Filtered queries resolve their candidate rows through these.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks (source)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_chunks_category ON chunks (category)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_project ON chunks (project)")
     conn.execute(
         "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
     )
+    create_files_table(conn)
+    create_postings_table(conn)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_postings_chunk ON postings (chunk_id)"
+    )
+    create_projects_table(conn)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_projects_status ON projects (status)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_projects_published ON projects (published)"
+    )
+
+
+def configure_writer(conn: sqlite3.Connection) -> None:
+    # WAL lets `brain ask` keep reading the last committed snapshot while
+    # a rebuild is in progress; NORMAL sync is durable enough under WAL.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size={SQLITE_CACHE_KIB}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    try:
+        row = conn.execute(
+            "SELECT value FROM meta WHERE key = 'schema_version'"
+        ).fetchone()
+    except sqlite3.Error:
+        return 0
+    if row is None:
+        return 1
+    try:
+        return int(row[0])
+    except (TypeError, ValueError):
+        return 0
+
+
+def set_meta(conn: sqlite3.Connection, key: str, value: str) -> None:
+    conn.execute(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+    )
+
+
+def migrate_schema(conn: sqlite3.Connection) -> bool:
+    """Upgrade older index layouts in place, one schema version at a time."""
+    version = get_schema_version(conn)
+    if version >= SCHEMA_VERSION:
+        return True
+    if version == 0:
+        return False
+    if version < 2:
+        migrate_json_vectors(conn)
+    if version < 3:
+        migrate_lexical_postings(conn)
+    if version < 4:
+        migrate_project_metadata(conn)
+    set_meta(conn, "schema_version", str(SCHEMA_VERSION))
+    conn.commit()
+    return True
+
+
+def migrate_json_vectors(conn: sqlite3.Connection) -> None:
+    """v1 -> v2: JSON text vectors become packed float32 BLOBs."""
+    create_chunks_table(conn, "chunks_v2")
+    cursor = conn.execute(
+        "SELECT id, source, path, chunk_index, content, vector FROM chunks ORDER BY id"
+    )
+    migrated = 0
+    for row_id, source, path, chunk_index, content, value in cursor.fetchall():
+        vector = decode_vector(value)
+        if not vector:
+            continue
+        conn.execute(
+            "INSERT INTO chunks_v2 (id, source, path, chunk_index, content, vector) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (row_id, source, path, chunk_index, content, pack_vector(vector)),
+        )
+        migrated += 1
+    conn.execute("DROP TABLE chunks")
+    conn.execute("ALTER TABLE chunks_v2 RENAME TO chunks")
+    set_meta(conn, "vector_dtype", DEFAULT_VECTOR_DTYPE)
+    print(f"Migrated {migrated} chunks to binary vector storage.")
+
+
+def migrate_lexical_postings(conn: sqlite3.Connection) -> None:
+    """v2 -> v3: add token counts and BM25 postings for existing chunks."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(chunks)")}
+    if "token_count" not in columns:
+        conn.execute(
+            "ALTER TABLE chunks ADD COLUMN token_count INTEGER NOT NULL DEFAULT 0"
+        )
+    create_postings_table(conn)
+    conn.execute("DELETE FROM postings")
+    rows = conn.execute("SELECT id, content FROM chunks").fetchall()
+    for row_id, content in rows:
+        terms = term_frequencies(str(content))
+        conn.executemany(
+            "INSERT INTO postings (token, chunk_id, tf) VALUES (?, ?, ?)",
+            [(token, row_id, tf) for token, tf in terms.items()],
+        )
+        conn.execute(
+            "UPDATE chunks SET token_count = ? WHERE id = ?",
+            (sum(terms.values()), row_id),
+        )
+    update_lexical_stats(conn)
+    print(f"Built lexical postings for {len(rows)} chunks.")
+
+
+def migrate_project_metadata(conn: sqlite3.Connection) -> None:
+    """v3 -> v4: tag chunks with their project and build the projects table."""
+    ensure_tables(conn)
+    root = Path(conn.execute("PRAGMA database_list").fetchone()[2]).parent
+    paths = [str(row[0]) for row in conn.execute("SELECT DISTINCT path FROM chunks")]
+    tags = {path: project_of(root, Path(path)) for path in paths}
+    conn.executemany(
+        "UPDATE chunks SET category = ?, project = ? WHERE path = ?",
+        [(category, project, path) for path, (category, project) in tags.items()],
+    )
+    projects = {
+        project
+        for _, project in tags.values()
+        if project and (root / project / "info.yaml").exists()
+    }
+    refresh_projects(conn, root, projects)
+    print(f"Tagged {len(paths)} files from {len(projects)} projects with metadata.")
+
+
+def project_of(root: Path, path: Path) -> tuple[str, str]:
+    """``(category, project)`` for a file under ``<root>/<category>/<project>/``."""
+    try:
+        parts = path.relative_to(root).parts
+    except ValueError:
+        return "", ""
+    if len(parts) < 3:
+        return "", ""
+    return parts[0], f"{parts[0]}/{parts[1]}"
+
+
+def refresh_projects(
+    conn: sqlite3.Connection,
+    root: Path,
+    projects: Iterable[str],
+    table: str = "projects",
+) -> None:
+    rows = []
+    for project in projects:
+        try:
+            info = load_info(root / project)
+        except (OSError, UnicodeDecodeError):
+            info = {}
+        published = str(info.get("published") or info.get("created_at") or "")
+        rows.append(
+            (
+                project,
+                project.split("/", 1)[0],
+                str(info.get("id", "")),
+                str(info.get("title", "")),
+                str(info.get("status", "")),
+                published[:10],
+            )
+        )
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {table} "
+        "(project, category, arxiv_id, title, status, published) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+
+
+def term_frequencies(text: str) -> Counter[str]:
+    return Counter(tokenize(text))
+
+
+def update_lexical_stats(conn: sqlite3.Connection, table: str = "chunks") -> None:
+    docs, avg_len = conn.execute(
+        f"SELECT COUNT(*), COALESCE(AVG(token_count), 0) FROM {table}"
+    ).fetchone()
+    set_meta(conn, "lexical_docs", str(int(docs)))
+    set_meta(conn, "lexical_avgdl", repr(float(avg_len)))
 
 
-def iter_source_files(root: Path) -> Iterable[tuple[Path, str]]:
+def iter_source_files(
+    root: Path,
+    include_pdf: bool = False,
+    categories: Collection[str] | None = None,
+) -> Iterable[tuple[Path, str]]:
     if not root.exists():
         return
     try:
@@ -184,6 +1087,8 @@ def iter_source_files(root: Path) -> Iterable[tuple[Path, str]]:
     for category_dir in category_dirs:
         if not category_dir.is_dir() or category_dir.name.startswith("."):
             continue
+        if categories is not None and category_dir.name not in categories:
+            continue
         try:
             project_dirs = list(category_dir.iterdir())
         except OSError:
@@ -201,156 +1106,2137 @@ def iter_source_files(root: Path) -> Iterable[tuple[Path, str]]:
             if playground_dir.exists():
                 for py_file in playground_dir.rglob("*.py"):
                     yield py_file, "code"
+            pdf = project_dir / PDF_NAME
+            if include_pdf and pdf.exists():
+                yield pdf, "pdf"
 
 
 def get_db_path(root: Path) -> Path:
     return root / DB_NAME
 
 
-def build_index() -> int:
-    root = get_arxiv_root()
-    if not root.exists():
-        print(f"Knowledge root not found: {root}")
-        return 0
-
-    db_path = get_db_path(root)
+def get_pdf_text_dir(root: Path) -> Path:
+    return root / PDF_TEXT_DIR
+
+
+def get_vectors_path(root: Path) -> Path:
+    return root / VECTORS_NAME
+
+
+def write_vector_sidecar(
+    conn: sqlite3.Connection, path: Path, meta: dict[str, str]
+) -> int:
+    """Dump chunk vectors as a fixed-stride matrix for memory mapping.
+
+    Layout: a ``VECTORS_HEADER_SIZE`` byte header (magic, JSON length, JSON),
+    then the rows, then ``rows`` int64 chunk ids so that matrix row ``i``
+    belongs to ``chunks.id == ids[i]``.  Rows are ``dim`` little-endian
+    float32 values, or for quantized indexes ``dim`` int8 codes (with the
+    per-row float32 scales after the codes) or one uint8 code per PQ
+    sub-vector.
+    """
+    dim = int(meta["vector_dim"])
+    dtype = meta.get("vector_dtype", DEFAULT_VECTOR_DTYPE)
+    codec = get_vector_codec(dtype, dim, meta)
+    if dtype in COMPRESSED_DTYPES and codec is None:
+        raise OSError(f"cannot decode {dtype} vectors")
+    if codec is not None:
+        row_bytes = codec.row_bytes
+    else:
+        row_bytes = dim * struct.calcsize(VECTOR_DTYPES[dtype])
+    ids: list[int] = []
+    scales: list[bytes] = []
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb") as handle:
+        handle.write(b"\0" * VECTORS_HEADER_SIZE)
+        cursor = conn.execute("SELECT id, vector FROM chunks ORDER BY id")
+        for row_id, value in cursor:
+            if not isinstance(value, bytes) or len(value) != row_bytes:
+                continue
+            if dtype == "int8":
+                scales.append(value[:4])
+                value = value[4:]
+            elif dtype == "float16":
+                value = pack_vector(unpack_vector(value, dtype))
+            handle.write(value)
+            ids.append(int(row_id))
+        handle.write(b"".join(scales))
+        handle.write(struct.pack(f"<{len(ids)}q", *ids))
+
+        header = json.dumps(
+            {
+                "dim": dim,
+                "rows": len(ids),
+                "dtype": codec.name if codec is not None else "float32",
+                "embedding_backend": meta.get("embedding_backend", ""),
+                "embedding_model": meta.get("embedding_model", ""),
+                "vectors_token": meta.get("vectors_token", ""),
+            }
+        ).encode("utf-8")
+        handle.seek(0)
+        handle.write(VECTORS_MAGIC + struct.pack("<I", len(header)) + header)
+    os.replace(tmp_path, path)
+    return len(ids)
+
+
+def read_vector_header(path: Path) -> dict[str, object] | None:
     try:
-        conn = sqlite3.connect(db_path)
-    except sqlite3.Error as exc:
-        print(f"Failed to open index db: {exc}")
-        return 0
+        with path.open("rb") as handle:
+            prefix = handle.read(len(VECTORS_MAGIC) + 4)
+            if len(prefix) < len(VECTORS_MAGIC) + 4 or not prefix.startswith(
+                VECTORS_MAGIC
+            ):
+                return None
+            (length,) = struct.unpack("<I", prefix[len(VECTORS_MAGIC) :])
+            if length > VECTORS_HEADER_SIZE - len(prefix):
+                return None
+            header = json.loads(handle.read(length).decode("utf-8"))
+    except (OSError, UnicodeDecodeError, json.JSONDecodeError):
+        return None
+    return header if isinstance(header, dict) else None
 
-    count = 0
+
+def open_vector_sidecar(
+    path: Path, meta: dict[str, str]
+) -> tuple["np.ndarray", "np.ndarray"] | None:
+    if np is None or not path.exists():
+        return None
+    header = read_vector_header(path)
+    if header is None:
+        return None
+    token = meta.get("vectors_token")
+    if not token or header.get("vectors_token") != token:
+        return None
     try:
-        backend = get_embedding_backend()
-        ensure_tables(conn)
-        conn.execute("DELETE FROM chunks")
-        conn.execute("DELETE FROM meta")
-        conn.execute(
-            "INSERT INTO meta (key, value) VALUES (?, ?)",
-            ("vector_dim", str(backend.dim)),
-        )
-        conn.execute(
-            "INSERT INTO meta (key, value) VALUES (?, ?)",
-            ("chunk_chars", str(CHUNK_CHARS)),
+        dim = int(header["dim"])  # type: ignore[arg-type]
+        rows = int(header["rows"])  # type: ignore[arg-type]
+    except (KeyError, TypeError, ValueError):
+        return None
+    if str(dim) != meta.get("vector_dim"):
+        return None
+    dtype = meta.get("vector_dtype", DEFAULT_VECTOR_DTYPE)
+    codec = get_vector_codec(dtype, dim, meta)
+    if header.get("dtype") != (codec.name if codec is not None else "float32"):
+        return None
+    row_bytes = codec.row_bytes if codec is not None else dim * 4
+    expected = VECTORS_HEADER_SIZE + rows * row_bytes + rows * 8
+    try:
+        if path.stat().st_size != expected:
+            return None
+    except OSError:
+        return None
+    if rows == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, dim), dtype=np.float32)
+    ids = np.memmap(
+        path,
+        dtype="<i8",
+        mode="r",
+        offset=VECTORS_HEADER_SIZE + rows * row_bytes,
+        shape=(rows,),
+    )
+    if codec is None:
+        matrix = np.memmap(
+            path, dtype="<f4", mode="r", offset=VECTORS_HEADER_SIZE, shape=(rows, dim)
         )
-        conn.execute(
-            "INSERT INTO meta (key, value) VALUES (?, ?)",
-            ("chunk_overlap", str(CHUNK_OVERLAP)),
+        return ids, matrix
+
+    from arxiv_engine.core.quant import Int8Matrix, PQMatrix
+
+    if dtype == "int8":
+        codes = np.memmap(
+            path, dtype=np.int8, mode="r", offset=VECTORS_HEADER_SIZE, shape=(rows, dim)
         )
-        conn.execute(
-            "INSERT INTO meta (key, value) VALUES (?, ?)",
-            ("embedding_backend", backend.name),
+        scales = np.memmap(
+            path,
+            dtype="<f4",
+            mode="r",
+            offset=VECTORS_HEADER_SIZE + rows * dim,
+            shape=(rows,),
         )
-        if isinstance(backend, SentenceTransformerEmbedding):
-            conn.execute(
-                "INSERT INTO meta (key, value) VALUES (?, ?)",
-                ("embedding_model", backend.model_name),
-            )
+        return ids, Int8Matrix(codes, scales)
+    codes = np.memmap(
+        path,
+        dtype=np.uint8,
+        mode="r",
+        offset=VECTORS_HEADER_SIZE,
+        shape=(rows, codec.row_bytes),
+    )
+    return ids, PQMatrix(codes, codec.codebook)
+
+
+def chunker_meta_values(chunker: str) -> dict[str, str]:
+    if chunker == "window":
+        return {
+            "chunker": chunker,
+            "chunk_chars": str(CHUNK_CHARS),
+            "chunk_overlap": str(CHUNK_OVERLAP),
+        }
+    from arxiv_engine.core.chunking import CHUNK_TOKENS
+
+    return {"chunker": chunker, "chunk_tokens": str(CHUNK_TOKENS)}
+
+
+def index_meta_values(
+    backend: EmbeddingBackend, vector_dtype: str, chunker: str = DEFAULT_CHUNKER
+) -> dict[str, str]:
+    values = {
+        "schema_version": str(SCHEMA_VERSION),
+        "vector_dtype": vector_dtype,
+        "vector_dim": str(backend.dim),
+        **chunker_meta_values(chunker),
+        "embedding_backend": backend.name,
+    }
+    if isinstance(backend, SentenceTransformerEmbedding):
+        values["embedding_model"] = backend.model_name
+    if isinstance(backend, HashEmbedding):
+        values.update(backend.settings())
+    return values
+
+
+def index_settings_match(
+    meta: dict[str, str],
+    backend: EmbeddingBackend,
+    vector_dtype: str,
+    chunker: str = DEFAULT_CHUNKER,
+) -> bool:
+    expected = index_meta_values(backend, vector_dtype, chunker)
+    return all(
+        meta.get(key, HASH_DEFAULT_META.get(key)) == value
+        for key, value in expected.items()
+    )
 
-        for path, source in iter_source_files(root):
-            text = read_text_safe(path)
-            if not text:
-                continue
-            chunks = chunk_text(text)
-            if not chunks:
-                continue
-            try:
-                vectors = backend.encode(chunks)
-            except Exception as exc:
-                print(f"Warning: embedding failed for {path}: {exc}")
-                continue
-            if len(vectors) != len(chunks):
-                print(f"Warning: embedding mismatch for {path}")
-                continue
-            for idx, (chunk, vector) in enumerate(zip(chunks, vectors)):
-                conn.execute(
-                    "INSERT INTO chunks (source, path, chunk_index, content, vector) VALUES (?, ?, ?, ?, ?)",
-                    (source, str(path), idx, chunk, json.dumps(vector)),
-                )
-                count += 1
-        conn.commit()
-    except sqlite3.Error as exc:
-        print(f"Index build failed: {exc}")
-    finally:
-        conn.close()
 
-    print(f"Indexed {count} chunks into {db_path}")
-    return count
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
-def load_meta(conn: sqlite3.Connection) -> dict[str, str]:
-    meta: dict[str, str] = {}
+def load_file_records(conn: sqlite3.Connection) -> dict[str, tuple[int, int, str]]:
+    return {
+        str(path): (int(mtime_ns), int(size), str(digest))
+        for path, mtime_ns, size, digest in conn.execute(
+            "SELECT path, mtime_ns, size, content_hash FROM files"
+        )
+    }
+
+
+class PendingFile(NamedTuple):
+    path: Path
+    source: str
+    stat: os.stat_result
+    digest: str
+    chunks: list[str]
+    replace: bool = False
+
+
+def embed_batched(
+    backend: EmbeddingBackend, texts: list[str], batch_size: int
+) -> list[list[float]]:
+    """Encode ``texts`` in length-sorted batches and return vectors in input order."""
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    vectors: list[list[float] | None] = [None] * len(texts)
+    step = max(1, batch_size)
+    for start in range(0, len(order), step):
+        batch = order[start : start + step]
+        encoded = backend.encode([texts[i] for i in batch])
+        if len(encoded) != len(batch):
+            raise ValueError("embedding backend returned wrong batch size")
+        for i, vector in zip(batch, encoded):
+            vectors[i] = vector
+    return vectors  # type: ignore[return-value]
+
+
+def embed_pending(
+    backend: EmbeddingBackend, pending: list[PendingFile], batch_size: int
+) -> list[tuple[PendingFile, list[list[float]] | None]]:
+    texts = [chunk for item in pending for chunk in item.chunks]
     try:
-        for key, value in conn.execute("SELECT key, value FROM meta"):
-            meta[str(key)] = str(value)
-    except sqlite3.Error:
-        return {}
-    return meta
+        vectors = embed_batched(backend, texts, batch_size)
+    except Exception as exc:
+        if len(pending) > 1:
+            # Re-run file by file so one bad input only drops its own file.
+            return [
+                result
+                for item in pending
+                for result in embed_pending(backend, [item], batch_size)
+            ]
+        print(f"Warning: embedding failed for {pending[0].path}: {exc}")
+        return [(pending[0], None)]
+
+    results: list[tuple[PendingFile, list[list[float]] | None]] = []
+    offset = 0
+    for item in pending:
+        size = len(item.chunks)
+        results.append((item, vectors[offset : offset + size]))
+        offset += size
+    return results
+
+
+def prepare_file(
+    path: Path,
+    source: str,
+    record: tuple[int, int, str] | None,
+    chunker: str = DEFAULT_CHUNKER,
+) -> tuple[str, PendingFile | None]:
+    """Stat, read, hash and chunk one file; runs on the reader thread pool."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return "missing", None
+    if record and record[:2] == (stat.st_mtime_ns, stat.st_size):
+        return "unchanged", None
+    text = read_text_safe(path)
+    item = PendingFile(path, source, stat, content_hash(text), [], record is not None)
+    if record and record[2] == item.digest:
+        return "touched", item
+    return "changed", item._replace(chunks=chunk_source(text, source, chunker))
+
+
+def chunk_pdf_text(text: str, chunker: str = DEFAULT_CHUNKER) -> list[str]:
+    from arxiv_engine.core.pdftext import split_sections
+
+    if chunker == "window":
+        return [
+            f"[{title}] {chunk}"
+            for title, body in split_sections(text)
+            for chunk in chunk_text(body)
+        ]
+    from arxiv_engine.core.chunking import CHUNK_TOKENS, chunk_structured, estimate_tokens
 
+    chunks: list[str] = []
+    for title, body in split_sections(text):
+        prefix = f"[{title}] "
+        budget = CHUNK_TOKENS - estimate_tokens(prefix)
+        chunks.extend(prefix + chunk for chunk in chunk_structured(body, "pdf", budget))
+    return chunks
 
-def query_brain(text: str, top_k: int = 5) -> list[SearchResult]:
-    root = get_arxiv_root()
-    db_path = get_db_path(root)
-    if not db_path.exists():
-        print("Index not found. Run: arxiv brain index")
-        return []
 
-    try:
-        conn = sqlite3.connect(db_path)
-    except sqlite3.Error as exc:
-        print(f"Failed to open index db: {exc}")
-        return []
+def prepare_pdf(
+    path: Path,
+    source: str,
+    record: tuple[int, int, str] | None,
+    text_dir: Path,
+    chunker: str = DEFAULT_CHUNKER,
+) -> tuple[str, PendingFile | None]:
+    """``prepare_file`` for PDFs; runs on the extraction process pool.
 
-    results: list[SearchResult] = []
+    Extracted text is cached in ``text_dir`` under the PDF's sha256, which
+    is also the file's recorded digest, so unchanged PDFs are never
+    extracted twice.
+    """
     try:
-        meta = load_meta(conn)
-        backend = select_backend_for_query(meta)
-        if backend is None:
-            return []
-        if meta.get("vector_dim") and int(meta["vector_dim"]) != backend.dim:
-            print("Index vector dimension mismatch. Rebuild index.")
-            return []
+        stat = path.stat()
+        if record and record[:2] == (stat.st_mtime_ns, stat.st_size):
+            return "unchanged", None
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    except OSError:
+        return "missing", None
+    item = PendingFile(path, source, stat, digest, [], record is not None)
+    if record and record[2] == digest:
+        return "touched", item
+    cached = text_dir / f"{digest}.txt"
+    text = read_text_safe(cached)
+    if not text:
+        from arxiv_engine.core.pdftext import extract_pdf_text
+
+        text = extract_pdf_text(path)
+        if text:
+            tmp_path = text_dir / f"{digest}.{os.getpid()}.tmp"
+            try:
+                text_dir.mkdir(exist_ok=True)
+                tmp_path.write_text(text, encoding="utf-8")
+                os.replace(tmp_path, cached)
+            except OSError:
+                pass
+    return "changed", item._replace(chunks=chunk_pdf_text(text, chunker))
 
-        query_vectors = backend.encode([text])
-        if not query_vectors:
-            print("Query is empty after tokenization.")
-            return []
-        query_vec = query_vectors[0]
-        if not any(query_vec):
-            print("Query is empty after tokenization.")
-            return []
 
-        cursor = conn.execute(
-            "SELECT source, path, chunk_index, content, vector FROM chunks"
+def prune_pdf_text_cache(conn: sqlite3.Connection, text_dir: Path) -> None:
+    if not text_dir.exists():
+        return
+    live = {
+        str(digest)
+        for (digest,) in conn.execute(
+            "SELECT content_hash FROM files WHERE source = 'pdf'"
         )
-        for source, path, chunk_index, content, vector_json in cursor:
+    }
+    for path in text_dir.glob("*.txt"):
+        if path.stem not in live:
+            path.unlink(missing_ok=True)
+
+
+def iter_prepared_files(
+    root: Path,
+    known: dict[str, tuple[int, int, str]],
+    workers: int,
+    queue_depth: int,
+    pdf_workers: int = 0,
+    categories: Collection[str] | None = None,
+    chunker: str = DEFAULT_CHUNKER,
+) -> Iterator[tuple[Path, str, PendingFile | None]]:
+    """Yield ``prepare_file`` results in discovery order.
+
+    A producer thread walks the knowledge root and submits reads to a
+    thread pool; the bounded queue keeps at most ``queue_depth`` files in
+    flight so slow filesystems overlap with embedding without unbounded
+    memory growth.  With ``pdf_workers`` set, ``paper.pdf`` files are
+    included and extracted on a process pool of that size.  ``categories``
+    restricts the walk to those category directories.
+    """
+    pending: queue.Queue[tuple[Path, Future] | None] = queue.Queue(
+        maxsize=max(1, queue_depth)
+    )
+    stop = threading.Event()
+
+    def put(item: tuple[Path, Future] | None) -> bool:
+        while not stop.is_set():
             try:
-                vector = json.loads(vector_json)
-            except json.JSONDecodeError:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
                 continue
-            if not vector or len(vector) != len(query_vec):
+        return False
+
+    def produce(executor: Executor, pdf_executor: Executor | None) -> None:
+        try:
+            for path, source in iter_source_files(
+                root, pdf_executor is not None, categories
+            ):
+                if source == "pdf" and pdf_executor is not None:
+                    future = pdf_executor.submit(
+                        prepare_pdf,
+                        path,
+                        source,
+                        known.get(str(path)),
+                        get_pdf_text_dir(root),
+                        chunker,
+                    )
+                else:
+                    future = executor.submit(
+                        prepare_file, path, source, known.get(str(path)), chunker
+                    )
+                if not put((path, future)):
+                    return
+        finally:
+            put(None)
+
+    pdf_executor: ProcessPoolExecutor | None = None
+    if pdf_workers > 0:
+        # Spawn rather than fork: the parent already runs reader and writer
+        # threads and may hold a loaded embedding model.
+        pdf_executor = ProcessPoolExecutor(
+            max_workers=pdf_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    with ThreadPoolExecutor(
+        max_workers=max(1, workers), thread_name_prefix="brain-read"
+    ) as executor:
+        producer = threading.Thread(
+            target=produce,
+            args=(executor, pdf_executor),
+            name="brain-discover",
+            daemon=True,
+        )
+        producer.start()
+        try:
+            while True:
+                entry = pending.get()
+                if entry is None:
+                    break
+                path, future = entry
+                try:
+                    status, item = future.result()
+                except Exception as exc:
+                    # One unreadable file (or a crashed PDF worker) only costs
+                    # that file; an update keeps its previous chunks.
+                    print(f"Warning: skipping {path}: {exc}")
+                    status, item = "missing", None
+                yield path, status, item
+        finally:
+            stop.set()
+            while True:
+                try:
+                    entry = pending.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is not None:
+                    entry[1].cancel()
+            producer.join()
+            if pdf_executor is not None:
+                pdf_executor.shutdown(cancel_futures=True)
+
+
+class IndexWriter:
+    """Single thread that owns the SQLite connection during an index build.
+
+    Rows are buffered and written with ``executemany``; the transaction is
+    committed every ``commit_every`` rows so the WAL stays small.
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        queue_depth: int,
+        vector_dtype: str,
+        suffix: str = "",
+        commit_every: int = COMMIT_EVERY,
+        codec: Int8Codec | PQCodec | None = None,
+        root: Path | None = None,
+    ) -> None:
+        self.conn = conn
+        self.vector_dtype = vector_dtype
+        self.codec = codec
+        self.root = root or get_arxiv_root()
+        self.chunks_table = f"chunks{suffix}"
+        self.files_table = f"files{suffix}"
+        self.postings_table = f"postings{suffix}"
+        self.commit_every = max(1, commit_every)
+        self.count = 0
+        self.error: BaseException | None = None
+        self._chunk_rows: list[
+            tuple[int, str, str, int, str, bytes, int, str, str]
+        ] = []
+        self._file_rows: list[tuple[str, str, int, int, str]] = []
+        self._posting_rows: list[tuple[str, int, int]] = []
+        # Chunk ids are assigned here so postings can reference them without
+        # a round trip per insert.
+        self._next_id = self._first_free_id()
+        self._uncommitted = 0
+        self._queue: queue.Queue[tuple[str, PendingFile, object] | None] = (
+            queue.Queue(maxsize=max(1, queue_depth))
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="brain-writer", daemon=True
+        )
+        self._thread.start()
+
+    def store(self, item: PendingFile, vectors: list[list[float]]) -> None:
+        self._submit(("store", item, vectors))
+
+    def touch(self, item: PendingFile) -> None:
+        self._submit(("touch", item, None))
+
+    def forget(self, item: PendingFile) -> None:
+        self._submit(("forget", item, None))
+
+    def close(self) -> int:
+        self._queue.put(None)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+        return self.count
+
+    def _first_free_id(self) -> int:
+        (max_id,) = self.conn.execute(
+            f"SELECT COALESCE(MAX(id), 0) FROM {self.chunks_table}"
+        ).fetchone()
+        row = self.conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = ?", (self.chunks_table,)
+        ).fetchone()
+        return max(int(max_id), int(row[0]) if row else 0) + 1
+
+    def _submit(self, op: tuple[str, PendingFile, object]) -> None:
+        if self.error is not None:
+            raise self.error
+        self._queue.put(op)
+
+    def _run(self) -> None:
+        while True:
+            op = self._queue.get()
+            if op is None:
+                break
+            if self.error is not None:
                 continue
-            score = sum(a * b for a, b in zip(query_vec, vector))
-            if score <= 0.0:
+            try:
+                self._apply(*op)
+            except BaseException as exc:
+                self.error = exc
+        if self.error is None:
+            try:
+                self._flush()
+                self.conn.commit()
+            except BaseException as exc:
+                self.error = exc
+
+    def _apply(self, kind: str, item: PendingFile, payload: object) -> None:
+        path = str(item.path)
+        # "touch" means only mtime moved: the content hash matched, so the
+        # file's chunks stay and just its ``files`` row is refreshed.
+        if kind == "forget" or (kind == "store" and item.replace):
+            self._flush()
+            self.conn.execute(
+                f"DELETE FROM {self.postings_table} WHERE chunk_id IN "
+                f"(SELECT id FROM {self.chunks_table} WHERE path = ?)",
+                (path,),
+            )
+            self.conn.execute(
+                f"DELETE FROM {self.chunks_table} WHERE path = ?", (path,)
+            )
+        if kind == "forget":
+            self.conn.execute(f"DELETE FROM {self.files_table} WHERE path = ?", (path,))
+            return
+        if kind == "store":
+            vectors: list[list[float]] = payload  # type: ignore[assignment]
+            category, project = project_of(self.root, item.path)
+            for idx, (chunk, vector) in enumerate(zip(item.chunks, vectors)):
+                row_id = self._next_id
+                self._next_id += 1
+                terms = term_frequencies(chunk)
+                self._posting_rows.extend(
+                    (token, row_id, tf) for token, tf in terms.items()
+                )
+                self._chunk_rows.append(
+                    (
+                        row_id,
+                        item.source,
+                        path,
+                        idx,
+                        chunk,
+                        self._encode(vector),
+                        sum(terms.values()),
+                        category,
+                        project,
+                    )
+                )
+            self.count += len(item.chunks)
+        self._file_rows.append(
+            (path, item.source, item.stat.st_mtime_ns, item.stat.st_size, item.digest)
+        )
+        if len(self._chunk_rows) + len(self._file_rows) >= WRITE_BATCH_ROWS:
+            self._flush()
+
+    def _encode(self, vector: list[float]) -> bytes:
+        if self.codec is not None:
+            return self.codec.encode(vector)
+        return pack_vector(vector, self.vector_dtype)
+
+    def _flush(self) -> None:
+        if self._chunk_rows:
+            self.conn.executemany(
+                f"INSERT INTO {self.chunks_table} "
+                "(id, source, path, chunk_index, content, vector, token_count, "
+                "category, project) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                self._chunk_rows,
+            )
+        if self._posting_rows:
+            self.conn.executemany(
+                f"INSERT INTO {self.postings_table} (token, chunk_id, tf) "
+                "VALUES (?, ?, ?)",
+                self._posting_rows,
+            )
+        if self._file_rows:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO {self.files_table} "
+                "(path, source, mtime_ns, size, content_hash) VALUES (?, ?, ?, ?, ?)",
+                self._file_rows,
+            )
+        self._uncommitted += len(self._chunk_rows) + len(self._file_rows)
+        self._chunk_rows = []
+        self._file_rows = []
+        self._posting_rows = []
+        if self._uncommitted >= self.commit_every:
+            self.conn.commit()
+            self._uncommitted = 0
+
+
+def quantize_staged_vectors(
+    conn: sqlite3.Connection, table: str, dim: int
+) -> PQCodec:
+    """Train a PQ codebook on the staged float32 vectors and re-encode them in place."""
+    from arxiv_engine.core.quant import PQCodec
+
+    ids: list[int] = []
+    blobs: list[bytes] = []
+    for row_id, value in conn.execute(f"SELECT id, vector FROM {table} ORDER BY id"):
+        ids.append(int(row_id))
+        blobs.append(value)
+    matrix = np.frombuffer(b"".join(blobs), dtype="<f4").reshape(len(ids), dim)
+    codec = PQCodec.train(matrix)
+    codes = codec.encode_matrix(matrix)
+    for start in range(0, len(ids), COMMIT_EVERY):
+        conn.executemany(
+            f"UPDATE {table} SET vector = ? WHERE id = ?",
+            (
+                (codes[row].tobytes(), ids[row])
+                for row in range(start, min(start + COMMIT_EVERY, len(ids)))
+            ),
+        )
+        conn.commit()
+    return codec
+
+
+def next_generation(conn: sqlite3.Connection) -> str:
+    """Bump for every build; cached query results are tied to one generation."""
+    row = conn.execute(
+        "SELECT value FROM meta WHERE key = 'index_generation'"
+    ).fetchone()
+    try:
+        return str(int(row[0]) + 1) if row else "1"
+    except (TypeError, ValueError):
+        return "1"
+
+
+def create_staging_tables(conn: sqlite3.Connection) -> None:
+    for table in STAGED_TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS {table}{STAGING_SUFFIX}")
+    create_chunks_table(conn, f"chunks{STAGING_SUFFIX}")
+    create_files_table(conn, f"files{STAGING_SUFFIX}")
+    create_postings_table(conn, f"postings{STAGING_SUFFIX}")
+    create_projects_table(conn, f"projects{STAGING_SUFFIX}")
+    conn.commit()
+
+
+def swap_in_rebuild(conn: sqlite3.Connection, index_meta: dict[str, str]) -> None:
+    """Atomically replace the live tables with the freshly built staging tables."""
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        generation = next_generation(conn)
+        for table in STAGED_TABLES:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute(f"ALTER TABLE {table}{STAGING_SUFFIX} RENAME TO {table}")
+        ensure_tables(conn)
+        conn.execute("DELETE FROM meta")
+        conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)", index_meta.items()
+        )
+        update_lexical_stats(conn)
+        set_meta(conn, "vectors_token", uuid.uuid4().hex)
+        set_meta(conn, "index_generation", generation)
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+
+def get_ann_path(root: Path) -> Path:
+    return root / ANN_NAME
+
+
+def build_ann_index(root: Path, meta: dict[str, str], nlist: int | None = None) -> bool:
+    if np is None:
+        print("Warning: NumPy is required for --ann; skipping ANN index.")
+        return False
+    sidecar = open_vector_sidecar(get_vectors_path(root), meta)
+    if sidecar is None:
+        print("Warning: vector sidecar missing; skipping ANN index.")
+        return False
+    from arxiv_engine.core.ann import IVFIndex
+
+    _, matrix = sidecar
+    index = IVFIndex.train(matrix, nlist=nlist, token=meta.get("vectors_token", ""))
+    try:
+        index.save(get_ann_path(root))
+    except OSError as exc:
+        print(f"Warning: failed to write ANN index: {exc}")
+        return False
+    print(f"Built IVF index with {index.nlist} lists over {len(matrix)} vectors")
+    return True
+
+
+def load_ann_index(root: Path, meta: dict[str, str]) -> IVFIndex | None:
+    path = get_ann_path(root)
+    if np is None or not path.exists():
+        return None
+    from arxiv_engine.core.ann import IVFIndex
+
+    index = IVFIndex.load(path)
+    if index is None or index.token != meta.get("vectors_token"):
+        return None
+    return index
+
+
+def build_index(
+    vector_dtype: str | None = None,
+    incremental: bool = False,
+    cache_size: int = DEFAULT_CACHE_SIZE,
+    batch_size: int = EMBED_BATCH_SIZE,
+    read_workers: int = READ_WORKERS,
+    queue_depth: int = QUEUE_DEPTH,
+    ann: bool = False,
+    nlist: int | None = None,
+    pdf_workers: int = PDF_WORKERS,
+    backend_name: str = "auto",
+    categories: Collection[str] | None = None,
+    index_dir: Path | None = None,
+    chunker: str | None = None,
+    root: Path | None = None,
+    hash_signed: bool | None = None,
+    hash_tfidf: bool | None = None,
+) -> int:
+    """Build or update the index; returns the number of chunks written.
+
+    ``categories`` and ``index_dir`` restrict the build to some category
+    directories and write it somewhere other than the knowledge root;
+    ``build_sharded_index`` uses them to give every worker its own shard.
+    ``root`` overrides the configured knowledge root.  ``hash_signed`` and
+    ``hash_tfidf`` pick the hash backend variant, and ``vector_dtype`` the
+    storage precision (``None`` keeps the index's own on updates).
+    """
+    if vector_dtype is not None and vector_dtype not in STORAGE_DTYPES:
+        print(f"Unsupported vector dtype: {vector_dtype}")
+        return 0
+    if hash_tfidf and np is None:
+        print("NumPy is required for --hash-tfidf.")
+        return 0
+
+    root = root or get_arxiv_root()
+    if not root.exists():
+        print(f"Knowledge root not found: {root}")
+        return 0
+    if pdf_workers > 0:
+        from arxiv_engine.core.pdftext import pdf_extractor_available
+
+        if not pdf_extractor_available():
+            print(
+                "Warning: pdftotext (poppler) or pdfplumber not found; "
+                "skipping paper.pdf files."
+            )
+            pdf_workers = 0
+
+    index_dir = index_dir or root
+    db_path = get_db_path(index_dir)
+    try:
+        # The writer thread takes over this connection while files stream in.
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+    except sqlite3.Error as exc:
+        print(f"Failed to open index db: {exc}")
+        return 0
+
+    count = 0
+    unchanged = 0
+    removed: list[str] = []
+    cache: CachedEmbedding | None = None
+    try:
+        preference = backend_name
+        if incremental and preference == "auto":
+            # Stay on the index's own backend: updating a hash index never
+            # needs the sentence-transformers (torch) import.
+            preference = load_meta(conn).get("embedding_backend", "auto")
+            if preference not in BACKEND_CHOICES:
+                preference = "auto"
+        if chunker is None:
+            # Updates keep the index's chunker unless one is asked for.
+            chunker = DEFAULT_CHUNKER
+            if incremental:
+                chunker = load_meta(conn).get("chunker", DEFAULT_CHUNKER)
+            if chunker not in CHUNKERS:
+                chunker = DEFAULT_CHUNKER
+        if vector_dtype is None:
+            # Updates keep the index's precision (and PQ codebook) too.
+            vector_dtype = DEFAULT_VECTOR_DTYPE
+            if incremental:
+                vector_dtype = load_meta(conn).get("vector_dtype", DEFAULT_VECTOR_DTYPE)
+            if vector_dtype not in STORAGE_DTYPES:
+                vector_dtype = DEFAULT_VECTOR_DTYPE
+        if vector_dtype in COMPRESSED_DTYPES and np is None:
+            print(f"NumPy is required for --dtype {vector_dtype}.")
+            return 0
+        backend = get_embedding_backend(preference, root)
+        if backend is None:
+            return 0
+        if isinstance(backend, HashEmbedding):
+            backend = configure_hash_backend(
+                load_meta(conn) if incremental else {}, hash_signed, hash_tfidf
+            )
+        cache = open_embedding_cache(root, backend, cache_size)
+        encoder: EmbeddingBackend = cache or backend
+        configure_writer(conn)
+        ensure_tables(conn)
+        if incremental and not index_settings_match(
+            load_meta(conn), backend, vector_dtype, chunker
+        ):
+            print("Index settings changed; running a full rebuild.")
+            incremental = False
+        codec = get_vector_codec(vector_dtype, backend.dim, load_meta(conn))
+        if incremental and vector_dtype in COMPRESSED_DTYPES and codec is None:
+            print("PQ codebook missing; running a full rebuild.")
+            incremental = False
+        tfidf = isinstance(backend, HashEmbedding) and backend.tfidf
+        if tfidf and not incremental:
+            # Full builds stage raw term frequencies; IDF is fitted at the end.
+            backend = encoder = HashEmbedding(backend.dim, backend.signed, tfidf=True)
+
+        if incremental:
+            known = load_file_records(conn)
+            writer = IndexWriter(
+                conn, queue_depth, vector_dtype, codec=codec, root=root
+            )
+        else:
+            # Build into staging tables so readers keep the previous snapshot.
+            known = {}
+            create_staging_tables(conn)
+            if vector_dtype == "pq" or tfidf:
+                # The codebook and IDF weights are fitted on the whole corpus,
+                # so stage float32 vectors and finish them once every file is in.
+                writer = IndexWriter(
+                    conn,
+                    queue_depth,
+                    DEFAULT_VECTOR_DTYPE,
+                    suffix=STAGING_SUFFIX,
+                    root=root,
+                )
+            else:
+                writer = IndexWriter(
+                    conn,
+                    queue_depth,
+                    vector_dtype,
+                    suffix=STAGING_SUFFIX,
+                    codec=codec,
+                    root=root,
+                )
+
+        seen: set[str] = set()
+        # Projects whose info.yaml changed need their metadata row refreshed.
+        projects: set[str] = set()
+        pending: list[PendingFile] = []
+        pending_chunks = 0
+
+        def flush() -> None:
+            for item, vectors in embed_pending(encoder, pending, batch_size):
+                if vectors is None:
+                    writer.forget(item)
+                else:
+                    writer.store(item, vectors)
+
+        try:
+            for path, status, item in iter_prepared_files(
+                root,
+                known,
+                read_workers,
+                queue_depth,
+                pdf_workers,
+                categories,
+                chunker,
+            ):
+                seen.add(str(path))
+                if status in ("unchanged", "touched"):
+                    unchanged += 1
+                if item is None:
+                    continue
+                if item.source == "info":
+                    projects.add(project_of(root, item.path)[1])
+                if status == "touched":
+                    writer.touch(item)
+                    continue
+                if not item.chunks:
+                    # Changed but now empty: drop its old chunks.
+                    writer.store(item, [])
+                    continue
+                pending.append(item)
+                pending_chunks += len(item.chunks)
+                if pending_chunks >= batch_size:
+                    flush()
+                    pending = []
+                    pending_chunks = 0
+            if pending:
+                flush()
+        finally:
+            count = writer.close()
+        projects.discard("")
+        refresh_projects(
+            conn, root, projects, "projects" if incremental else f"projects{STAGING_SUFFIX}"
+        )
+
+        # PDFs skipped this run are not treated as deleted.
+        removed = [
+            key
+            for key in known
+            if key not in seen and (pdf_workers > 0 or Path(key).name != PDF_NAME)
+        ]
+        if incremental:
+            gone = [(key,) for key in removed]
+            conn.executemany(
+                "DELETE FROM postings WHERE chunk_id IN "
+                "(SELECT id FROM chunks WHERE path = ?)",
+                gone,
+            )
+            conn.executemany("DELETE FROM chunks WHERE path = ?", gone)
+            conn.executemany("DELETE FROM files WHERE path = ?", gone)
+            conn.executemany(
+                "DELETE FROM projects WHERE project = ?",
+                [
+                    (project_of(root, Path(key))[1],)
+                    for key in removed
+                    if Path(key).name == "info.yaml"
+                ],
+            )
+            update_lexical_stats(conn)
+            set_meta(conn, "vectors_token", uuid.uuid4().hex)
+            set_meta(conn, "index_generation", next_generation(conn))
+            conn.commit()
+        else:
+            extra_meta: dict[str, str] = {}
+            staged = f"chunks{STAGING_SUFFIX}"
+            if tfidf:
+                idf = fit_staged_idf(conn, staged, backend.dim, vector_dtype)
+                extra_meta["hash_idf"] = json.dumps(idf)
+            if vector_dtype == "pq":
+                extra_meta.update(
+                    quantize_staged_vectors(conn, staged, backend.dim).to_meta()
+                )
+            swap_in_rebuild(
+                conn,
+                {**index_meta_values(backend, vector_dtype, chunker), **extra_meta},
+            )
+            # A shard only sees some categories; leave the shared text cache.
+            if pdf_workers > 0 and categories is None:
+                prune_pdf_text_cache(conn, get_pdf_text_dir(root))
+        meta = load_meta(conn)
+        try:
+            write_vector_sidecar(conn, get_vectors_path(index_dir), meta)
+        except OSError as exc:
+            print(f"Warning: failed to write vector sidecar: {exc}")
+        # Keep an existing ANN index in step with the vectors it points into.
+        if ann or get_ann_path(index_dir).exists():
+            build_ann_index(index_dir, meta, nlist)
+    except sqlite3.Error as exc:
+        print(f"Index build failed: {exc}")
+    finally:
+        conn.close()
+        if cache is not None:
+            try:
+                cache.close()
+            except sqlite3.Error as exc:
+                print(f"Warning: failed to update embedding cache: {exc}")
+
+    if cache is not None and cache.hits:
+        print(f"Embedding cache: {cache.hits} hits, {cache.misses} misses")
+    if incremental:
+        print(
+            f"Re-indexed {count} chunks into {db_path} "
+            f"({unchanged} files unchanged, {len(removed)} removed)"
+        )
+    else:
+        print(f"Indexed {count} chunks into {db_path}")
+    return count
+
+
+def get_shards_dir(root: Path) -> Path:
+    return root / SHARDS_DIR
+
+
+def list_shard_dbs(root: Path) -> list[Path]:
+    shards_dir = get_shards_dir(root)
+    if not shards_dir.is_dir():
+        return []
+    return sorted(shards_dir.glob(f"*/{DB_NAME}"))
+
+
+def partition_categories(root: Path, parts: int) -> list[list[str]]:
+    """Split category directories into at most ``parts`` groups of similar size.
+
+    Categories are the unit of work, so one huge category still lands on a
+    single worker; groups are balanced greedily by project count.
+    """
+    sizes: list[tuple[int, str]] = []
+    try:
+        category_dirs = list(root.iterdir())
+    except OSError:
+        return []
+    for category_dir in category_dirs:
+        if not category_dir.is_dir() or category_dir.name.startswith("."):
+            continue
+        try:
+            projects = sum(1 for entry in category_dir.iterdir() if entry.is_dir())
+        except OSError:
+            continue
+        sizes.append((projects, category_dir.name))
+
+    groups: list[list[str]] = [[] for _ in range(max(1, parts))]
+    loads = [0] * len(groups)
+    for projects, name in sorted(sizes, reverse=True):
+        target = loads.index(min(loads))
+        groups[target].append(name)
+        loads[target] += max(1, projects)
+    return [sorted(group) for group in groups if group]
+
+
+def build_shard(
+    categories: list[str], shard_dir: Path, options: dict[str, object]
+) -> int:
+    return build_index(categories=categories, index_dir=shard_dir, **options)  # type: ignore[arg-type]
+
+
+def build_sharded_index(
+    workers: int,
+    vector_dtype: str = DEFAULT_VECTOR_DTYPE,
+    batch_size: int = EMBED_BATCH_SIZE,
+    read_workers: int = READ_WORKERS,
+    queue_depth: int = QUEUE_DEPTH,
+    ann: bool = False,
+    nlist: int | None = None,
+    pdf_workers: int = PDF_WORKERS,
+    backend_name: str = "auto",
+    merge: bool = True,
+    chunker: str | None = None,
+    hash_signed: bool | None = None,
+    hash_tfidf: bool | None = None,
+) -> int:
+    """Index category directories on ``workers`` processes, one shard each.
+
+    Every worker builds a complete index of its categories under
+    ``.brain.shards/shard-NN``.  The shards are then merged into the main
+    index, or kept as they are when ``merge`` is off so that
+    ``brain ask --shards`` can query them directly.
+    """
+    if vector_dtype not in STORAGE_DTYPES:
+        print(f"Unsupported vector dtype: {vector_dtype}")
+        return 0
+    if vector_dtype in COMPRESSED_DTYPES and np is None:
+        print(f"NumPy is required for --dtype {vector_dtype}.")
+        return 0
+    root = get_arxiv_root()
+    if not root.exists():
+        print(f"Knowledge root not found: {root}")
+        return 0
+    groups = partition_categories(root, workers)
+    if not groups:
+        print(f"No category directories under {root}")
+        return 0
+
+    shards_dir = get_shards_dir(root)
+    shutil.rmtree(shards_dir, ignore_errors=True)
+    shard_dirs = [shards_dir / f"shard-{number:02d}" for number in range(len(groups))]
+    for shard_dir in shard_dirs:
+        shard_dir.mkdir(parents=True, exist_ok=True)
+    options: dict[str, object] = {
+        # PQ codebooks and IDF weights are fitted once over the merged corpus.
+        "vector_dtype": DEFAULT_VECTOR_DTYPE
+        if merge and (vector_dtype == "pq" or hash_tfidf)
+        else vector_dtype,
+        # Concurrent writers would serialize on the shared embedding cache.
+        "cache_size": 0,
+        "batch_size": batch_size,
+        "read_workers": read_workers,
+        "queue_depth": queue_depth,
+        "ann": ann and not merge,
+        "nlist": nlist,
+        "pdf_workers": max(1, pdf_workers // len(groups)) if pdf_workers > 0 else 0,
+        "backend_name": backend_name,
+        "chunker": chunker,
+        "hash_signed": hash_signed,
+        "hash_tfidf": hash_tfidf and not merge,
+    }
+    print(f"Indexing {len(groups)} shards in parallel")
+    started = time.perf_counter()
+    counts: list[int] = []
+    with ProcessPoolExecutor(
+        max_workers=len(groups), mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        futures = [
+            executor.submit(build_shard, group, shard_dir, options)
+            for group, shard_dir in zip(groups, shard_dirs)
+        ]
+        built: list[Path] = []
+        for group, shard_dir, future in zip(groups, shard_dirs, futures):
+            try:
+                counts.append(future.result())
+            except Exception as exc:
+                print(
+                    f"Warning: skipping shard {shard_dir.name} "
+                    f"({', '.join(group)}): {exc}"
+                )
+                # Don't leave a half-built shard for `brain ask --shards`.
+                shutil.rmtree(shard_dir, ignore_errors=True)
                 continue
-            results.append(
-                {
-                    "score": float(score),
-                    "source": str(source),
-                    "path": str(path),
-                    "chunk_index": int(chunk_index),
-                    "content": str(content),
+            built.append(shard_dir)
+    if not built:
+        print("Every shard build failed.")
+        return 0
+    print(
+        f"Built {len(built)} shards ({sum(counts)} chunks) "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    if not merge:
+        print(f"Shards kept under {shards_dir}; query them with `brain ask --shards`.")
+        return sum(counts)
+
+    count = merge_shards(
+        root,
+        [get_db_path(shard_dir) for shard_dir in built],
+        vector_dtype,
+        ann,
+        nlist,
+        prune_pdf=pdf_workers > 0,
+        hash_tfidf=bool(hash_tfidf),
+    )
+    if count is None:
+        print(f"Shards kept under {shards_dir}.")
+        return 0
+    shutil.rmtree(shards_dir, ignore_errors=True)
+    print(f"Merged {count} chunks into {get_db_path(root)}")
+    return count
+
+
+def merge_shards(
+    root: Path,
+    shard_dbs: list[Path],
+    vector_dtype: str,
+    ann: bool = False,
+    nlist: int | None = None,
+    prune_pdf: bool = False,
+    hash_tfidf: bool = False,
+) -> int | None:
+    """Copy every shard into the staging tables and swap them in.
+
+    Chunk ids are renumbered with a running offset so each shard's
+    postings keep pointing at their own chunks.
+    """
+    try:
+        conn = sqlite3.connect(get_db_path(root))
+    except sqlite3.Error as exc:
+        print(f"Failed to open index db: {exc}")
+        return None
+    try:
+        configure_writer(conn)
+        ensure_tables(conn)
+        create_staging_tables(conn)
+        settings: dict[str, str] | None = None
+        offset = 0
+        for shard_db in shard_dbs:
+            conn.execute("ATTACH DATABASE ? AS shard", (str(shard_db),))
+            try:
+                shard_meta = dict(conn.execute("SELECT key, value FROM shard.meta"))
+                shard_settings = {
+                    key: value
+                    for key, value in shard_meta.items()
+                    if key not in VOLATILE_META and not key.startswith("pq_")
                 }
+                if "embedding_backend" not in shard_settings:
+                    print(f"Shard {shard_db.parent.name} is incomplete; not merging.")
+                    return None
+                if settings is None:
+                    settings = shard_settings
+                elif shard_settings != settings:
+                    print(
+                        f"Shard {shard_db.parent.name} was built with different "
+                        "settings (embedding backend?); not merging."
+                    )
+                    return None
+                conn.execute(
+                    f"INSERT INTO chunks{STAGING_SUFFIX} "
+                    "(id, source, path, chunk_index, content, vector, token_count, "
+                    "category, project) "
+                    "SELECT id + ?, source, path, chunk_index, content, vector, "
+                    "token_count, category, project FROM shard.chunks",
+                    (offset,),
+                )
+                conn.execute(
+                    f"INSERT INTO postings{STAGING_SUFFIX} (token, chunk_id, tf) "
+                    "SELECT token, chunk_id + ?, tf FROM shard.postings",
+                    (offset,),
+                )
+                for table in ("files", "projects"):
+                    conn.execute(
+                        f"INSERT OR REPLACE INTO {table}{STAGING_SUFFIX} "
+                        f"SELECT * FROM shard.{table}"
+                    )
+                (max_id,) = conn.execute(
+                    "SELECT COALESCE(MAX(id), 0) FROM shard.chunks"
+                ).fetchone()
+                offset += int(max_id)
+                conn.commit()
+            finally:
+                conn.execute("DETACH DATABASE shard")
+        if settings is None:
+            return None
+
+        extra_meta: dict[str, str] = {}
+        staged = f"chunks{STAGING_SUFFIX}"
+        dim = int(settings["vector_dim"])
+        shard_dtype = settings.get("vector_dtype", DEFAULT_VECTOR_DTYPE)
+        if hash_tfidf and settings["embedding_backend"] == HashEmbedding.name:
+            extra_meta["hash_weighting"] = "tfidf"
+            extra_meta["hash_idf"] = json.dumps(
+                fit_staged_idf(conn, staged, dim, vector_dtype)
             )
+        elif shard_dtype != vector_dtype and shard_dtype == DEFAULT_VECTOR_DTYPE:
+            # Shards staged float32 for a fit that didn't apply (--hash-tfidf
+            # on another backend); encode them as the dtype the meta claims.
+            ids, matrix = read_staged_vectors(conn, staged, dim)
+            write_staged_vectors(conn, staged, ids, matrix, vector_dtype)
+        if vector_dtype == "pq":
+            extra_meta.update(quantize_staged_vectors(conn, staged, dim).to_meta())
+        swap_in_rebuild(
+            conn, {**settings, "vector_dtype": vector_dtype, **extra_meta}
+        )
+        if prune_pdf:
+            prune_pdf_text_cache(conn, get_pdf_text_dir(root))
+        meta = load_meta(conn)
+        try:
+            write_vector_sidecar(conn, get_vectors_path(root), meta)
+        except OSError as exc:
+            print(f"Warning: failed to write vector sidecar: {exc}")
+        if ann or get_ann_path(root).exists():
+            build_ann_index(root, meta, nlist)
+        (count,) = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()
+        return int(count)
+    except sqlite3.Error as exc:
+        print(f"Shard merge failed: {exc}")
+        return None
+    finally:
+        conn.close()
+
+
+def load_meta(conn: sqlite3.Connection) -> dict[str, str]:
+    meta: dict[str, str] = {}
+    try:
+        for key, value in conn.execute("SELECT key, value FROM meta"):
+            meta[str(key)] = str(value)
+    except sqlite3.Error:
+        return {}
+    return meta
+
+
+def filter_clause(filters: QueryFilters | None) -> tuple[str, list[str]]:
+    """SQL condition over ``chunks`` columns selecting the rows ``filters`` allow."""
+    if filters is None:
+        return "", []
+    clauses: list[str] = []
+    params: list[str] = []
+    if filters.source:
+        clauses.append("source = ?")
+        params.append(filters.source)
+    if filters.category:
+        clauses.append("category = ?")
+        params.append(filters.category)
+    project_clauses: list[str] = []
+    if filters.status:
+        project_clauses.append("status = ?")
+        params.append(filters.status)
+    if filters.since:
+        project_clauses.append("published >= ?")
+        params.append(filters.since)
+    if project_clauses:
+        clauses.append(
+            "project IN (SELECT project FROM projects WHERE "
+            + " AND ".join(project_clauses)
+            + ")"
+        )
+    return " AND ".join(clauses), params
+
+
+def filtered_chunk_ids(
+    conn: sqlite3.Connection, filters: QueryFilters
+) -> "np.ndarray":
+    clause, params = filter_clause(filters)
+    rows = conn.execute(f"SELECT id FROM chunks WHERE {clause} ORDER BY id", params)
+    return np.fromiter((row[0] for row in rows), dtype=np.int64)
+
+
+def load_vector_matrix(
+    conn: sqlite3.Connection,
+    dim: int,
+    dtype: str = DEFAULT_VECTOR_DTYPE,
+    codec: Int8Codec | PQCodec | None = None,
+    filters: QueryFilters | None = None,
+) -> tuple["np.ndarray", "np.ndarray"]:
+    """Read chunk vectors into one contiguous float32 (or quantized) matrix."""
+    clause, params = filter_clause(filters)
+    where = f"WHERE {clause} " if clause else ""
+    if codec is not None:
+        row_bytes = codec.row_bytes
+    else:
+        row_bytes = dim * struct.calcsize(VECTOR_DTYPES[dtype])
+    ids: list[int] = []
+    blobs: list[bytes] = []
+    for row_id, value in conn.execute(
+        f"SELECT id, vector FROM chunks {where}ORDER BY id", params
+    ):
+        if isinstance(value, str):
+            if codec is not None:
+                continue
+            vector = decode_vector(value)
+            if not vector or len(vector) != dim:
+                continue
+            value = pack_vector(vector, dtype)
+        if len(value) != row_bytes:
+            continue
+        ids.append(int(row_id))
+        blobs.append(value)
+    if codec is not None:
+        return np.asarray(ids, dtype=np.int64), codec.matrix_from_blobs(blobs)
+    matrix = np.frombuffer(b"".join(blobs), dtype=NUMPY_DTYPES[dtype])
+    matrix = matrix.reshape(len(ids), dim).astype(np.float32, copy=False)
+    return np.asarray(ids, dtype=np.int64), matrix
+
+
+def top_k_scores(
+    ids: "np.ndarray", matrix: "np.ndarray", query_vec: list[float], top_k: int
+) -> list[tuple[float, int]]:
+    if top_k <= 0 or not len(ids):
+        return []
+    query = np.asarray(query_vec, dtype=np.float32)
+    scores = matrix @ query
+    if top_k < len(scores):
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(len(scores))
+    candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return [
+        (float(scores[idx]), int(ids[idx]))
+        for idx in candidates
+        if scores[idx] > 0.0
+    ]
+
+
+def rank_chunks_numpy(
+    conn: sqlite3.Connection,
+    query_vec: list[float],
+    dtype: str,
+    top_k: int,
+    codec: Int8Codec | PQCodec | None = None,
+    filters: QueryFilters | None = None,
+) -> list[tuple[float, int]]:
+    ids, matrix = load_vector_matrix(conn, len(query_vec), dtype, codec, filters)
+    return top_k_scores(ids, matrix, query_vec, top_k)
+
+
+def rank_chunks_python(
+    conn: sqlite3.Connection,
+    query_vec: list[float],
+    dtype: str,
+    top_k: int,
+    filters: QueryFilters | None = None,
+) -> list[tuple[float, int]]:
+    clause, params = filter_clause(filters)
+    where = f" WHERE {clause}" if clause else ""
+    scored: list[tuple[float, int]] = []
+    for row_id, value in conn.execute(f"SELECT id, vector FROM chunks{where}", params):
+        vector = decode_vector(value, dtype)
+        if not vector or len(vector) != len(query_vec):
+            continue
+        score = sum(a * b for a, b in zip(query_vec, vector))
+        if score > 0.0:
+            scored.append((float(score), int(row_id)))
+    return heapq.nlargest(top_k, scored, key=lambda item: item[0])
+
+
+def load_results(
+    conn: sqlite3.Connection,
+    hits: list[tuple[float, int]],
+    kind: str = "cosine",
+    similarity: dict[int, float] | None = None,
+) -> list[SearchResult]:
+    if not hits:
+        return []
+    similarity = similarity or {}
+    placeholders = ",".join("?" for _ in hits)
+    rows = {
+        int(row[0]): row
+        for row in conn.execute(
+            "SELECT id, source, path, chunk_index, content FROM chunks "
+            f"WHERE id IN ({placeholders})",
+            [row_id for _, row_id in hits],
+        )
+    }
+    results: list[SearchResult] = []
+    for score, row_id in hits:
+        row = rows.get(row_id)
+        if row is None:
+            continue
+        _, source, path, chunk_index, content = row
+        results.append(
+            {
+                "score": score,
+                "score_kind": kind,
+                "similarity": similarity.get(row_id),
+                "source": str(source),
+                "path": str(path),
+                "chunk_index": int(chunk_index),
+                "content": str(content),
+            }
+        )
+    return results
+
+
+def rank_chunks_bm25(
+    conn: sqlite3.Connection,
+    text: str,
+    meta: dict[str, str],
+    limit: int,
+    filters: QueryFilters | None = None,
+) -> list[tuple[float, int]]:
+    terms = set(tokenize(text))
+    docs = int(meta.get("lexical_docs", "0") or 0)
+    if not terms or docs <= 0 or limit <= 0:
+        return []
+    avgdl = float(meta.get("lexical_avgdl", "0") or 0) or 1.0
+    clause, params = filter_clause(filters)
+    scores: dict[int, float] = {}
+    sql = (
+        "SELECT p.chunk_id, p.tf, c.token_count FROM postings p "
+        "JOIN chunks c ON c.id = p.chunk_id WHERE p.token = ?"
+    )
+    if clause:
+        sql += f" AND {clause}"
+    for term in terms:
+        rows = conn.execute(sql, (term, *params)).fetchall()
+        if not rows:
+            continue
+        df = len(rows)
+        if clause:
+            # IDF comes from the whole corpus; the filter only drops candidates.
+            (df,) = conn.execute(
+                "SELECT COUNT(*) FROM postings WHERE token = ?", (term,)
+            ).fetchone()
+        idf = math.log(1.0 + (docs - df + 0.5) / (df + 0.5))
+        for chunk_id, tf, length in rows:
+            norm = tf + BM25_K1 * (1.0 - BM25_B + BM25_B * length / avgdl)
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+    return heapq.nlargest(
+        limit, ((score, int(chunk_id)) for chunk_id, score in scores.items())
+    )
+
+
+def reciprocal_rank_fusion(
+    rankings: Iterable[list[tuple[float, int]]], top_k: int, k: int = RRF_K
+) -> list[tuple[float, int]]:
+    fused: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, (_, chunk_id) in enumerate(ranking, start=1):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return heapq.nlargest(top_k, ((score, cid) for cid, score in fused.items()))
+
+
+def looks_like_identifier(text: str) -> bool:
+    """Single terms such as ``Llama-2``, ``W_q`` or ``GPT4`` are lexical lookups."""
+    term = text.strip()
+    if not term or len(term.split()) != 1:
+        return False
+    return bool(re.search(r"\d|_|[a-z][A-Z]|[A-Z]{2,}", term))
+
+
+def load_resident_vectors(
+    root: Path, meta: dict[str, str]
+) -> tuple[tuple[np.ndarray, np.ndarray] | None, IVFIndex | None]:
+    """Return the sidecar matrix and ANN index, reusing them while the index is unchanged."""
+    key = (str(root), meta.get("vectors_token", ""))
+    cached = _RESIDENT_VECTORS.get(key)
+    if cached is not None:
+        return cached  # type: ignore[return-value]
+    loaded = (
+        open_vector_sidecar(get_vectors_path(root), meta),
+        load_ann_index(root, meta),
+    )
+    # A new token means the index was rebuilt; drop the stale mapping but
+    # keep other shards resident.
+    for stale in [entry for entry in _RESIDENT_VECTORS if entry[0] == key[0]]:
+        del _RESIDENT_VECTORS[stale]
+    if key[1]:
+        _RESIDENT_VECTORS[key] = loaded  # type: ignore[assignment]
+    return loaded
+
+
+def rank_vectors(
+    conn: sqlite3.Connection,
+    root: Path,
+    meta: dict[str, str],
+    query_vec: list[float],
+    limit: int,
+    nprobe: int,
+    exact: bool,
+    filters: QueryFilters | None = None,
+) -> list[tuple[float, int]]:
+    vector_dtype = meta.get("vector_dtype", DEFAULT_VECTOR_DTYPE)
+    sidecar, ann_index = load_resident_vectors(root, meta)
+    if exact or filters is not None:
+        ann_index = None
+    if sidecar is not None and filters is not None:
+        # Resolve the filter through the SQLite indexes first and score only
+        # the matching sidecar rows.
+        ids, matrix = sidecar
+        wanted = filtered_chunk_ids(conn, filters)
+        if not len(ids) or not len(wanted):
+            return []
+        rows = np.minimum(np.searchsorted(ids, wanted), len(ids) - 1)
+        rows = rows[ids[rows] == wanted]
+        return top_k_scores(ids[rows], matrix[rows], query_vec, limit)
+    if sidecar is not None and ann_index is not None:
+        ids, matrix = sidecar
+        rows, scores = ann_index.search(
+            matrix, np.asarray(query_vec, dtype=np.float32), limit, nprobe
+        )
+        return [
+            (float(score), int(ids[row]))
+            for row, score in zip(rows, scores)
+            if score > 0.0
+        ]
+    if sidecar is not None:
+        return top_k_scores(*sidecar, query_vec, limit)
+    if np is not None:
+        codec = get_vector_codec(vector_dtype, len(query_vec), meta)
+        return rank_chunks_numpy(
+            conn, query_vec, vector_dtype, limit, codec, filters
+        )
+    return rank_chunks_python(conn, query_vec, vector_dtype, limit, filters)
+
+
+def rerank_exact(
+    conn: sqlite3.Connection,
+    backend: EmbeddingBackend,
+    query_vec: list[float],
+    hits: list[tuple[float, int]],
+    depth: int,
+) -> list[tuple[float, int]]:
+    """Re-score the best ``depth`` quantized hits against freshly embedded chunks."""
+    head = hits[:depth]
+    if not head:
+        return hits
+    placeholders = ",".join("?" for _ in head)
+    contents = {
+        int(row_id): str(content)
+        for row_id, content in conn.execute(
+            f"SELECT id, content FROM chunks WHERE id IN ({placeholders})",
+            [row_id for _, row_id in head],
+        )
+    }
+    ids = [row_id for _, row_id in head if row_id in contents]
+    if not ids:
+        return hits
+    vectors = np.asarray(backend.encode([contents[i] for i in ids]), dtype=np.float32)
+    scores = vectors @ np.asarray(query_vec, dtype=np.float32)
+    rescored = sorted(
+        ((float(score), row_id) for score, row_id in zip(scores, ids)), reverse=True
+    )
+    return rescored + hits[depth:]
+
+
+def rank_query(
+    conn: sqlite3.Connection,
+    root: Path,
+    meta: dict[str, str],
+    text: str,
+    top_k: int,
+    nprobe: int,
+    exact: bool,
+    mode: str,
+    rerank: int,
+    filters: QueryFilters | None,
+    query_vec: list[float] | None = None,
+) -> Ranking | None:
+    """Best ``top_k`` ``(score, chunk id)`` hits; ``None`` if the query can't run.
+
+    ``query_vec`` skips encoding when the caller already embedded ``text``.
+    """
+    depth = top_k if mode == "vector" else max(top_k * 4, RRF_DEPTH)
+    lexical: list[tuple[float, int]] = []
+    if mode != "vector":
+        lexical = rank_chunks_bm25(conn, text, meta, depth, filters)
+        # Exact identifiers are answered from the postings alone.
+        if mode == "lexical" or (lexical and looks_like_identifier(text)):
+            return Ranking(lexical[:top_k], "bm25", {})
+
+    vector_dtype = meta.get("vector_dtype", DEFAULT_VECTOR_DTYPE)
+    if vector_dtype not in STORAGE_DTYPES:
+        print(f"Unsupported vector dtype: {vector_dtype}. Rebuild index.")
+        return None
+    if vector_dtype in COMPRESSED_DTYPES and np is None:
+        print(f"NumPy is required to query a {vector_dtype} index.")
+        return None
+    if vector_dtype == "pq" and "pq_codebook" not in meta:
+        print("PQ codebook missing. Rebuild index.")
+        return None
+    backend = select_backend_for_query(meta, root)
+    if backend is None:
+        return None
+    if meta.get("vector_dim") and int(meta["vector_dim"]) != backend.dim:
+        print("Index vector dimension mismatch. Rebuild index.")
+        return None
+
+    if query_vec is None:
+        query_vectors = backend.encode([text])
+        if not query_vectors or not any(query_vectors[0]):
+            print("Query is empty after tokenization.")
+            return None
+        query_vec = query_vectors[0]
+
+    depth = max(depth, rerank)
+    hits = rank_vectors(conn, root, meta, query_vec, depth, nprobe, exact, filters)
+    if rerank > 0 and vector_dtype in COMPRESSED_DTYPES:
+        hits = rerank_exact(conn, backend, query_vec, hits, rerank)
+    similarity = {row_id: score for score, row_id in hits}
+    if lexical:
+        return Ranking(
+            reciprocal_rank_fusion([hits, lexical], top_k), "rrf", similarity
+        )
+    return Ranking(hits[:top_k], "cosine", similarity)
+
+
+def query_brain(
+    text: str,
+    top_k: int = 5,
+    nprobe: int = DEFAULT_NPROBE,
+    exact: bool = False,
+    mode: str = "hybrid",
+    rerank: int = 0,
+    filters: QueryFilters | None = None,
+    use_cache: bool = True,
+    shards: bool = False,
+    root: Path | None = None,
+) -> list[SearchResult]:
+    root = root or get_arxiv_root()
+    db_path = get_db_path(root)
+    if mode not in SEARCH_MODES:
+        print(f"Unknown search mode: {mode}")
+        return []
+    if filters is not None and not any(filters):
+        filters = None
+    shard_dbs = list_shard_dbs(root)
+    if shards or (not db_path.exists() and shard_dbs):
+        return query_shards(
+            shard_dbs, text, top_k, nprobe, exact, mode, rerank, filters, root
+        )
+    if not db_path.exists():
+        print("Index not found. Run: arxiv brain index")
+        return []
+
+    try:
+        conn = sqlite3.connect(db_path)
+    except sqlite3.Error as exc:
+        print(f"Failed to open index db: {exc}")
+        return []
+
+    cache: QueryCache | None = None
+    try:
+        if not migrate_schema(conn):
+            print("Unsupported index schema. Rebuild index.")
+            return []
+        meta = load_meta(conn)
+        key = query_cache_key(
+            text, meta, top_k, nprobe, exact, mode, rerank, filters
+        )
+        if use_cache:
+            cache = open_query_cache(root, meta)
+        if cache is not None:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+
+        ranking = rank_query(
+            conn, root, meta, text, top_k, nprobe, exact, mode, rerank, filters
+        )
+        if ranking is None:
+            return []
+        results = load_results(conn, *ranking)
+        if cache is not None:
+            cache.put(key, results)
     except sqlite3.Error as exc:
         print(f"Query failed: {exc}")
         return []
     finally:
         conn.close()
+        if cache is not None:
+            cache.close()
+
+    return results
+
+
+def query_shards(
+    shard_dbs: list[Path],
+    text: str,
+    top_k: int,
+    nprobe: int,
+    exact: bool,
+    mode: str,
+    rerank: int,
+    filters: QueryFilters | None,
+    root: Path | None = None,
+) -> list[SearchResult]:
+    """Query every shard of an unmerged ``--workers`` build and merge by score.
+
+    Cosine scores compare across shards directly.  BM25 and fused scores
+    are shard-local, so lexical and hybrid merges are approximate.
+    """
+    if not shard_dbs:
+        print("No index shards found. Run: arxiv brain index --workers N --no-merge")
+        return []
+    query_vec: list[float] | None = None
+    if mode != "lexical":
+        # Embed once for all shards; they share one backend.
+        try:
+            with sqlite3.connect(shard_dbs[0]) as conn:
+                meta = load_meta(conn)
+        except sqlite3.Error as exc:
+            print(f"Failed to open index shard: {exc}")
+            return []
+        # Resolved against the knowledge root, then reused from the query
+        # backend cache by each shard's rank_query.
+        backend = select_backend_for_query(meta, root)
+        if backend is None:
+            return []
+        query_vectors = backend.encode([text])
+        if not query_vectors or not any(query_vectors[0]):
+            print("Query is empty after tokenization.")
+            return []
+        query_vec = query_vectors[0]
+
+    def query_one(db_path: Path) -> list[SearchResult]:
+        try:
+            conn = sqlite3.connect(db_path)
+        except sqlite3.Error as exc:
+            print(f"Failed to open index shard {db_path.parent.name}: {exc}")
+            return []
+        try:
+            if not migrate_schema(conn):
+                print(f"Unsupported schema in shard {db_path.parent.name}.")
+                return []
+            ranking = rank_query(
+                conn,
+                db_path.parent,
+                load_meta(conn),
+                text,
+                top_k,
+                nprobe,
+                exact,
+                mode,
+                rerank,
+                filters,
+                query_vec,
+            )
+            return load_results(conn, *ranking) if ranking is not None else []
+        except sqlite3.Error as exc:
+            print(f"Query failed on shard {db_path.parent.name}: {exc}")
+            return []
+        finally:
+            conn.close()
+
+    with ThreadPoolExecutor(
+        max_workers=len(shard_dbs), thread_name_prefix="brain-shard"
+    ) as executor:
+        results = [item for part in executor.map(query_one, shard_dbs) for item in part]
+    return heapq.nlargest(top_k, results, key=lambda item: item["score"])
+
+
+def get_socket_path(root: Path) -> Path:
+    return root / SOCKET_NAME
+
+
+def index_stamp(root: Path) -> tuple[int, ...]:
+    stamps: list[int] = []
+    for path in (get_db_path(root), root / f"{DB_NAME}-wal", get_vectors_path(root)):
+        try:
+            stat = path.stat()
+        except OSError:
+            stamps.extend((0, 0))
+            continue
+        stamps.extend((stat.st_mtime_ns, stat.st_size))
+    return tuple(stamps)
+
+
+def warm_up_query_state(root: Path) -> bool:
+    db_path = get_db_path(root)
+    if not db_path.exists():
+        return False
+    try:
+        conn = sqlite3.connect(db_path)
+    except sqlite3.Error:
+        return False
+    try:
+        if not migrate_schema(conn):
+            return False
+        meta = load_meta(conn)
+    except sqlite3.Error:
+        return False
+    finally:
+        conn.close()
+    backend = select_backend_for_query(meta, root)
+    load_resident_vectors(root, meta)
+    return backend is not None
+
+
+class BrainRequestHandler(socketserver.StreamRequestHandler):
+    """One JSON request line in, one JSON response line out.
+
+    ``query_brain`` reports problems by printing them; a query that prints
+    and finds nothing is answered with ``{"error": <printed text>}`` so the
+    client sees why instead of an empty result list.
+    """
 
-    results.sort(key=lambda item: item["score"], reverse=True)
-    return results[:top_k]
+    server: "BrainServer"
+
+    def handle(self) -> None:
+        line = self.rfile.readline(MAX_REQUEST_BYTES)
+        try:
+            request = json.loads(line)
+            if request.get("ping"):
+                response: dict[str, object] = {"ok": True}
+            else:
+                response = self.answer(request)
+        except (AttributeError, KeyError, TypeError, ValueError) as exc:
+            response = {"error": f"bad request: {exc}"}
+        except Exception as exc:
+            print(f"Query failed: {exc}")
+            response = {"error": f"query failed: {exc}"}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+    def answer(self, request: dict) -> dict[str, object]:
+        output = io.StringIO()
+        with self.server.lock:
+            self.server.check_reload()
+            # Safe while the lock is held: no other query thread is printing.
+            with contextlib.redirect_stdout(output):
+                results = query_brain(
+                    str(request["text"]),
+                    top_k=int(request.get("top_k", 5)),
+                    nprobe=int(request.get("nprobe", DEFAULT_NPROBE)),
+                    exact=bool(request.get("exact", False)),
+                    mode=str(request.get("mode", "hybrid")),
+                    rerank=int(request.get("rerank", 0)),
+                    filters=QueryFilters(**(request.get("filters") or {})),
+                    use_cache=bool(request.get("use_cache", True)),
+                    shards=bool(request.get("shards", False)),
+                )
+        messages = output.getvalue().strip()
+        if messages:
+            print(messages)
+        if not results and messages:
+            return {"error": messages}
+        return {"results": results}
+
+
+class BrainServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, root: Path) -> None:
+        super().__init__(str(socket_path), BrainRequestHandler)
+        self.root = root
+        # Queries share one embedding model; run them one at a time.
+        self.lock = threading.Lock()
+        self.stamp = index_stamp(root)
+
+    def check_reload(self) -> None:
+        stamp = index_stamp(self.root)
+        if stamp == self.stamp:
+            return
+        self.stamp = stamp
+        print("Index changed on disk; reloading vectors.")
+        _RESIDENT_VECTORS.clear()
+        warm_up_query_state(self.root)
+
+
+def serve_brain(socket_path: Path | None = None) -> None:
+    if not hasattr(socket, "AF_UNIX"):
+        print("brain serve needs Unix domain sockets, which this platform lacks.")
+        return
+    root = get_arxiv_root()
+    path = socket_path or get_socket_path(root)
+    if ask_daemon({"ping": True}, path, timeout=1.0) is not None:
+        print(f"Brain server already running on {path}")
+        return
+    path.unlink(missing_ok=True)
+
+    if not warm_up_query_state(root):
+        print("Warning: index not loaded yet; the server will load it on first query.")
+    # Create the socket owner-only from the start; a chmod after bind()
+    # would leave a window where other local users could connect.
+    old_umask = os.umask(0o177)
+    try:
+        server = BrainServer(path, root)
+    except OSError as exc:
+        print(f"Failed to listen on {path}: {exc}")
+        return
+    finally:
+        os.umask(old_umask)
+
+    def stop(signum: int, frame: object) -> None:
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    with server:
+        print(f"Brain server listening on {path} (Ctrl-C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            path.unlink(missing_ok=True)
+
+
+def ask_daemon(
+    payload: dict[str, object],
+    socket_path: Path | None = None,
+    timeout: float = DAEMON_TIMEOUT,
+) -> dict[str, object] | None:
+    """Send one request to a running ``brain serve``; ``None`` if none is reachable.
+
+    Error replies are returned as they are, as ``{"error": ...}``.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    path = socket_path or get_socket_path(get_arxiv_root())
+    if not path.exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(path))
+            sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as reader:
+                line = reader.readline()
+        response = json.loads(line)
+    except (OSError, ValueError):
+        return None
+    return response if isinstance(response, dict) else None
+
+
+def query_brain_via_daemon(
+    text: str,
+    top_k: int = 5,
+    nprobe: int = DEFAULT_NPROBE,
+    exact: bool = False,
+    mode: str = "hybrid",
+    rerank: int = 0,
+    filters: QueryFilters | None = None,
+    use_cache: bool = True,
+    shards: bool = False,
+) -> list[SearchResult]:
+    response = ask_daemon(
+        {
+            "text": text,
+            "top_k": top_k,
+            "nprobe": nprobe,
+            "exact": exact,
+            "mode": mode,
+            "rerank": rerank,
+            "filters": filters._asdict() if filters is not None else None,
+            "use_cache": use_cache,
+            "shards": shards,
+        }
+    )
+    if response is not None and isinstance(response.get("results"), list):
+        return response["results"]  # type: ignore[return-value]
+    if response is not None and response.get("error"):
+        # The server may be stale or set up differently; ask in-process.
+        print(f"Brain server: {response['error']}")
+        print("Querying in-process instead.")
+    return query_brain(
+        text,
+        top_k=top_k,
+        nprobe=nprobe,
+        exact=exact,
+        mode=mode,
+        rerank=rerank,
+        filters=filters,
+        use_cache=use_cache,
+        shards=shards,
+    )
+
+
+def benchmark_ann(
+    queries: int = 100, top_k: int = 10, nprobes: Iterable[int] = (1, 4, 8, 16, 32)
+) -> list[dict[str, float]]:
+    """Compare IVF recall@k and latency against the exact scan.
+
+    Stored chunk vectors double as queries, so no embedding model is needed.
+    """
+    root = get_arxiv_root()
+    db_path = get_db_path(root)
+    if np is None:
+        print("NumPy is required for the ANN benchmark.")
+        return []
+    if not db_path.exists():
+        print("Index not found. Run: arxiv brain index --ann")
+        return []
+    conn = sqlite3.connect(db_path)
+    try:
+        meta = load_meta(conn)
+    finally:
+        conn.close()
+    sidecar = open_vector_sidecar(get_vectors_path(root), meta)
+    ann_index = load_ann_index(root, meta)
+    if sidecar is None or ann_index is None:
+        print("ANN index not found or stale. Run: arxiv brain index --ann")
+        return []
+
+    from arxiv_engine.core.ann import exact_search, recall_at_k
+
+    _, matrix = sidecar
+    if not len(matrix):
+        return []
+    rng = np.random.default_rng(0)
+    picks = rng.choice(len(matrix), size=min(queries, len(matrix)), replace=False)
+    sample = np.asarray(matrix[np.sort(picks)], dtype=np.float32)
+
+    rows: list[dict[str, float]] = []
+    truth: list[np.ndarray] = []
+    start = time.perf_counter()
+    for query in sample:
+        truth.append(exact_search(matrix, query, top_k)[0])
+    exact_ms = (time.perf_counter() - start) * 1000 / len(sample)
+    rows.append({"nprobe": 0, "recall": 1.0, "latency_ms": exact_ms})
+
+    for nprobe in nprobes:
+        recalls = []
+        start = time.perf_counter()
+        approx = [ann_index.search(matrix, query, top_k, nprobe)[0] for query in sample]
+        latency_ms = (time.perf_counter() - start) * 1000 / len(sample)
+        for found, expected in zip(approx, truth):
+            recalls.append(recall_at_k(found, expected))
+        rows.append(
+            {
+                "nprobe": nprobe,
+                "recall": float(np.mean(recalls)),
+                "latency_ms": latency_ms,
+            }
+        )
+    return rows
+
+
+def chunk_report(include_pdf: bool = False) -> dict[str, dict[str, dict[str, int]]]:
+    """Per chunker and source kind: files, chunks and estimated model tokens.
+
+    ``over_budget`` counts chunks longer than the token budget, which the
+    embedding model silently truncates.  PDFs are only counted when their
+    text is already in the extraction cache.
+    """
+    from arxiv_engine.core.chunking import CHUNK_TOKENS, estimate_tokens
+
+    root = get_arxiv_root()
+    report: dict[str, dict[str, dict[str, int]]] = {chunker: {} for chunker in CHUNKERS}
+    for path, source in iter_source_files(root, include_pdf):
+        if source == "pdf":
+            try:
+                digest = hashlib.sha256(path.read_bytes()).hexdigest()
+            except OSError:
+                continue
+            text = read_text_safe(get_pdf_text_dir(root) / f"{digest}.txt")
+            if not text:
+                continue
+        else:
+            text = read_text_safe(path)
+        for chunker in CHUNKERS:
+            if source == "pdf":
+                chunks = chunk_pdf_text(text, chunker)
+            else:
+                chunks = chunk_source(text, source, chunker)
+            sizes = [estimate_tokens(chunk) for chunk in chunks]
+            for key in (source, "total"):
+                row = report[chunker].setdefault(
+                    key, {"files": 0, "chunks": 0, "tokens": 0, "over_budget": 0}
+                )
+                row["files"] += 1
+                row["chunks"] += len(chunks)
+                row["tokens"] += sum(sizes)
+                row["over_budget"] += sum(1 for size in sizes if size > CHUNK_TOKENS)
+    return report
+
+
+def get_chunk_report_path(root: Path) -> Path:
+    return root / CHUNK_REPORT_NAME
+
+
+def load_chunk_baseline(root: Path) -> dict[str, dict[str, dict[str, int]]]:
+    try:
+        data = json.loads(get_chunk_report_path(root).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def parse_since(value: str) -> str:
+    if not SINCE_RE.match(value):
+        raise argparse.ArgumentTypeError(f"expected YYYY, YYYY-MM or YYYY-MM-DD: {value}")
+    return value
 
 
 def format_preview(text: str, limit: int = 240) -> str:
@@ -364,32 +3250,395 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Local arxiv knowledge search")
     subparsers = parser.add_subparsers(dest="command")
 
-    subparsers.add_parser("index", help="Build local index")
+    index_parser = subparsers.add_parser("index", help="Build local index")
+    index_parser.add_argument(
+        "--dtype",
+        choices=STORAGE_DTYPES,
+        default=None,
+        help="On-disk vector precision (default: float32, or the existing index's "
+        "with --incremental; int8 and pq are quantized and need NumPy)",
+    )
+    index_parser.add_argument(
+        "--backend",
+        choices=BACKEND_CHOICES,
+        default="auto",
+        help="Embedding backend (auto: sentence-transformers if installed, "
+        "or the existing index's backend with --incremental)",
+    )
+    index_parser.add_argument(
+        "--hash-signed",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        dest="hash_signed",
+        help="Hash backend: give tokens a +/- sign so bucket collisions cancel",
+    )
+    index_parser.add_argument(
+        "--hash-tfidf",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        dest="hash_tfidf",
+        help="Hash backend: weight buckets by IDF fitted on the corpus (needs NumPy)",
+    )
+    index_parser.add_argument(
+        "--chunker",
+        choices=CHUNKERS,
+        default=None,
+        help=f"How files are split (default: {DEFAULT_CHUNKER}, "
+        "or the existing index's chunker with --incremental)",
+    )
+    index_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only re-embed new or changed files",
+    )
+    index_parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_CACHE_SIZE,
+        dest="cache_size",
+        help="Max cached chunk embeddings (0 disables the cache)",
+    )
+    index_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=EMBED_BATCH_SIZE,
+        dest="batch_size",
+        help="Chunks per embedding batch across files",
+    )
+    index_parser.add_argument(
+        "--read-workers",
+        type=int,
+        default=READ_WORKERS,
+        dest="read_workers",
+        help="Threads reading and chunking source files",
+    )
+    index_parser.add_argument(
+        "--pdf-workers",
+        type=int,
+        default=PDF_WORKERS,
+        dest="pdf_workers",
+        help="Processes extracting paper.pdf text (0 skips PDFs)",
+    )
+    index_parser.add_argument(
+        "--queue-depth",
+        type=int,
+        default=QUEUE_DEPTH,
+        dest="queue_depth",
+        help="Max files buffered between reading, embedding and writing",
+    )
+    index_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes building per-category shards in parallel "
+        "(each loads its own embedding model; the embedding cache is skipped)",
+    )
+    index_parser.add_argument(
+        "--no-merge",
+        action="store_true",
+        dest="no_merge",
+        help="With --workers, keep the shards instead of merging them into one index",
+    )
+    index_parser.add_argument(
+        "--ann", action="store_true", help="Also build an IVF approximate index"
+    )
+    index_parser.add_argument(
+        "--nlist", type=int, default=None, help="IVF list count (default: sqrt(rows))"
+    )
 
     ask_parser = subparsers.add_parser("ask", help="Query the local index")
     ask_parser.add_argument("text", help="Query text")
     ask_parser.add_argument("--top-k", type=int, default=5, dest="top_k")
+    ask_parser.add_argument(
+        "--nprobe",
+        type=int,
+        default=DEFAULT_NPROBE,
+        help="IVF lists to scan when an ANN index exists (higher = better recall)",
+    )
+    ask_parser.add_argument(
+        "--exact", action="store_true", help="Ignore the ANN index and scan all vectors"
+    )
+    ask_parser.add_argument(
+        "--mode",
+        choices=SEARCH_MODES,
+        default="hybrid",
+        help="Rank by vectors, BM25, or both fused with reciprocal rank fusion",
+    )
+    ask_parser.add_argument(
+        "--rerank",
+        type=int,
+        default=0,
+        help="Re-embed the top N hits of an int8/pq index and re-score them exactly",
+    )
+    ask_parser.add_argument(
+        "--source", choices=SOURCE_KINDS, default=None, help="Only search this file kind"
+    )
+    ask_parser.add_argument(
+        "--category", default=None, help="Only search one category dir, e.g. 2401.CS"
+    )
+    ask_parser.add_argument(
+        "--status", default=None, help="Only papers with this info.yaml status"
+    )
+    ask_parser.add_argument(
+        "--since",
+        type=parse_since,
+        default=None,
+        help="Only papers published on or after YYYY[-MM[-DD]]",
+    )
+
+    ask_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        dest="no_cache",
+        help="Skip the on-disk query result cache",
+    )
+    ask_parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        dest="no_daemon",
+        help="Query in-process even if `brain serve` is running",
+    )
+    ask_parser.add_argument(
+        "--shards",
+        action="store_true",
+        help="Query the shards of an unmerged `index --workers` build directly",
+    )
+
+    serve_parser = subparsers.add_parser(
+        "serve", help="Keep the model and vectors warm behind a Unix socket"
+    )
+    serve_parser.add_argument(
+        "--socket", type=Path, default=None, help=f"Socket path (default: <root>/{SOCKET_NAME})"
+    )
+
+    bench_parser = subparsers.add_parser(
+        "ann-bench", help="Measure ANN recall@k and latency against exact search"
+    )
+    bench_parser.add_argument("--queries", type=int, default=100)
+    bench_parser.add_argument("--top-k", type=int, default=10, dest="top_k")
+    bench_parser.add_argument(
+        "--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32], dest="nprobes"
+    )
+    bench_parser.add_argument("--json", action="store_true", help="JSON output")
+
+    suite_parser = subparsers.add_parser(
+        "bench",
+        help="Time index builds and queries on synthetic knowledge roots",
+    )
+    suite_parser.add_argument(
+        "--projects",
+        type=int,
+        nargs="+",
+        default=[200],
+        help="Synthetic root sizes in papers (one root per size)",
+    )
+    suite_parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=("hash", SENTENCE_BACKEND),
+        default=["hash", SENTENCE_BACKEND],
+    )
+    suite_parser.add_argument(
+        "--dtypes", nargs="+", choices=STORAGE_DTYPES, default=list(STORAGE_DTYPES)
+    )
+    suite_parser.add_argument("--queries", type=int, default=200)
+    suite_parser.add_argument("--mode", choices=SEARCH_MODES, default="hybrid")
+    suite_parser.add_argument(
+        "--ann", action="store_true", help="Build and query through the IVF index"
+    )
+    suite_parser.add_argument(
+        "--change-fraction",
+        type=float,
+        default=0.05,
+        dest="change_fraction",
+        help="Share of summaries edited before the incremental re-index",
+    )
+    suite_parser.add_argument("--seed", type=int, default=0)
+    suite_parser.add_argument(
+        "--work-dir",
+        type=Path,
+        default=None,
+        dest="work_dir",
+        help="Keep the synthetic roots here instead of a temporary directory",
+    )
+    suite_parser.add_argument(
+        "--verbose", action="store_true", help="Show index pipeline output"
+    )
+    suite_parser.add_argument("--json", action="store_true", help="JSON output")
+
+    report_parser = subparsers.add_parser(
+        "chunk-report",
+        help="Compare chunk counts per chunker against the saved baseline",
+    )
+    report_parser.add_argument(
+        "--pdf", action="store_true", help="Include PDFs whose text is already cached"
+    )
+    report_parser.add_argument(
+        "--save", action="store_true", help=f"Store this run as <root>/{CHUNK_REPORT_NAME}"
+    )
+    report_parser.add_argument(
+        "--max-growth",
+        type=float,
+        default=None,
+        dest="max_growth",
+        help="Exit 1 if any chunker's total chunks grew more than PCT%% over the baseline",
+    )
+    report_parser.add_argument("--json", action="store_true", help="JSON output")
 
     args = parser.parse_args()
 
     if args.command == "index":
-        build_index()
+        if args.workers > 1 and not args.incremental:
+            build_sharded_index(
+                args.workers,
+                vector_dtype=args.dtype or DEFAULT_VECTOR_DTYPE,
+                batch_size=args.batch_size,
+                read_workers=args.read_workers,
+                queue_depth=args.queue_depth,
+                ann=args.ann,
+                nlist=args.nlist,
+                pdf_workers=args.pdf_workers,
+                backend_name=args.backend,
+                merge=not args.no_merge,
+                chunker=args.chunker,
+                hash_signed=args.hash_signed,
+                hash_tfidf=args.hash_tfidf,
+            )
+            return
+        if args.workers > 1:
+            print("Note: --incremental updates run in a single process.")
+        build_index(
+            vector_dtype=args.dtype,
+            incremental=args.incremental,
+            cache_size=args.cache_size,
+            batch_size=args.batch_size,
+            read_workers=args.read_workers,
+            pdf_workers=args.pdf_workers,
+            backend_name=args.backend,
+            chunker=args.chunker,
+            hash_signed=args.hash_signed,
+            hash_tfidf=args.hash_tfidf,
+            queue_depth=args.queue_depth,
+            ann=args.ann,
+            nlist=args.nlist,
+        )
+        return
+
+    if args.command == "serve":
+        serve_brain(args.socket)
         return
 
     if args.command == "ask":
-        results = query_brain(args.text, top_k=args.top_k)
+        ask = query_brain if args.no_daemon else query_brain_via_daemon
+        results = ask(
+            args.text,
+            top_k=args.top_k,
+            nprobe=args.nprobe,
+            exact=args.exact,
+            mode=args.mode,
+            rerank=args.rerank,
+            filters=QueryFilters(args.source, args.category, args.status, args.since),
+            use_cache=not args.no_cache,
+            shards=args.shards,
+        )
         if not results:
             print("No matches found.")
             return
         for item in results:
+            score = f"{item['score']:.3f}"
+            if item.get("score_kind") == "rrf":
+                # Fusion scores are rank-based; show the similarity beside them.
+                similarity = item.get("similarity")
+                cosine = f"{similarity:.3f}" if similarity is not None else "-"
+                score = f"rrf {score} | cos {cosine}"
             print(
-                f"[{item['score']:.3f}] {item['path']} "
+                f"[{score}] {item['path']} "
                 f"(source={item['source']}, chunk={item['chunk_index']})"
             )
             print(format_preview(item["content"]))
             print()
         return
 
+    if args.command == "ann-bench":
+        rows = benchmark_ann(args.queries, args.top_k, args.nprobes)
+        if args.json:
+            print(json.dumps(rows, indent=2))
+            return
+        for row in rows:
+            label = "exact" if not row["nprobe"] else f"nprobe={int(row['nprobe'])}"
+            print(
+                f"{label:>12}  recall@{args.top_k}={row['recall']:.3f}  "
+                f"{row['latency_ms']:.3f} ms/query"
+            )
+        return
+
+    if args.command == "bench":
+        from arxiv_engine.pipelines.brain_bench import run_benchmarks
+
+        suite = run_benchmarks(
+            args.projects,
+            args.backends,
+            args.dtypes,
+            queries=args.queries,
+            mode=args.mode,
+            ann=args.ann,
+            change_fraction=args.change_fraction,
+            seed=args.seed,
+            work_dir=args.work_dir,
+            verbose=args.verbose,
+        )
+        if args.json:
+            print(json.dumps(suite, indent=2))
+            return
+        print(
+            f"{'backend':<22} {'dtype':<8} {'papers':>6} {'chunks':>7} {'build s':>8} "
+            f"{'incr s':>7} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}"
+        )
+        for row in suite["results"]:  # type: ignore[union-attr]
+            label = f"{row['backend']:<22} {row['dtype']:<8} {row['projects']:>6}"
+            if "skipped" in row:
+                print(f"{label}  skipped: {row['skipped']}")
+                continue
+            print(
+                f"{label} {row['chunks']:>7} {row['build_s']:>8.2f} "
+                f"{row['incremental_s']:>7.2f} {row['query_p50_ms']:>7.2f} "
+                f"{row['query_p95_ms']:>7.2f} {row['query_p99_ms']:>7.2f}"
+            )
+        return
+
+    if args.command == "chunk-report":
+        root = get_arxiv_root()
+        report = chunk_report(args.pdf)
+        baseline = load_chunk_baseline(root)
+        if args.json:
+            print(json.dumps({"current": report, "baseline": baseline}, indent=2))
+        else:
+            print(f"{'chunker':<11} {'source':<8} {'files':>6} {'chunks':>7} "
+                  f"{'tokens':>9} {'over':>5} {'vs base':>8}")
+            for chunker, rows in report.items():
+                for source, row in sorted(rows.items(), key=lambda item: item[0] == "total"):
+                    base = baseline.get(chunker, {}).get(source, {}).get("chunks")
+                    delta = f"{row['chunks'] - base:+d}" if base is not None else "-"
+                    print(
+                        f"{chunker:<11} {source:<8} {row['files']:>6} {row['chunks']:>7} "
+                        f"{row['tokens']:>9} {row['over_budget']:>5} {delta:>8}"
+                    )
+        if args.save:
+            get_chunk_report_path(root).write_text(
+                json.dumps(report, indent=2), encoding="utf-8"
+            )
+        if args.max_growth is not None:
+            for chunker, rows in report.items():
+                base = baseline.get(chunker, {}).get("total", {}).get("chunks")
+                current = rows.get("total", {}).get("chunks", 0)
+                if base and current > base * (1 + args.max_growth / 100):
+                    print(
+                        f"Chunk count regression: {chunker} produced {current} "
+                        f"chunks, baseline {base} (+{args.max_growth:g}% allowed)"
+                    )
+                    sys.exit(1)
+        return
+
     parser.print_help()
 
 
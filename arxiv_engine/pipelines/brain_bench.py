@@ -0,0 +1,297 @@
+"""Indexing and query benchmarks for `arxiv brain` over synthetic knowledge roots.
+
+Roots are laid out by ``init_project.create_project`` and filled with
+seeded random summaries and playground code, so runs with the same
+arguments index the same corpus and results compare across releases.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import math
+import platform
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from arxiv_engine import __version__
+from arxiv_engine.pipelines import brain
+from arxiv_engine.pipelines.init_project import create_project
+
+CATEGORIES = ("cs.LG", "cs.CL", "cs.CV", "cs.AI", "stat.ML")
+TOPIC_WORDS = (
+    "attention", "transformer", "diffusion", "decoding", "speculative", "quantization",
+    "pruning", "distillation", "retrieval", "embedding", "tokenizer", "alignment",
+    "reward", "policy", "gradient", "optimizer", "sparsity", "mixture", "experts",
+    "latency", "throughput", "kernel", "fusion", "cache", "memory", "context",
+    "window", "rotary", "position", "benchmark", "reasoning", "chain", "thought",
+    "vision", "language", "contrastive", "pretraining", "finetuning", "adapter",
+    "lora", "inference", "serving", "batching", "scheduler", "graph", "convolution",
+    "segmentation", "detection", "generation", "sampling", "temperature", "beam",
+    "search", "agent", "planning", "tool", "evaluation", "robustness", "calibration",
+)
+FILLER_WORDS = (
+    "the", "a", "we", "model", "method", "results", "show", "that", "with", "on",
+    "for", "of", "and", "improves", "compared", "baseline", "using", "our", "each",
+    "layer", "training", "data", "task", "performance", "across", "setting",
+)
+SUMMARY_PARAGRAPHS = 2
+CODE_FILES = 2
+CHANGE_FRACTION = 0.05
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    picks = [
+        rng.choice(TOPIC_WORDS) if rng.random() < 0.35 else rng.choice(FILLER_WORDS)
+        for _ in range(words)
+    ]
+    return " ".join(picks).capitalize() + "."
+
+
+def paragraph(rng: random.Random) -> str:
+    return " ".join(sentence(rng, rng.randint(8, 20)) for _ in range(rng.randint(3, 7)))
+
+
+def synthetic_code(rng: random.Random) -> str:
+    parts = ["import math", ""]
+    for number in range(rng.randint(2, 5)):
+        name = "_".join(rng.sample(TOPIC_WORDS, 2))
+        parts.append(
+            f"def {name}_{number}(x, scale=1.0):\n"
+            f'    """{sentence(rng, 10)}"""\n'
+            f"    y = math.sqrt(abs(x)) * scale\n"
+            f"    return y + {rng.randint(1, 99)}\n"
+        )
+    name = "".join(word.title() for word in rng.sample(TOPIC_WORDS, 2))
+    parts.append(
+        f"class {name}:\n"
+        f'    """{sentence(rng, 12)}"""\n\n'
+        f"    def __init__(self, size):\n"
+        f"        self.size = size\n\n"
+        f"    def forward(self, x):\n"
+        f"        return [value * self.size for value in x]\n"
+    )
+    return "\n".join(parts)
+
+
+def synthetic_info(rng: random.Random, number: int) -> dict:
+    year = rng.randint(21, 25)
+    month = rng.randint(1, 12)
+    arxiv_id = f"{year}{month:02d}.{number:05d}"
+    category = rng.choice(CATEGORIES)
+    return {
+        "id": arxiv_id,
+        "title": " ".join(rng.sample(TOPIC_WORDS, 5)).title(),
+        "summary": paragraph(rng),
+        "published": f"20{year}-{month:02d}-{rng.randint(1, 28):02d}",
+        "authors": [f"Author {rng.randint(1, 500)}" for _ in range(rng.randint(1, 6))],
+        "categories": [category],
+        "primary_category": category,
+        "pdf_url": f"https://arxiv.org/pdf/{arxiv_id}.pdf",
+        "abs_url": f"https://arxiv.org/abs/{arxiv_id}",
+    }
+
+
+def generate_root(root: Path, projects: int, seed: int = 0) -> list[Path]:
+    """Create ``projects`` synthetic papers under ``root``; returns their directories."""
+    rng = random.Random(seed)
+    project_dirs: list[Path] = []
+    for number in range(1, projects + 1):
+        project_dir = create_project(synthetic_info(rng, number), root)
+        summary = project_dir / "SUMMARY.md"
+        lines: list[str] = []
+        for line in summary.read_text().splitlines():
+            lines.append(line)
+            if line.startswith("## "):
+                lines.extend(
+                    ["", *(paragraph(rng) for _ in range(SUMMARY_PARAGRAPHS))]
+                )
+        summary.write_text("\n".join(lines) + "\n")
+        for index in range(CODE_FILES):
+            (project_dir / "playground" / f"module_{index}.py").write_text(
+                synthetic_code(rng)
+            )
+        project_dirs.append(project_dir)
+    return project_dirs
+
+
+def edit_projects(project_dirs: list[Path], fraction: float, seed: int = 0) -> int:
+    """Append a paragraph to a fraction of summaries, as a day of note-taking would."""
+    rng = random.Random(seed + 1)
+    count = max(1, int(len(project_dirs) * fraction)) if project_dirs else 0
+    for project_dir in rng.sample(project_dirs, count):
+        summary = project_dir / "SUMMARY.md"
+        summary.write_text(summary.read_text() + "\n" + paragraph(rng) + "\n")
+    return count
+
+
+def synthetic_queries(rng: random.Random, count: int) -> list[str]:
+    return [
+        " ".join(rng.sample(TOPIC_WORDS, rng.randint(2, 5))) for _ in range(count)
+    ]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[min(rank, len(values)) - 1]
+
+
+def clear_index(root: Path) -> None:
+    for name in (
+        brain.DB_NAME,
+        f"{brain.DB_NAME}-wal",
+        f"{brain.DB_NAME}-shm",
+        brain.CACHE_DB_NAME,
+        brain.VECTORS_NAME,
+        brain.ANN_NAME,
+    ):
+        (root / name).unlink(missing_ok=True)
+
+
+def backend_unavailable(backend: str) -> str | None:
+    if backend == brain.SENTENCE_BACKEND and brain.probe_sentence_backend() is None:
+        return "sentence-transformers is not installed"
+    return None
+
+
+def bench_config(
+    root: Path,
+    project_dirs: list[Path],
+    backend: str,
+    dtype: str,
+    queries: list[str],
+    mode: str,
+    ann: bool,
+    change_fraction: float,
+    seed: int,
+) -> dict[str, object]:
+    row: dict[str, object] = {
+        "projects": len(project_dirs),
+        "backend": backend,
+        "dtype": dtype,
+        "mode": mode,
+        "ann": ann,
+    }
+    if dtype in brain.COMPRESSED_DTYPES and brain.np is None:
+        row["skipped"] = "NumPy is not installed"
+        return row
+    clear_index(root)
+    # Load the model outside the timed build.
+    started = time.perf_counter()
+    if brain.get_embedding_backend(backend, root) is None:
+        row["skipped"] = "backend failed to load"
+        return row
+    row["backend_load_s"] = time.perf_counter() - started
+
+    options = {
+        "vector_dtype": dtype,
+        "backend_name": backend,
+        # Measure embedding, not the on-disk embedding cache.
+        "cache_size": 0,
+        "pdf_workers": 0,
+        "ann": ann,
+        "root": root,
+    }
+    started = time.perf_counter()
+    row["chunks"] = brain.build_index(**options)  # type: ignore[arg-type]
+    row["build_s"] = time.perf_counter() - started
+
+    row["changed_projects"] = edit_projects(project_dirs, change_fraction, seed)
+    started = time.perf_counter()
+    row["rechunked"] = brain.build_index(incremental=True, **options)  # type: ignore[arg-type]
+    row["incremental_s"] = time.perf_counter() - started
+
+    latencies: list[float] = []
+    for text in queries:
+        started = time.perf_counter()
+        brain.query_brain(text, mode=mode, use_cache=False, root=root)
+        latencies.append((time.perf_counter() - started) * 1000)
+    # The first query pays for opening the sidecar and ANN files.
+    row["first_query_ms"] = latencies[0] if latencies else 0.0
+    warm = sorted(latencies[1:] or latencies)
+    row["queries"] = len(warm)
+    for pct in (50, 95, 99):
+        row[f"query_p{pct}_ms"] = percentile(warm, pct)
+    return row
+
+
+def run_benchmarks(
+    sizes: list[int],
+    backends: list[str],
+    dtypes: list[str],
+    queries: int = 200,
+    mode: str = "hybrid",
+    ann: bool = False,
+    change_fraction: float = CHANGE_FRACTION,
+    seed: int = 0,
+    work_dir: Path | None = None,
+    verbose: bool = False,
+) -> dict[str, object]:
+    """Time full and incremental builds and query latency for every configuration.
+
+    Each size gets a fresh root under ``work_dir`` (a temporary directory
+    by default, removed afterwards).  Output from the index pipeline is
+    suppressed unless ``verbose`` is set.
+    """
+    results: list[dict[str, object]] = []
+    base = work_dir or Path(tempfile.mkdtemp(prefix="arxiv-brain-bench-"))
+    try:
+        for size in sizes:
+            root = base / f"root-{size}"
+            shutil.rmtree(root, ignore_errors=True)
+            query_texts = synthetic_queries(random.Random(seed + 2), queries + 1)
+            for backend in backends:
+                reason = backend_unavailable(backend)
+                for dtype in dtypes:
+                    if reason:
+                        results.append(
+                            {
+                                "projects": size,
+                                "backend": backend,
+                                "dtype": dtype,
+                                "skipped": reason,
+                            }
+                        )
+                        continue
+                    # Every configuration starts from the same corpus; the
+                    # previous run's edits are overwritten.
+                    started = time.perf_counter()
+                    project_dirs = generate_root(root, size, seed)
+                    generate_s = time.perf_counter() - started
+                    quiet = (
+                        contextlib.nullcontext()
+                        if verbose
+                        else contextlib.redirect_stdout(io.StringIO())
+                    )
+                    with quiet:
+                        row = bench_config(
+                            root,
+                            project_dirs,
+                            backend,
+                            dtype,
+                            query_texts,
+                            mode,
+                            ann,
+                            change_fraction,
+                            seed,
+                        )
+                    row["generate_s"] = generate_s
+                    results.append(row)
+    finally:
+        if work_dir is None:
+            shutil.rmtree(base, ignore_errors=True)
+
+    return {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": brain.np is not None,
+        "seed": seed,
+        "results": results,
+    }
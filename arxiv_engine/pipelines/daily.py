@@ -4,77 +4,103 @@
 from __future__ import annotations
 
 import argparse
-import json
-import subprocess
-import urllib.parse
-import urllib.request
-import xml.etree.ElementTree as ET
+import sys
+import time
 from datetime import datetime, timedelta
-
-ARXIV_API = "http://export.arxiv.org/api/query"
-
-
-def fetch_recent_papers(topic: str, days: int = 7, max_results: int = 20) -> list[dict]:
-    """Fetch recent papers from arXiv."""
-    params = urllib.parse.urlencode({
+from typing import Iterator
+
+from arxiv_engine.core.arxiv_feed import PAGE_SIZE, batched, iter_query, print_json_array
+from arxiv_engine.core.github import MAX_CONCURRENT_LOOKUPS, lookup_repo, run_lookups
+from arxiv_engine.core.http_client import ARXIV_API, HttpClient
+from arxiv_engine.core.mirror import get_mirror_path, recent_entries
+
+GITHUB_TIMEOUT = 10
+
+
+def iter_recent_papers(
+    topic: str,
+    days: int = 7,
+    max_results: int = 20,
+    client: HttpClient | None = None,
+    api: str = ARXIV_API,
+    mirror: bool = False,
+) -> Iterator[dict]:
+    """Yield recent papers from arXiv (or the local mirror), newest first, until the cutoff date."""
+    params = {
         "search_query": f"all:{topic}",
-        "start": 0,
-        "max_results": max_results * 2,
         "sortBy": "submittedDate",
         "sortOrder": "descending",
-    })
-    url = f"{ARXIV_API}?{params}"
-
-    with urllib.request.urlopen(url, timeout=30) as resp:
-        xml_data = resp.read().decode("utf-8")
-
-    ns = {"atom": "http://www.w3.org/2005/Atom"}
-    root = ET.fromstring(xml_data)
-
+    }
+    if max_results <= 0:
+        return
+    page_size = min(PAGE_SIZE, max_results * 2)
     cutoff = datetime.now() - timedelta(days=days)
-    results = []
-
-    for entry in root.findall("atom:entry", ns):
-        published_str = entry.find("atom:published", ns).text[:10]
-        published = datetime.strptime(published_str, "%Y-%m-%d")
-
-        if published < cutoff:
-            continue
-
-        arxiv_id = entry.find("atom:id", ns).text.split("/abs/")[-1]
-        title = entry.find("atom:title", ns).text.strip().replace("\n", " ")
-        summary = entry.find("atom:summary", ns).text.strip()[:200]
-        categories = [c.get("term") for c in entry.findall("atom:category", ns)]
-
-        results.append({
+    count = 0
+    entries = (
+        recent_entries(topic, cutoff.strftime("%Y-%m-%d"), max_results)
+        if mirror
+        else iter_query(params, None, page_size, client, api)
+    )
+
+    for entry in entries:
+        published_str = entry["published"]
+        # Results are sorted by submission date, so the first paper past the
+        # cutoff ends the digest.
+        if not published_str or datetime.strptime(published_str, "%Y-%m-%d") < cutoff:
+            return
+
+        arxiv_id = entry["id"]
+        yield {
             "id": arxiv_id,
-            "title": title,
-            "summary": summary,
+            "title": entry["title"],
+            "summary": entry["summary"][:200],
             "published": published_str,
-            "category": categories[0] if categories else "unknown",
+            "category": entry["categories"][0] if entry["categories"] else "unknown",
             "abs_url": f"https://arxiv.org/abs/{arxiv_id}",
-        })
+        }
 
-        if len(results) >= max_results:
-            break
+        count += 1
+        if count >= max_results:
+            return
 
-    return results
+
+def fetch_recent_papers(
+    topic: str,
+    days: int = 7,
+    max_results: int = 20,
+    client: HttpClient | None = None,
+    api: str = ARXIV_API,
+    mirror: bool = False,
+) -> list[dict]:
+    """Fetch recent papers from arXiv."""
+    return list(iter_recent_papers(topic, days, max_results, client, api, mirror))
 
 
-def check_github(arxiv_id: str) -> dict | None:
+def check_github(
+    arxiv_id: str, timeout: float = GITHUB_TIMEOUT, refresh: bool = False
+) -> dict | None:
     """Check if paper has GitHub code."""
-    try:
-        result = subprocess.run(
-            ["gh", "search", "repos", arxiv_id, "--json", "fullName,stargazersCount", "--limit", "1"],
-            capture_output=True, text=True, timeout=10,
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            repos = json.loads(result.stdout)
-            if repos:
-                return {"repo": repos[0]["fullName"], "stars": repos[0]["stargazersCount"]}
-    except Exception:
-        pass
-    return None
+    return lookup_repo(arxiv_id, 1, timeout, refresh)
+
+
+def enrich_papers(
+    papers: list[dict],
+    jobs: int = MAX_CONCURRENT_LOOKUPS,
+    deadline: float | None = None,
+    refresh: bool = False,
+) -> None:
+    """Attach GitHub repo and stars to each paper, looking them up concurrently."""
+    found = run_lookups(
+        papers,
+        lambda p, timeout: check_github(p["id"], timeout, refresh),
+        GITHUB_TIMEOUT,
+        deadline,
+        jobs,
+    )
+    for p, gh in zip(papers, found):
+        if gh:
+            p["github"] = gh["repo"]
+            p["stars"] = gh["stars"]
 
 
 def main() -> None:
@@ -84,43 +110,62 @@ def main() -> None:
     parser.add_argument("--max", "-m", type=int, default=15, help="Max results")
     parser.add_argument("--json", "-j", action="store_true", help="JSON output")
     parser.add_argument("--code-only", "-c", action="store_true", help="Only show papers with code")
+    parser.add_argument(
+        "--jobs", type=int, default=MAX_CONCURRENT_LOOKUPS, help="Parallel GitHub lookups"
+    )
+    parser.add_argument(
+        "--deadline", type=float, default=None, help="Max seconds for all GitHub lookups"
+    )
+    parser.add_argument(
+        "--refresh", action="store_true", help="Ignore cached GitHub lookups"
+    )
+    parser.add_argument(
+        "--mirror", action="store_true", help="Read from the local mirror instead of the API"
+    )
     args = parser.parse_args()
 
-    print(f"📅 arXiv Daily: '{args.topic}' (last {args.days} days)\n")
+    if args.mirror and not get_mirror_path().exists():
+        print("No local mirror found. Run `arxiv mirror sync` first.")
+        sys.exit(1)
 
-    papers = fetch_recent_papers(args.topic, args.days, args.max)
+    print(f"📅 arXiv Daily: '{args.topic}' (last {args.days} days)\n")
 
-    for p in papers:
-        gh = check_github(p["id"])
-        if gh:
-            p["github"] = gh["repo"]
-            p["stars"] = gh["stars"]
+    stop_at = time.monotonic() + args.deadline if args.deadline is not None else None
 
-    if args.code_only:
-        papers = [p for p in papers if "github" in p]
+    def enriched() -> Iterator[dict]:
+        # Enrich and emit one page at a time so output starts before the
+        # last page has downloaded.
+        papers = iter_recent_papers(args.topic, args.days, args.max, mirror=args.mirror)
+        for batch in batched(papers, PAGE_SIZE):
+            remaining = stop_at - time.monotonic() if stop_at is not None else None
+            enrich_papers(batch, args.jobs, remaining, args.refresh)
+            yield from (p for p in batch if "github" in p or not args.code_only)
 
     if args.json:
-        print(json.dumps(papers, indent=2))
+        print_json_array(enriched())
         return
 
-    if not papers:
+    total = with_code = 0
+    current_date = None
+    for p in enriched():
+        if p["published"] != current_date:
+            if current_date is not None:
+                print()
+            current_date = p["published"]
+            print(f"### {current_date}")
+        code = f"⭐{p['stars']} {p['github']}" if "github" in p else "❌ No code"
+        print(f"\n  [{p['id']}] {p['title'][:65]}...")
+        print(f"  {p['category']} | {code}")
+        print(f"  {p['abs_url']}")
+        total += 1
+        with_code += "github" in p
+
+    if not total:
         print("No papers found matching criteria.")
         return
+    print()
 
-    by_date: dict[str, list[dict]] = {}
-    for p in papers:
-        by_date.setdefault(p["published"], []).append(p)
-
-    for date in sorted(by_date, reverse=True):
-        print(f"### {date}")
-        for p in by_date[date]:
-            code = f"⭐{p['stars']} {p['github']}" if "github" in p else "❌ No code"
-            print(f"\n  [{p['id']}] {p['title'][:65]}...")
-            print(f"  {p['category']} | {code}")
-            print(f"  {p['abs_url']}")
-        print()
-
-    print(f"📊 Total: {len(papers)} papers ({sum(1 for p in papers if 'github' in p)} with code)")
+    print(f"📊 Total: {total} papers ({with_code} with code)")
 
 
 if __name__ == "__main__":
@@ -7,21 +7,23 @@ import argparse
 import json
 import re
 import subprocess
-import urllib.request
+import urllib.parse
 import xml.etree.ElementTree as ET
 from datetime import datetime
 from pathlib import Path
 
+from arxiv_engine.core.http_client import ARXIV_API, HttpClient, get_arxiv_client
 from arxiv_engine.core.utils import ARXIV_ROOT, CONTEXT_FILE, update_global_readme
 
 
-def fetch_paper_info(arxiv_id: str) -> dict:
+def fetch_paper_info(
+    arxiv_id: str, client: HttpClient | None = None, api: str = ARXIV_API
+) -> dict:
     """Fetch paper metadata from arXiv API."""
     arxiv_id = re.sub(r"v\d+$", "", arxiv_id)
 
-    url = f"http://export.arxiv.org/api/query?id_list={arxiv_id}"
-    with urllib.request.urlopen(url, timeout=30) as resp:
-        xml_data = resp.read().decode("utf-8")
+    url = f"{api}?{urllib.parse.urlencode({'id_list': arxiv_id})}"
+    xml_data = (client or get_arxiv_client()).get(url).decode("utf-8")
 
     ns = {"atom": "http://www.w3.org/2005/Atom"}
     root = ET.fromstring(xml_data)
@@ -56,13 +58,13 @@ def to_snake_case(text: str) -> str:
     return "_".join(words)
 
 
-def create_project(info: dict) -> Path:
+def create_project(info: dict, root: Path = ARXIV_ROOT) -> Path:
     """Create project directory structure."""
     year_month = info["published"][:7].replace("-", "")
     year_short = year_month[2:6]
     category = info["primary_category"].split(".")[0].upper()
 
-    parent_dir = ARXIV_ROOT / f"{year_short}.{category}"
+    parent_dir = root / f"{year_short}.{category}"
     project_name = f"{info['id']}_{to_snake_case(info['title'])}"
     project_dir = parent_dir / project_name
 
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Local arXiv metadata mirror for offline `search` and `daily`."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+from datetime import datetime
+
+from arxiv_engine.core.http_client import HttpError
+from arxiv_engine.core.mirror import DEFAULT_SETS, OAI_API, mirror_status, sync_mirror
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local arXiv metadata mirror")
+    subparsers = parser.add_subparsers(dest="command")
+
+    sync_parser = subparsers.add_parser("sync", help="Harvest new and changed papers")
+    sync_parser.add_argument(
+        "--set",
+        dest="sets",
+        action="append",
+        help=f"OAI set to harvest, e.g. cs or stat (repeatable; default: {', '.join(DEFAULT_SETS)})",
+    )
+    sync_parser.add_argument(
+        "--from", dest="since", help="Harvest records changed since YYYY-MM-DD"
+    )
+    sync_parser.add_argument(
+        "--full", action="store_true", help="Ignore stored datestamps and harvest everything"
+    )
+    sync_parser.add_argument("--api", default=OAI_API, help="OAI-PMH endpoint")
+
+    status_parser = subparsers.add_parser("status", help="Show mirror size and sync state")
+    status_parser.add_argument("--json", "-j", action="store_true", help="JSON output")
+
+    args = parser.parse_args()
+
+    if args.command == "sync":
+        if args.since:
+            try:
+                datetime.strptime(args.since, "%Y-%m-%d")
+            except ValueError:
+                parser.error("--from must be YYYY-MM-DD")
+
+        def progress(set_spec: str, upserted: int, deleted: int) -> None:
+            print(f"\r  {set_spec}: {upserted} papers, {deleted} deleted", end="", flush=True)
+
+        try:
+            results = sync_mirror(
+                args.sets or DEFAULT_SETS, args.since, args.full, api=args.api, progress=progress
+            )
+        except (HttpError, ValueError, sqlite3.Error) as exc:
+            print(f"\nMirror sync failed: {exc}")
+            sys.exit(1)
+        print()
+        for set_spec, (upserted, deleted) in results.items():
+            print(f"✅ {set_spec}: {upserted} papers updated, {deleted} removed")
+        return
+
+    if args.command == "status":
+        try:
+            status = mirror_status()
+        except FileNotFoundError as exc:
+            print(exc)
+            sys.exit(1)
+        if args.json:
+            print(json.dumps(status, indent=2))
+            return
+        print(f"Mirror: {status['path']}")
+        print(f"Papers: {status['papers']} (newest {status['newest_paper'] or '-'})")
+        print(f"Size: {int(status['size_bytes']) / 1e6:.1f} MB")
+        for row in status["sets"]:  # type: ignore[union-attr]
+            synced = datetime.fromtimestamp(row["synced_at"]).strftime("%Y-%m-%d %H:%M")
+            print(f"  {row['set']}: through {row['datestamp']} (synced {synced})")
+        return
+
+    parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
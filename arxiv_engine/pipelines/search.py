@@ -4,75 +4,86 @@
 from __future__ import annotations
 
 import argparse
-import json
-import subprocess
-import urllib.parse
-import urllib.request
-import xml.etree.ElementTree as ET
-
-ARXIV_API = "http://export.arxiv.org/api/query"
-
-
-def search_arxiv(query: str, max_results: int = 10) -> list[dict]:
-    """Search arXiv API and return parsed results."""
-    params = urllib.parse.urlencode({
+import sys
+import time
+from typing import Iterator
+
+from arxiv_engine.core.arxiv_feed import PAGE_SIZE, batched, iter_query, print_json_array
+from arxiv_engine.core.github import MAX_CONCURRENT_LOOKUPS, lookup_repo, run_lookups
+from arxiv_engine.core.http_client import ARXIV_API, HttpClient
+from arxiv_engine.core.mirror import get_mirror_path, search_entries
+
+GITHUB_TIMEOUT = 15
+
+
+def iter_search_arxiv(
+    query: str,
+    max_results: int = 10,
+    client: HttpClient | None = None,
+    api: str = ARXIV_API,
+    page_size: int = PAGE_SIZE,
+    mirror: bool = False,
+) -> Iterator[dict]:
+    """Search arXiv API (or the local mirror), yielding results as they are parsed."""
+    params = {
         "search_query": f"all:{query}",
-        "start": 0,
-        "max_results": max_results,
         "sortBy": "relevance",
         "sortOrder": "descending",
-    })
-    url = f"{ARXIV_API}?{params}"
-
-    with urllib.request.urlopen(url, timeout=30) as resp:
-        xml_data = resp.read().decode("utf-8")
-
-    ns = {"atom": "http://www.w3.org/2005/Atom", "arxiv": "http://arxiv.org/schemas/atom"}
-    root = ET.fromstring(xml_data)
-
-    results = []
-    for entry in root.findall("atom:entry", ns):
-        id_element = entry.find("atom:id", ns)
-        title_element = entry.find("atom:title", ns)
-        summary_element = entry.find("atom:summary", ns)
-        published_element = entry.find("atom:published", ns)
-
-        arxiv_id = id_element.text.split("/abs/")[-1] if id_element is not None and id_element.text else "unknown"
-        title = title_element.text.strip().replace("\n", " ") if title_element is not None and title_element.text else "No Title"
-        summary = summary_element.text.strip()[:300] if summary_element is not None and summary_element.text else ""
-        published = published_element.text[:10] if published_element is not None and published_element.text else ""
-
-        categories = [c.get("term") for c in entry.findall("atom:category", ns)]
-        primary_cat = categories[0] if categories and categories[0] else "unknown"
-
-        results.append({
+    }
+    entries = (
+        search_entries(query, max_results)
+        if mirror
+        else iter_query(params, max_results, page_size, client, api)
+    )
+    for entry in entries:
+        arxiv_id = entry["id"]
+        yield {
             "id": arxiv_id,
-            "title": title,
-            "summary": summary,
-            "published": published,
-            "category": primary_cat,
+            "title": entry["title"] or "No Title",
+            "summary": entry["summary"][:300],
+            "published": entry["published"],
+            "category": entry["categories"][0] if entry["categories"] else "unknown",
             "pdf_url": f"https://arxiv.org/pdf/{arxiv_id}.pdf",
             "abs_url": f"https://arxiv.org/abs/{arxiv_id}",
-        })
+        }
 
-    return results
+
+def search_arxiv(
+    query: str,
+    max_results: int = 10,
+    client: HttpClient | None = None,
+    api: str = ARXIV_API,
+    mirror: bool = False,
+) -> list[dict]:
+    """Search arXiv API and return parsed results."""
+    return list(iter_search_arxiv(query, max_results, client, api, mirror=mirror))
 
 
-def search_github_for_paper(arxiv_id: str, title: str) -> dict | None:
+def search_github_for_paper(
+    arxiv_id: str, title: str, timeout: float = GITHUB_TIMEOUT, refresh: bool = False
+) -> dict | None:
     """Search GitHub for paper implementation."""
-    try:
-        result = subprocess.run(
-            ["gh", "search", "repos", arxiv_id, "--json", "fullName,stargazersCount", "--limit", "3"],
-            capture_output=True, text=True, timeout=15,
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            repos = json.loads(result.stdout)
-            if repos:
-                top = max(repos, key=lambda x: x.get("stargazersCount", 0))
-                return {"repo": top["fullName"], "stars": top["stargazersCount"]}
-    except Exception:
-        pass
-    return None
+    return lookup_repo(arxiv_id, 3, timeout, refresh)
+
+
+def enrich_results(
+    results: list[dict],
+    jobs: int = MAX_CONCURRENT_LOOKUPS,
+    deadline: float | None = None,
+    refresh: bool = False,
+) -> None:
+    """Attach GitHub repo and stars to each result, looking them up concurrently."""
+    found = run_lookups(
+        results,
+        lambda r, timeout: search_github_for_paper(r["id"], r["title"], timeout, refresh),
+        GITHUB_TIMEOUT,
+        deadline,
+        jobs,
+    )
+    for r, gh in zip(results, found):
+        if gh:
+            r["github"] = gh["repo"]
+            r["stars"] = gh["stars"]
 
 
 def main() -> None:
@@ -80,20 +91,39 @@ def main() -> None:
     parser.add_argument("--search", "-s", required=True, help="Search query")
     parser.add_argument("--max", "-m", type=int, default=10, help="Max results")
     parser.add_argument("--json", "-j", action="store_true", help="JSON output")
+    parser.add_argument(
+        "--jobs", type=int, default=MAX_CONCURRENT_LOOKUPS, help="Parallel GitHub lookups"
+    )
+    parser.add_argument(
+        "--deadline", type=float, default=None, help="Max seconds for all GitHub lookups"
+    )
+    parser.add_argument(
+        "--refresh", action="store_true", help="Ignore cached GitHub lookups"
+    )
+    parser.add_argument(
+        "--mirror", action="store_true", help="Search the local mirror instead of the API"
+    )
     args = parser.parse_args()
 
-    results = search_arxiv(args.search, args.max)
+    if args.mirror and not get_mirror_path().exists():
+        print("No local mirror found. Run `arxiv mirror sync` first.")
+        sys.exit(1)
 
-    for r in results:
-        gh = search_github_for_paper(r["id"], r["title"])
-        if gh:
-            r["github"] = gh["repo"]
-            r["stars"] = gh["stars"]
+    stop_at = time.monotonic() + args.deadline if args.deadline is not None else None
+
+    def enriched() -> Iterator[dict]:
+        # Enrich and emit one page at a time so output starts before the
+        # last page has downloaded.
+        papers = iter_search_arxiv(args.search, args.max, mirror=args.mirror)
+        for batch in batched(papers, PAGE_SIZE):
+            remaining = stop_at - time.monotonic() if stop_at is not None else None
+            enrich_results(batch, args.jobs, remaining, args.refresh)
+            yield from batch
 
     if args.json:
-        print(json.dumps(results, indent=2))
+        print_json_array(enriched())
     else:
-        for i, r in enumerate(results, 1):
+        for i, r in enumerate(enriched(), 1):
             stars = f"⭐{r['stars']}" if "stars" in r else "No code"
             print(f"\n{i}. [{r['id']}] {r['title'][:70]}...")
             print(f"   📅 {r['published']} | 📁 {r['category']} | {stars}")
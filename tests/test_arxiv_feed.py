@@ -0,0 +1,85 @@
+"""Paginated API reads stop as soon as the result set or the caller is done."""
+
+from __future__ import annotations
+
+import http.server
+import itertools
+import threading
+import urllib.parse
+from typing import Iterator
+
+import pytest
+
+from arxiv_engine.core.arxiv_feed import iter_query
+from arxiv_engine.core.http_client import HttpClient
+
+TOTAL = 5
+
+
+def atom_page(start: int, size: int) -> bytes:
+    entries = "".join(
+        f"<entry><id>http://arxiv.org/abs/2401.{number:05d}v1</id>"
+        f"<title>Paper {number}</title><summary>About {number}.</summary>"
+        "<published>2024-01-02T00:00:00Z</published>"
+        '<category term="cs.LG"/></entry>'
+        for number in range(start, min(start + size, TOTAL))
+    )
+    return f'<feed xmlns="http://www.w3.org/2005/Atom">{entries}</feed>'.encode()
+
+
+@pytest.fixture
+def api() -> Iterator[tuple[str, list[dict[str, str]]]]:
+    requests: list[dict[str, str]] = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+            requests.append(query)
+            body = atom_page(int(query["start"]), int(query["max_results"]))
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: object) -> None:
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/api/query", requests
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_short_page_ends_the_query(api: tuple[str, list[dict[str, str]]]) -> None:
+    url, requests = api
+    with HttpClient() as client:
+        ids = [e["id"] for e in iter_query({"q": "x"}, None, 2, client, url)]
+    assert ids == [f"2401.{number:05d}v1" for number in range(TOTAL)]
+    assert [(r["start"], r["max_results"]) for r in requests] == [
+        ("0", "2"),
+        ("2", "2"),
+        ("4", "2"),
+    ]
+
+
+def test_limit_trims_the_last_page(api: tuple[str, list[dict[str, str]]]) -> None:
+    url, requests = api
+    with HttpClient() as client:
+        entries = list(iter_query({"q": "x"}, 3, 2, client, url))
+    assert len(entries) == 3
+    assert [(r["start"], r["max_results"]) for r in requests] == [("0", "2"), ("2", "1")]
+
+
+def test_consumer_stopping_fetches_no_more_pages(
+    api: tuple[str, list[dict[str, str]]]
+) -> None:
+    url, requests = api
+    with HttpClient() as client:
+        entries = list(itertools.islice(iter_query({"q": "x"}, None, 2, client, url), 2))
+    assert [e["title"] for e in entries] == ["Paper 0", "Paper 1"]
+    assert len(requests) == 1
@@ -0,0 +1,43 @@
+"""Full index builds: per-file failures and storage format."""
+
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from arxiv_engine.pipelines import brain
+from arxiv_engine.pipelines.brain_bench import generate_root
+
+
+def indexed_paths(root: Path) -> set[str]:
+    conn = sqlite3.connect(brain.get_db_path(root))
+    try:
+        return {str(path) for (path,) in conn.execute("SELECT DISTINCT path FROM chunks")}
+    finally:
+        conn.close()
+
+
+def test_a_failing_file_is_skipped_not_fatal(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    root = tmp_path / "kb"
+    project_dirs = generate_root(root, 3, seed=5)
+    bad = project_dirs[0] / "SUMMARY.md"
+    chunk_source = brain.chunk_source
+
+    def flaky_chunk_source(text: str, source: str, chunker: str = brain.DEFAULT_CHUNKER):
+        if "\0bad" in text:
+            raise ValueError("cannot chunk this")
+        return chunk_source(text, source, chunker)
+
+    bad.write_text(bad.read_text() + "\0bad")
+    monkeypatch.setattr(brain, "chunk_source", flaky_chunk_source)
+    count = brain.build_index(backend_name="hash", pdf_workers=0, cache_size=0, root=root)
+
+    assert count > 0
+    assert f"Warning: skipping {bad}: cannot chunk this" in capsys.readouterr().out
+    paths = indexed_paths(root)
+    assert str(bad) not in paths
+    assert str(project_dirs[1] / "SUMMARY.md") in paths
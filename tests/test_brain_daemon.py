@@ -0,0 +1,68 @@
+"""`brain serve` answers over its socket, errors included."""
+
+from __future__ import annotations
+
+import socket
+import threading
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from arxiv_engine.pipelines import brain
+from arxiv_engine.pipelines.brain_bench import generate_root
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="no Unix sockets")
+
+
+@pytest.fixture
+def root(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    root = tmp_path / "kb"
+    root.mkdir()
+    monkeypatch.setattr(brain, "get_arxiv_root", lambda: root)
+    return root
+
+
+@pytest.fixture
+def server(root: Path) -> Iterator[Path]:
+    path = brain.get_socket_path(root)
+    server = brain.BrainServer(path, root)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield path
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_query_errors_reach_the_client(server: Path) -> None:
+    response = brain.ask_daemon({"text": "speculative decoding"}, server)
+    assert response == {"error": "Index not found. Run: arxiv brain index"}
+
+    response = brain.ask_daemon({"no_text": True}, server)
+    assert response is not None and str(response["error"]).startswith("bad request")
+
+
+def test_daemon_matches_in_process_results(root: Path, server: Path) -> None:
+    generate_root(root, 3, seed=6)
+    brain.build_index(backend_name="hash", pdf_workers=0, cache_size=0, root=root)
+
+    expected = brain.query_brain("attention kernels", use_cache=False)
+    assert expected
+    assert brain.query_brain_via_daemon("attention kernels", use_cache=False) == expected
+
+
+def test_client_falls_back_after_an_error_reply(
+    root: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+) -> None:
+    generate_root(root, 3, seed=7)
+    brain.build_index(backend_name="hash", pdf_workers=0, cache_size=0, root=root)
+    expected = brain.query_brain("attention kernels", use_cache=False)
+    monkeypatch.setattr(
+        brain, "ask_daemon", lambda payload, *args, **kwargs: {"error": "backend mismatch"}
+    )
+    capsys.readouterr()
+
+    assert brain.query_brain_via_daemon("attention kernels", use_cache=False) == expected
+    assert "Brain server: backend mismatch" in capsys.readouterr().out
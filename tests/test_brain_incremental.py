@@ -0,0 +1,122 @@
+"""Incremental brain builds must keep the chunks of files whose content didn't change."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from arxiv_engine.core.pdftext import pdf_extractor_available
+from arxiv_engine.pipelines import brain
+from arxiv_engine.pipelines.brain_bench import generate_root
+
+PDF_TEXT = """Abstract
+We study speculative decoding for fast inference with a small draft model.
+
+1 Introduction
+Large language models are slow to decode because every token needs a full
+forward pass. Speculative decoding drafts several tokens and verifies them.
+
+2 Method
+The draft model proposes tokens and the target model accepts a prefix.
+"""
+
+
+def chunk_counts(root: Path) -> dict[str, int]:
+    conn = sqlite3.connect(brain.get_db_path(root))
+    try:
+        return dict(conn.execute("SELECT path, COUNT(*) FROM chunks GROUP BY path"))
+    finally:
+        conn.close()
+
+
+def add_pdf(project_dir: Path, root: Path) -> Path:
+    """Give a project a paper.pdf whose extracted text is already cached."""
+    pdf = project_dir / brain.PDF_NAME
+    pdf.write_bytes(b"%PDF-1.4\n% fixture\n")
+    text_dir = brain.get_pdf_text_dir(root)
+    text_dir.mkdir(exist_ok=True)
+    digest = hashlib.sha256(pdf.read_bytes()).hexdigest()
+    (text_dir / f"{digest}.txt").write_text(PDF_TEXT, encoding="utf-8")
+    return pdf
+
+
+def bump_mtime(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+
+
+@pytest.mark.skipif(not pdf_extractor_available(), reason="no PDF extractor installed")
+def test_touched_files_keep_their_chunks(tmp_path: Path) -> None:
+    root = tmp_path / "kb"
+    project_dirs = generate_root(root, 4, seed=1)
+    pdf = add_pdf(project_dirs[0], root)
+    summary = project_dirs[1] / "SUMMARY.md"
+    options = {"backend_name": "hash", "pdf_workers": 1, "cache_size": 0, "root": root}
+
+    brain.build_index(**options)
+    before = chunk_counts(root)
+    assert before[str(summary)] > 0
+    assert before[str(pdf)] > 0
+
+    bump_mtime(summary)
+    bump_mtime(pdf)
+    brain.build_index(incremental=True, **options)
+    assert chunk_counts(root) == before
+
+    # The refreshed files rows mean a second pass sees nothing to do.
+    brain.build_index(incremental=True, **options)
+    assert chunk_counts(root) == before
+
+
+def test_emptied_file_drops_its_chunks(tmp_path: Path) -> None:
+    root = tmp_path / "kb"
+    project_dirs = generate_root(root, 2, seed=2)
+    summary = project_dirs[0] / "SUMMARY.md"
+    options = {"backend_name": "hash", "pdf_workers": 0, "cache_size": 0, "root": root}
+
+    brain.build_index(**options)
+    assert chunk_counts(root)[str(summary)] > 0
+
+    summary.write_text("")
+    bump_mtime(summary)
+    brain.build_index(incremental=True, **options)
+    assert str(summary) not in chunk_counts(root)
+
+
+@pytest.mark.skipif(brain.np is None, reason="NumPy not installed")
+@pytest.mark.parametrize("dtype", ["float16", "int8", "pq"])
+def test_incremental_update_keeps_the_index_dtype(
+    tmp_path: Path, dtype: str, capsys: pytest.CaptureFixture[str]
+) -> None:
+    root = tmp_path / "kb"
+    project_dirs = generate_root(root, 6, seed=3)
+    options = {"backend_name": "hash", "pdf_workers": 0, "cache_size": 0, "root": root}
+
+    brain.build_index(vector_dtype=dtype, **options)
+    conn = sqlite3.connect(brain.get_db_path(root))
+    try:
+        before = brain.load_meta(conn)
+    finally:
+        conn.close()
+    assert before["vector_dtype"] == dtype
+
+    summary = project_dirs[0] / "SUMMARY.md"
+    summary.write_text(summary.read_text() + "\nA new paragraph about KV cache eviction.\n")
+    bump_mtime(summary)
+    capsys.readouterr()
+    brain.build_index(incremental=True, **options)
+    output = capsys.readouterr().out
+    assert "full rebuild" not in output
+    assert "Re-indexed" in output
+
+    conn = sqlite3.connect(brain.get_db_path(root))
+    try:
+        after = brain.load_meta(conn)
+    finally:
+        conn.close()
+    assert after["vector_dtype"] == dtype
+    assert after.get("pq_codebook") == before.get("pq_codebook")
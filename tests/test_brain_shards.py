@@ -0,0 +1,55 @@
+"""Merging shards must store vectors in the dtype the merged index declares."""
+
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from arxiv_engine.pipelines import brain
+from arxiv_engine.pipelines.brain_bench import generate_root
+
+pytestmark = pytest.mark.skipif(brain.np is None, reason="NumPy not installed")
+
+
+def vector_sizes(db_path: Path) -> set[int]:
+    conn = sqlite3.connect(db_path)
+    try:
+        return {int(size) for (size,) in conn.execute("SELECT LENGTH(vector) FROM chunks")}
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_float32_shards_are_encoded_on_merge(tmp_path: Path, dtype: str) -> None:
+    root = tmp_path / "kb"
+    generate_root(root, 6, seed=4)
+    groups = brain.partition_categories(root, 2)
+    assert len(groups) == 2
+    shard_dbs = []
+    for number, group in enumerate(groups):
+        shard_dir = brain.get_shards_dir(root) / f"shard-{number:02d}"
+        shard_dir.mkdir(parents=True)
+        # What build_sharded_index stages when a corpus-wide fit is pending.
+        brain.build_index(
+            vector_dtype="float32",
+            backend_name="hash",
+            pdf_workers=0,
+            cache_size=0,
+            root=root,
+            categories=group,
+            index_dir=shard_dir,
+        )
+        shard_dbs.append(brain.get_db_path(shard_dir))
+
+    assert brain.merge_shards(root, shard_dbs, dtype) > 0
+
+    reference = tmp_path / "reference"
+    generate_root(reference, 6, seed=4)
+    brain.build_index(
+        vector_dtype=dtype, backend_name="hash", pdf_workers=0, cache_size=0, root=reference
+    )
+    assert vector_sizes(brain.get_db_path(root)) == vector_sizes(
+        brain.get_db_path(reference)
+    )
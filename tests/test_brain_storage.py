@@ -0,0 +1,139 @@
+"""Index storage: schema migration, quantized vectors and the hash embedding."""
+
+from __future__ import annotations
+
+import json
+import random
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from arxiv_engine.pipelines import brain
+from arxiv_engine.pipelines.brain_bench import TOPIC_WORDS, generate_root
+
+QUERIES = [
+    "speculative decoding draft model",
+    "attention kernels memory bandwidth",
+    "quantization of weights",
+    "sparse mixture of experts routing",
+    "kv cache eviction",
+]
+
+
+def write_v1_index(root: Path) -> list[tuple[str, str]]:
+    """The original layout: JSON text vectors and no schema_version row."""
+    conn = sqlite3.connect(brain.get_db_path(root))
+    rows: list[tuple[str, str]] = []
+    try:
+        conn.execute(
+            "CREATE TABLE chunks (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "source TEXT NOT NULL, path TEXT NOT NULL, chunk_index INTEGER NOT NULL, "
+            "content TEXT NOT NULL, vector TEXT NOT NULL)"
+        )
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.executemany(
+            "INSERT INTO meta (key, value) VALUES (?, ?)",
+            [("vector_dim", str(brain.HASH_VECTOR_DIM)), ("embedding_backend", "hash")],
+        )
+        for path in sorted(root.glob("*/*/SUMMARY.md")):
+            for index, chunk in enumerate(brain.chunk_text(path.read_text())):
+                conn.execute(
+                    "INSERT INTO chunks (source, path, chunk_index, content, vector) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    ("summary", str(path), index, chunk, json.dumps(brain.hash_vector(chunk))),
+                )
+                rows.append((str(path), chunk))
+        conn.commit()
+    finally:
+        conn.close()
+    return rows
+
+
+def test_v1_index_migrates_to_current_schema(tmp_path: Path) -> None:
+    root = tmp_path / "kb"
+    project_dirs = generate_root(root, 3, seed=8)
+    rows = write_v1_index(root)
+
+    results = brain.query_brain(
+        QUERIES[0], top_k=3, mode="vector", use_cache=False, root=root
+    )
+    assert results
+
+    conn = sqlite3.connect(brain.get_db_path(root))
+    try:
+        assert brain.get_schema_version(conn) == brain.SCHEMA_VERSION
+        stored = conn.execute(
+            "SELECT path, content, vector, token_count, category, project FROM chunks "
+            "ORDER BY id"
+        ).fetchall()
+        (postings,) = conn.execute("SELECT COUNT(*) FROM postings").fetchone()
+        projects = {row[0] for row in conn.execute("SELECT project FROM projects")}
+    finally:
+        conn.close()
+
+    assert [(path, content) for path, content, *_ in stored] == rows
+    for path, content, vector, token_count, category, project in stored:
+        assert vector == brain.pack_vector(brain.hash_vector(content))
+        assert token_count == sum(brain.term_frequencies(content).values())
+        assert (category, project) == brain.project_of(root, Path(path))
+    assert postings > 0
+    assert projects == {str(d.relative_to(root)) for d in project_dirs}
+
+
+@pytest.mark.skipif(brain.np is None, reason="NumPy not installed")
+@pytest.mark.parametrize("dtype, min_overlap", [("float16", 0.9), ("int8", 0.8), ("pq", 0.6)])
+def test_quantized_rankings_track_float32(
+    tmp_path: Path, dtype: str, min_overlap: float
+) -> None:
+    roots = {}
+    for vector_dtype in ("float32", dtype):
+        root = tmp_path / vector_dtype
+        generate_root(root, 12, seed=9)
+        brain.build_index(
+            vector_dtype=vector_dtype,
+            backend_name="hash",
+            pdf_workers=0,
+            cache_size=0,
+            root=root,
+        )
+        conn = sqlite3.connect(brain.get_db_path(root))
+        try:
+            assert brain.load_meta(conn)["vector_dtype"] == vector_dtype
+        finally:
+            conn.close()
+        roots[vector_dtype] = root
+
+    def top(root: Path, text: str) -> list[tuple[str, int]]:
+        results = brain.query_brain(
+            text, top_k=5, mode="vector", exact=True, use_cache=False, root=root
+        )
+        return [
+            (str(Path(r["path"]).relative_to(root)), r["chunk_index"]) for r in results
+        ]
+
+    overlaps = []
+    for text in QUERIES:
+        expected = top(roots["float32"], text)
+        assert len(expected) == 5
+        overlaps.append(len(set(expected) & set(top(roots[dtype], text))) / 5)
+    assert sum(overlaps) / len(overlaps) >= min_overlap
+
+
+def test_hash_embedding_matches_hash_vector_bit_for_bit() -> None:
+    rng = random.Random(10)
+    texts = [
+        "",
+        "   ",
+        "Attention is all you need",
+        "naïve café über — 注意力 机制",
+        "x" * 5000,
+        *(" ".join(rng.choices(TOPIC_WORDS, k=rng.randint(1, 60))) for _ in range(50)),
+    ]
+    backend = brain.HashEmbedding()
+    encoded = backend.encode(texts)
+    assert len(encoded) == len(texts)
+    for text, vector in zip(texts, encoded):
+        expected = brain.hash_vector(text)
+        assert brain.pack_vector(vector) == brain.pack_vector(expected)
+        assert [float(v) for v in vector] == expected
@@ -0,0 +1,29 @@
+"""The embedding cache commits per batch instead of holding its file locked."""
+
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+from arxiv_engine.pipelines import brain
+
+
+def test_batches_are_committed_and_trimmed_before_close(tmp_path: Path) -> None:
+    path = tmp_path / brain.CACHE_DB_NAME
+    cache = brain.CachedEmbedding(brain.HashEmbedding(), path, max_entries=3)
+    try:
+        texts = ["alpha beta", "gamma delta", "epsilon", "zeta eta", "theta"]
+        assert cache.encode(texts) == brain.HashEmbedding().encode(texts)
+
+        other = sqlite3.connect(path, timeout=0.1)
+        try:
+            (rows,) = other.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            assert rows == 3
+            # The query cache shares this file; it must be able to write now.
+            other.execute("CREATE TABLE IF NOT EXISTS probe (x)")
+            other.commit()
+        finally:
+            other.close()
+        assert cache.misses == len(texts)
+    finally:
+        cache.close()
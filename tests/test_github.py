@@ -0,0 +1,48 @@
+"""GitHub lookups past the deadline still answer from the on-disk cache."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from arxiv_engine.core import github
+
+
+@pytest.fixture
+def lookup_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> github.LookupCache:
+    cache = github.LookupCache(tmp_path / github.CACHE_DB_NAME)
+    monkeypatch.setattr(github, "get_lookup_cache", lambda: cache)
+    yield cache
+    cache.close()
+
+
+def test_cached_repos_survive_an_expired_deadline(
+    lookup_cache: github.LookupCache, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: list[str] = []
+
+    def search_repos(query: str, limit: int, timeout: float) -> list[dict] | None:
+        calls.append(query)
+        return None
+
+    monkeypatch.setattr(github, "search_repos", search_repos)
+    lookup_cache.put("2401.00001", {"repo": "org/fast-decoding", "stars": 42})
+
+    found = github.run_lookups(
+        ["2401.00001v2", "2401.00002"],
+        lambda arxiv_id, timeout: github.lookup_repo(arxiv_id, 1, timeout),
+        call_timeout=5.0,
+        deadline=0.0,
+    )
+    assert found == [{"repo": "org/fast-decoding", "stars": 42}, None]
+    # The cached paper never reached gh.
+    assert calls == ["2401.00002"]
+
+
+def test_search_repos_skips_gh_without_time_left(monkeypatch: pytest.MonkeyPatch) -> None:
+    def run(*args: object, **kwargs: object) -> None:
+        raise AssertionError("gh must not run past the deadline")
+
+    monkeypatch.setattr(github.subprocess, "run", run)
+    assert github.search_repos("2401.00001", 1, 0.0) is None
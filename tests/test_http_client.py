@@ -0,0 +1,178 @@
+"""HttpClient against local stand-in servers."""
+
+from __future__ import annotations
+
+import gzip
+import http.server
+import threading
+from pathlib import Path
+from typing import Callable, Iterator
+
+import pytest
+
+from arxiv_engine.core import http_client
+from arxiv_engine.core.http_client import MAX_REDIRECTS, HttpClient, HttpError
+
+Handler = Callable[[http.server.BaseHTTPRequestHandler], None]
+
+
+def serve(handle: Handler) -> Iterator[str]:
+    class RequestHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            handle(self)
+
+        def log_message(self, *args: object) -> None:
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), RequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def reply(
+    request: http.server.BaseHTTPRequestHandler, status: int, body: bytes = b"", **headers: str
+) -> None:
+    request.send_response(status)
+    for name, value in headers.items():
+        request.send_header(name.replace("_", "-"), value)
+    request.send_header("Content-Length", str(len(body)))
+    request.end_headers()
+    request.wfile.write(body)
+
+
+@pytest.fixture
+def target() -> Iterator[str]:
+    yield from serve(lambda request: reply(request, 200, f"ok {request.path}".encode()))
+
+
+def test_follows_redirect_to_another_host(target: str) -> None:
+    def redirect(request: http.server.BaseHTTPRequestHandler) -> None:
+        if request.path == "/old":
+            reply(request, 301, Location=f"{target}/moved?x=1")
+        else:
+            reply(request, 307, Location="/old")
+
+    for origin in serve(redirect):
+        with HttpClient(backoff=0) as client:
+            assert client.get(f"{origin}/start") == b"ok /moved?x=1"
+            with client.open(f"{origin}/old") as stream:
+                assert stream.read() == b"ok /moved?x=1"
+
+
+def test_redirect_loop_gives_up() -> None:
+    hits: list[str] = []
+
+    def loop(request: http.server.BaseHTTPRequestHandler) -> None:
+        hits.append(request.path)
+        reply(request, 302, Location="/again")
+
+    for origin in serve(loop):
+        with HttpClient(backoff=0) as client, pytest.raises(HttpError):
+            client.get(f"{origin}/again")
+    assert len(hits) == MAX_REDIRECTS + 1
+
+
+def test_gzip_bodies_are_decoded() -> None:
+    body = b"<feed>" + b"x" * 1000 + b"</feed>"
+
+    def gzipped(request: http.server.BaseHTTPRequestHandler) -> None:
+        assert "gzip" in request.headers.get("Accept-Encoding", "")
+        reply(request, 200, gzip.compress(body), Content_Encoding="gzip")
+
+    for origin in serve(gzipped):
+        with HttpClient(backoff=0) as client:
+            assert client.get(f"{origin}/feed") == body
+            with client.open(f"{origin}/feed") as stream:
+                assert stream.read() == body
+
+
+def test_retries_honour_retry_after(monkeypatch: pytest.MonkeyPatch) -> None:
+    statuses = [503, 429, 200]
+    delays: list[float] = []
+    monkeypatch.setattr(http_client.time, "sleep", delays.append)
+
+    def flaky(request: http.server.BaseHTTPRequestHandler) -> None:
+        status = statuses.pop(0)
+        if status == 200:
+            reply(request, 200, b"done")
+        else:
+            reply(request, status, Retry_After="7")
+
+    for origin in serve(flaky):
+        with HttpClient(backoff=1.0, max_backoff=60.0) as client:
+            assert client.get(f"{origin}/busy") == b"done"
+    # Backoff doubles per attempt, but never undercuts Retry-After.
+    assert delays == [7.0, 7.0]
+
+
+def test_retries_give_up_with_the_last_status(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(http_client.time, "sleep", lambda seconds: None)
+    hits: list[str] = []
+
+    def down(request: http.server.BaseHTTPRequestHandler) -> None:
+        hits.append(request.path)
+        reply(request, 502)
+
+    for origin in serve(down):
+        with HttpClient(retries=2) as client, pytest.raises(HttpError) as excinfo:
+            client.get(f"{origin}/down")
+    assert excinfo.value.status == 502
+    assert len(hits) == 3
+
+
+def test_connections_are_reused() -> None:
+    peers: set[tuple[str, int]] = set()
+
+    def remember_peer(request: http.server.BaseHTTPRequestHandler) -> None:
+        peers.add(request.client_address)
+        reply(request, 200, b"ok")
+
+    for origin in serve(remember_peer):
+        with HttpClient() as client:
+            for number in range(5):
+                assert client.get(f"{origin}/{number}") == b"ok"
+            with client.open(f"{origin}/streamed") as stream:
+                assert stream.read() == b"ok"
+    assert len(peers) == 1
+
+
+def test_revalidation_survives_a_new_client(tmp_path: Path) -> None:
+    conditional: list[str | None] = []
+    body = b"<feed>cached</feed>"
+
+    def etagged(request: http.server.BaseHTTPRequestHandler) -> None:
+        conditional.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            reply(request, 304)
+        else:
+            reply(request, 200, gzip.compress(body), ETag='"v1"', Content_Encoding="gzip")
+
+    for origin in serve(etagged):
+        url = f"{origin}/feed?q=1"
+        with HttpClient(cache_dir=tmp_path) as client:
+            with client.open(url) as stream:
+                assert stream.read() == body
+        # A later process: validators and body come from the cache directory.
+        with HttpClient(cache_dir=tmp_path) as client:
+            with client.open(url) as stream:
+                assert stream.read() == body
+            assert client.get(url) == body
+    assert conditional == [None, '"v1"', '"v1"']
+
+
+def test_partially_read_bodies_are_not_cached(tmp_path: Path) -> None:
+    def etagged(request: http.server.BaseHTTPRequestHandler) -> None:
+        reply(request, 200, b"a long body", ETag='"v1"')
+
+    for origin in serve(etagged):
+        with HttpClient(cache_dir=tmp_path) as client:
+            with client.open(f"{origin}/feed") as stream:
+                assert stream.read(1) == b"a"
+    assert list(tmp_path.iterdir()) == []
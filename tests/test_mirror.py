@@ -0,0 +1,92 @@
+"""`sync_mirror` against a checked-in OAI-PMH fixture feed."""
+
+from __future__ import annotations
+
+import http.server
+import threading
+import urllib.parse
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from arxiv_engine.core import mirror
+from arxiv_engine.core.http_client import HttpClient
+
+FIXTURES = Path(__file__).parent / "fixtures" / "oai"
+
+
+@pytest.fixture
+def oai_api() -> Iterator[tuple[str, list[dict[str, str]]]]:
+    """Serve the fixture pages; the first request answers page 1, tokens page 2."""
+    requests: list[dict[str, str]] = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            params = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(self.path).query))
+            requests.append(params)
+            if params.get("resumptionToken") == "fixture-page-2":
+                name = "page2.xml"
+            elif "from" in params:
+                name = "no_records.xml"
+            else:
+                name = "page1.xml"
+            body = (FIXTURES / name).read_bytes()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/xml")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: object) -> None:
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}/oai2", requests
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_sync_mirror_from_fixture_feed(
+    tmp_path: Path, oai_api: tuple[str, list[dict[str, str]]]
+) -> None:
+    api, requests = oai_api
+    with HttpClient(backoff=0) as client:
+        results = mirror.sync_mirror(["cs"], root=tmp_path, client=client, api=api)
+        assert results == {"cs": (3, 1)}
+
+        status = mirror.mirror_status(tmp_path)
+        assert status["papers"] == 2
+        assert status["sets"][0]["datestamp"] == "2024-01-09"  # type: ignore[index]
+
+        # The deleted record is gone from both the table and the FTS index.
+        assert mirror.search_entries("sparse mixture experts", 10, tmp_path) == []
+
+        [hit] = mirror.search_entries("speculative decoding", 10, tmp_path)
+        assert hit["id"] == "2401.00001"
+        assert hit["title"] == "Speculative Decoding with Small Draft Models"
+        assert hit["authors"] == ["Jane Doe", "Richard Roe Jr"]
+        assert hit["categories"] == ["cs.CL", "cs.LG"]
+        assert hit["published"] == "2024-01-02"
+
+        # Papers first submitted before the cutoff are left out.
+        assert mirror.recent_entries("decoding", "2024-01-05", 10, tmp_path) == []
+        recent = mirror.recent_entries("kernels", "2024-01-05", 10, tmp_path)
+        assert [entry["id"] for entry in recent] == ["2401.00003"]
+
+        # A second sync resumes from the stored datestamp and changes nothing.
+        assert mirror.sync_mirror(["cs"], root=tmp_path, client=client, api=api) == {
+            "cs": (0, 0)
+        }
+    assert requests[-1] == {
+        "verb": "ListRecords",
+        "metadataPrefix": "arXiv",
+        "set": "cs",
+        "from": "2024-01-09",
+    }
+    assert mirror.mirror_status(tmp_path)["papers"] == 2
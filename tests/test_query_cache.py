@@ -0,0 +1,45 @@
+"""Cached `brain ask` results are only served for the index generation they came from."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from arxiv_engine.pipelines import brain
+from arxiv_engine.pipelines.brain_bench import generate_root
+
+
+def test_query_cache_follows_index_generation(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    root = tmp_path / "kb"
+    project_dirs = generate_root(root, 3, seed=11)
+    options = {"backend_name": "hash", "pdf_workers": 0, "cache_size": 0, "root": root}
+    brain.build_index(**options)
+
+    calls: list[str] = []
+    rank_query = brain.rank_query
+
+    def counting_rank_query(conn, root, meta, text, *args, **kwargs):  # type: ignore[no-untyped-def]
+        calls.append(meta["index_generation"])
+        return rank_query(conn, root, meta, text, *args, **kwargs)
+
+    monkeypatch.setattr(brain, "rank_query", counting_rank_query)
+    first = brain.query_brain("speculative decoding", root=root)
+    assert brain.query_brain("speculative decoding", root=root) == first
+    assert len(calls) == 1
+
+    summary = project_dirs[0] / "SUMMARY.md"
+    summary.write_text(summary.read_text() + "\nSpeculative decoding with tree drafts.\n")
+    stat = summary.stat()
+    os.utime(summary, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000_000))
+    brain.build_index(incremental=True, **options)
+
+    second = brain.query_brain("speculative decoding", root=root)
+    assert len(calls) == 2
+    assert calls[1] != calls[0]
+    assert second != first
+    assert brain.query_brain("speculative decoding", root=root) == second
+    assert len(calls) == 2